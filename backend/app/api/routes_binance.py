@@ -2,13 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
-import requests
 import logging
 
 from app.database import get_db
 from app.models.models import User, BinanceAccount, Trade
 from app.services.auth import get_current_user
-from app.services.binance_client import BinanceTrader
+from app.services.async_binance_client import AsyncBinanceTrader, market_data_url
+from app.services.price_snapshot import get_price_snapshot
+from app.services.rate_limiter import Priority, request_priority
+from app.services.trader_pool import get_trader, trader_pool
 
 logger = logging.getLogger(__name__)
 
@@ -48,12 +50,13 @@ async def connect_binance_account(
     """
     # Test connection first
     try:
-        trader = BinanceTrader(
+        trader = AsyncBinanceTrader(
             api_key=account_data.api_key,
             api_secret=account_data.api_secret,
             testnet=account_data.testnet
         )
-        balance = trader.get_account_balance()
+        with request_priority(Priority.DASHBOARD):
+            balance = await trader.get_account_balance()
         if balance is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -95,7 +98,7 @@ async def list_binance_accounts(
     # Add holdings information
     result = []
     for acc in accounts:
-        holdings = await get_account_holdings(acc.id, db)
+        holdings = await get_account_holdings(acc, db)
         total_holdings_value = sum(h['current_value'] for h in holdings)
         
         result.append({
@@ -114,7 +117,7 @@ async def list_binance_accounts(
     return result
 
 
-async def get_account_holdings(account_id: int, db):
+async def get_account_holdings(account: BinanceAccount, db):
     """Calculate coin holdings from open trades."""
     try:
         from sqlalchemy import func
@@ -122,7 +125,7 @@ async def get_account_holdings(account_id: int, db):
         
         # Find all bots using this account
         bot_ids = db.query(BotConfig.id).filter(
-            BotConfig.binance_account_id == account_id
+            BotConfig.binance_account_id == account.id
         ).all()
         bot_ids = [b[0] for b in bot_ids]
         
@@ -137,24 +140,18 @@ async def get_account_holdings(account_id: int, db):
         ).filter(
             Trade.bot_config_id.in_(bot_ids),
             Trade.side == 'BUY',
-            Trade.status == OrderStatus.FILLED,
+            Trade.status.in_([OrderStatus.FILLED, OrderStatus.CLOSING]),
             Trade.exit_time.is_(None)
         ).group_by(Trade.symbol).all()
         
         holdings = []
         for symbol, quantity, avg_price in buy_trades:
             if quantity and quantity > 0:
-                # Get current price from Binance US
-                try:
-                    response = requests.get(
-                        f"https://api.binance.us/api/v3/ticker/price",
-                        params={'symbol': symbol},
-                        timeout=5
-                    )
-                    response.raise_for_status()
-                    current_price = float(response.json()['price'])
-                except Exception as e:
-                    logger.error(f"Error fetching price for {symbol}: {e}")
+                # Current price from the snapshot of the account's venue
+                with request_priority(Priority.DASHBOARD):
+                    current_price = await get_price_snapshot(market_data_url(account.testnet)).get_price(symbol)
+                if current_price is None:
+                    logger.error(f"No snapshot price for {symbol}, using average entry price")
                     current_price = avg_price
                 
                 current_value = quantity * current_price
@@ -227,6 +224,10 @@ async def update_binance_account(
     db.commit()
     db.refresh(account)
     
+    # Pooled traders hold the old keys
+    if account_data.api_key or account_data.api_secret:
+        trader_pool.invalidate(account.id)
+    
     return account
 
 @router.delete("/accounts/{account_id}")
@@ -248,6 +249,7 @@ async def delete_binance_account(
     
     db.delete(account)
     db.commit()
+    trader_pool.invalidate(account_id)
     
     return {"message": "Account deleted successfully"}
 
@@ -269,12 +271,9 @@ async def sync_binance_account(
         raise HTTPException(status_code=404, detail="Account not found")
     
     try:
-        trader = BinanceTrader(
-            api_key=account.api_key,
-            api_secret=account.api_secret,
-            testnet=account.testnet
-        )
-        balance = trader.get_account_balance()
+        trader = get_trader(account)
+        with request_priority(Priority.DASHBOARD):
+            balance = await trader.get_account_balance()
         account.balance_usdt = balance.get('USDT', {}).get('total', 0.0)
         db.commit()
         
@@ -306,7 +305,7 @@ async def get_portfolio_summary(
     
     for acc in accounts:
         total_usdt_balance += acc.balance_usdt or 0
-        holdings = await get_account_holdings(acc.id, db)
+        holdings = await get_account_holdings(acc, db)
         for h in holdings:
             total_holdings_value += h['current_value']
             all_holdings.append(h)
@@ -5,8 +5,9 @@ from typing import Optional, Dict
 from datetime import datetime
 
 from app.database import get_db
-from app.models.models import User, BotConfig, TradingStrategy, BotStatus, BinanceAccount
+from app.models.models import User, BotConfig, TradingStrategy, BotStatus, BinanceAccount, BotStats
 from app.services.auth import get_current_user
+from app.services.bot_scheduler import bot_scheduler
 
 router = APIRouter(prefix="/api/bots", tags=["Trading Bots"])
 
@@ -118,6 +119,42 @@ async def get_bot(
     
     return bot
 
+@router.get("/{bot_id}/stats")
+async def get_bot_stats(
+    bot_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Running statistics of a bot's closed trades.
+    """
+    bot = db.query(BotConfig).filter(
+        BotConfig.id == bot_id,
+        BotConfig.user_id == current_user.id
+    ).first()
+    
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    
+    stats = db.query(BotStats).filter(BotStats.bot_config_id == bot_id).first() or BotStats(
+        bot_config_id=bot_id, closed_trades=0, wins=0, losses=0, gross_profit_usdt=0.0,
+        gross_loss_usdt=0.0, net_profit_usdt=0.0, peak_profit_usdt=0.0,
+        max_drawdown_usdt=0.0, total_hold_seconds=0.0
+    )
+    return {
+        "bot_id": bot_id,
+        "closed_trades": stats.closed_trades,
+        "wins": stats.wins,
+        "losses": stats.losses,
+        "win_rate": round(stats.win_rate, 2),
+        "gross_profit_usdt": stats.gross_profit_usdt,
+        "gross_loss_usdt": stats.gross_loss_usdt,
+        "net_profit_usdt": stats.net_profit_usdt,
+        "max_drawdown_usdt": stats.max_drawdown_usdt,
+        "avg_hold_seconds": stats.avg_hold_seconds,
+        "updated_at": stats.updated_at
+    }
+
 @router.put("/{bot_id}", response_model=BotConfigResponse)
 async def update_bot(
     bot_id: int,
@@ -151,6 +188,7 @@ async def update_bot(
     
     db.commit()
     db.refresh(bot)
+    bot_scheduler.notify(bot.id, bot.status, bot.config_params)
     
     return bot
 
@@ -202,6 +240,7 @@ async def start_bot(
     
     bot.status = BotStatus.ACTIVE
     db.commit()
+    bot_scheduler.notify(bot.id, bot.status, bot.config_params)
     
     return {"message": "Bot started successfully", "status": bot.status}
 
@@ -224,5 +263,6 @@ async def pause_bot(
     
     bot.status = BotStatus.PAUSED
     db.commit()
+    bot_scheduler.notify(bot.id, bot.status)
     
     return {"message": "Bot paused successfully", "status": bot.status}
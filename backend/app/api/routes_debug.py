@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.models import BotConfig, BinanceAccount
-from app.services.binance_client import BinanceTrader
+from app.services.trader_pool import get_trader
+from app.services.candle_store import get_klines
+from app.services.rate_limiter import Priority, request_priority
 from app.services.trading_engine import TradingEngine
 from app.services.auth import get_current_user
 import logging
@@ -30,18 +32,16 @@ async def get_bot_signal(
     if not binance_account:
         raise HTTPException(status_code=404, detail="Binance account not found")
     
-    trader = BinanceTrader(
-        api_key=binance_account.api_key,
-        api_secret=binance_account.api_secret,
-        testnet=binance_account.testnet
-    )
+    trader = get_trader(binance_account)
     
     # Fetch data
-    klines = trader.get_historical_klines(
-        symbol=bot.symbol,
-        interval='1h',
-        limit=100
-    )
+    with request_priority(Priority.DASHBOARD):
+        klines = await get_klines(
+            trader,
+            symbol=bot.symbol,
+            interval='1h',
+            limit=100
+        )
     
     if klines.empty:
         return {"error": "No klines data available"}
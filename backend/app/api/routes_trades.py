@@ -8,7 +8,11 @@ from datetime import datetime, timedelta
 from app.database import get_db
 from app.models.models import User, Trade, BotConfig, OrderStatus, BinanceAccount, OrderSide
 from app.services.auth import get_current_user
-from app.services.binance_client import BinanceTrader
+from app.services.trader_pool import get_trader
+from app.services.async_binance_client import market_data_url
+from app.services.price_snapshot import get_price_snapshot
+from app.services.matching_engine import PAPER_STARTING_BALANCE
+from app.services.trading_engine import adjust_paper_balance
 import logging
 
 logger = logging.getLogger(__name__)
@@ -182,15 +186,11 @@ async def create_manual_trade(
         if not account.is_active:
             raise HTTPException(status_code=400, detail="Account not active")
         
-        trader = BinanceTrader(
-            api_key=account.api_key,
-            api_secret=account.api_secret,
-            testnet=account.testnet
-        )
+        trader = get_trader(account)
         
         logger.info(f"Manual trade - Account ID: {account.id}, Testnet: {account.testnet}, Side: {trade_request.side}")
         
-        current_price = trader.get_current_price(trade_request.symbol)
+        current_price = await get_price_snapshot(market_data_url(account.testnet)).get_price(trade_request.symbol)
         if not current_price:
             raise HTTPException(status_code=400, detail=f"Could not get price for {trade_request.symbol}")
         
@@ -231,7 +231,7 @@ async def create_manual_trade(
         
         logger.info(f"Manual {trade_request.side}: {quantity} {trade_request.symbol} @ {current_price}")
         
-        order_result = trader.place_market_order(
+        order_result = await trader.place_market_order(
             symbol=trade_request.symbol,
             side=trade_request.side,
             quantity=quantity
@@ -244,13 +244,17 @@ async def create_manual_trade(
             raise HTTPException(status_code=400, detail=f"Order failed: {error_msg}")
         
         if account.testnet:
+            # What the fill moved, fee included, applied the way the engine does
+            filled_value = order_result.get('quote_quantity')
+            if filled_value is None:
+                filled_value = order_result.get('price', current_price) * order_result.get('quantity', quantity)
+            commission = order_result.get('commission', 0.0)
             if trade_request.side == 'BUY':
-                account.balance_usdt = (account.balance_usdt or 10000.0) - trade_request.amount_usdt
+                adjust_paper_balance(db, account.id, -(filled_value + commission), PAPER_STARTING_BALANCE)
             elif trade_request.side == 'SELL':
                 # When selling, add the USDT value received back to balance
-                usdt_received = current_price * quantity
-                account.balance_usdt = (account.balance_usdt or 0.0) + usdt_received
-                logger.info(f"SELL: Received ${usdt_received:.2f} USDT, new balance: ${account.balance_usdt:.2f}")
+                adjust_paper_balance(db, account.id, filled_value - commission, 0.0)
+                logger.info(f"SELL: Received ${filled_value - commission:.2f} USDT")
         
         trade = Trade(
             user_id=current_user.id,
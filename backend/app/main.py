@@ -1,10 +1,10 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import os
 import sys
 import traceback
 
@@ -14,28 +14,31 @@ logger = logging.getLogger(__name__)
 try:
     from app.database import engine, Base, SessionLocal
     from app.api import routes_auth, routes_binance, routes_bots, routes_trades, routes_debug
-    from app.services.trading_engine import TradingEngine
+    from app.models.models import TradingRun, TradingRunStatus
+    from app.services.scheduler import create_scheduler
+    from app.services.async_binance_client import close_http_client
+    from app.services.trader_pool import trader_pool
+    from app.services.rate_limiter import rate_limit_stats
+    from app.services.circuit_breaker import breaker_stats
+    from app.services.matching_engine import paper_exchange
+    from app.strategies.registry import strategy_cache_stats
+    from app.services.candle_store import ensure_candle_store_schema
+    from app.services.trading_engine import ensure_order_status_enum
+    from app.services.bot_stats import seed_missing_stats
+    from app.services.position_monitor import POSITION_MONITOR_ENABLED, run_position_monitors
+    from app.services.bot_scheduler import TRADING_SCHEDULE, bot_scheduler
     logger.info("All imports successful")
 except Exception as e:
     logger.error(f"Import error: {e}")
     logger.error(traceback.format_exc())
     sys.exit(1)
 
-scheduler = AsyncIOScheduler()
+# Run the trading scheduler inside the API process. Set to false when the
+# standalone worker (python -m app.worker) is deployed, so scaling the API
+# doesn't multiply the hourly job.
+EMBEDDED_SCHEDULER = os.getenv("EMBEDDED_SCHEDULER", "true").lower() == "true"
 
-async def scheduled_trading_execution():
-    """
-    Scheduled task that runs every hour to execute trades.
-    """
-    logger.info("Starting scheduled trading execution")
-    db = SessionLocal()
-    try:
-        engine = TradingEngine(db)
-        await engine.execute_hourly_trading()
-    except Exception as e:
-        logger.error(f"Error in scheduled trading: {e}")
-    finally:
-        db.close()
+scheduler = create_scheduler()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -44,22 +47,38 @@ async def lifespan(app: FastAPI):
     
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    ensure_candle_store_schema(engine)
+    ensure_order_status_enum(engine)
+    db = SessionLocal()
+    try:
+        seed_missing_stats(db)
+    finally:
+        db.close()
     
-    # Start scheduler - runs every hour at minute 0
-    scheduler.add_job(
-        scheduled_trading_execution,
-        CronTrigger(hour='*', minute='0'),
-        id='hourly_trading',
-        replace_existing=True
-    )
-    scheduler.start()
-    logger.info("Scheduler started - trading will execute every hour")
+    background_tasks = []
+    if EMBEDDED_SCHEDULER:
+        scheduler.start()
+        if TRADING_SCHEDULE == 'per_bot':
+            background_tasks.append(asyncio.create_task(bot_scheduler.run()))
+            logger.info("Scheduler started - each bot runs when its candle interval closes")
+        else:
+            logger.info("Scheduler started - trading will execute every hour")
+        if POSITION_MONITOR_ENABLED:
+            background_tasks.append(asyncio.create_task(run_position_monitors()))
+            logger.info("Position monitor started")
+    else:
+        logger.info("Embedded scheduler disabled - trading runs in the worker process")
     
     yield
     
     # Shutdown
-    logger.info("Shutting down scheduler")
-    scheduler.shutdown()
+    if scheduler.running:
+        logger.info("Shutting down scheduler")
+        scheduler.shutdown()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await close_http_client()
 
 app = FastAPI(
     title="Bot Trading API",
@@ -95,25 +114,68 @@ async def root():
 
 @app.get("/health")
 async def health():
+    hourly_job = scheduler.get_job('hourly_trading') if scheduler.running else None
+    if hourly_job:
+        next_run = str(hourly_job.next_run_time)
+    else:
+        next_run = bot_scheduler.stats()['next_due'] if scheduler.running else None
     return {
         "status": "healthy",
         "scheduler": scheduler.running,
-        "next_run": str(scheduler.get_jobs()[0].next_run_time) if scheduler.get_jobs() else None
+        "next_run": next_run,
+        "bot_scheduler": bot_scheduler.stats() if TRADING_SCHEDULE == 'per_bot' else None,
+        "trader_pool": trader_pool.stats(),
+        "rate_limits": rate_limit_stats(),
+        "circuit_breakers": breaker_stats(),
+        "paper_exchange": paper_exchange.stats(),
+        "strategies": strategy_cache_stats()
     }
 
-@app.post("/api/trading/execute-now")
+def _trading_run_response(run: TradingRun):
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "stats": run.stats,
+        "error": run.error_message,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at
+    }
+
+@app.post("/api/trading/execute-now", status_code=202)
 async def execute_trading_now(current_user: dict = Depends(routes_auth.get_current_user)):
     """
     Manual trigger for trading execution (requires authentication).
+    Queues a run for the trading worker instead of trading inside the request.
     """
     db = SessionLocal()
     try:
-        engine = TradingEngine(db)
-        await engine.execute_hourly_trading()
-        return {"message": "Trading execution completed"}
+        run = TradingRun(requested_by=current_user.id, status=TradingRunStatus.PENDING)
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+        logger.info(f"Queued trading run {run.id}")
+        return {"message": "Trading execution queued", **_trading_run_response(run)}
     except Exception as e:
-        logger.error(f"Error in manual trading execution: {e}")
+        logger.error(f"Error queueing manual trading execution: {e}")
         logger.error(traceback.format_exc())
         return {"error": str(e)}
     finally:
         db.close()
+
+@app.get("/api/trading/runs/{run_id}")
+async def get_trading_run(run_id: int, current_user: dict = Depends(routes_auth.get_current_user)):
+    """
+    Status of a queued trading run.
+    """
+    db = SessionLocal()
+    try:
+        run = db.query(TradingRun).filter(
+            TradingRun.id == run_id,
+            TradingRun.requested_by == current_user.id
+        ).first()
+        if not run:
+            raise HTTPException(status_code=404, detail="Trading run not found")
+        return _trading_run_response(run)
+    finally:
+        db.close()
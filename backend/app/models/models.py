@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Enum, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -80,6 +80,7 @@ class OrderSide(str, enum.Enum):
 class OrderStatus(str, enum.Enum):
     PENDING = "pending"
     FILLED = "filled"
+    CLOSING = "closing"  # an exit order is in flight; set by TradingEngine.execute_sell_order
     CANCELLED = "cancelled"
     FAILED = "failed"
 
@@ -115,8 +116,15 @@ class Trade(Base):
 
 class MarketData(Base):
     __tablename__ = "market_data"
+    __table_args__ = (
+        # One row per closed candle and venue; the candle store upserts on this key
+        Index("ix_market_data_venue_symbol_timeframe_timestamp", "venue", "symbol", "timeframe", "timestamp",
+              unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    # REST base URL the candle was fetched from (Binance and Binance US differ)
+    venue = Column(String)
     symbol = Column(String, index=True, nullable=False)
     timeframe = Column(String, default="1h")
     open_price = Column(Float)
@@ -128,3 +136,68 @@ class MarketData(Base):
     ma_20 = Column(Float)
     ma_50 = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+
+class TradingRunStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# Manually requested trading cycles, queued for the trading worker
+class TradingRun(Base):
+    __tablename__ = "trading_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    requested_by = Column(Integer, ForeignKey("users.id"))
+    status = Column(Enum(TradingRunStatus), default=TradingRunStatus.PENDING, index=True)
+    stats = Column(JSON)
+    error_message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+# Named leases with heartbeats; the holder of "trading-cycle" runs the cycle
+class LeaderLease(Base):
+    __tablename__ = "leader_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+
+# Which replica took which bot in a given cycle
+class BotCycleClaim(Base):
+    __tablename__ = "bot_cycle_claims"
+    __table_args__ = (
+        UniqueConstraint("bot_config_id", "cycle_key", name="uq_bot_cycle_claims_bot_cycle"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bot_config_id = Column(Integer, ForeignKey("bot_configs.id", ondelete="CASCADE"), nullable=False)
+    cycle_key = Column(String, nullable=False, index=True)
+    claimed_by = Column(String, nullable=False)
+    claimed_at = Column(DateTime, default=datetime.utcnow)
+
+# Running per-bot counters, updated in the transaction that closes a trade
+class BotStats(Base):
+    __tablename__ = "bot_stats"
+    
+    bot_config_id = Column(Integer, ForeignKey("bot_configs.id", ondelete="CASCADE"), primary_key=True)
+    closed_trades = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    gross_profit_usdt = Column(Float, nullable=False, default=0.0)
+    gross_loss_usdt = Column(Float, nullable=False, default=0.0)
+    net_profit_usdt = Column(Float, nullable=False, default=0.0)
+    peak_profit_usdt = Column(Float, nullable=False, default=0.0)
+    max_drawdown_usdt = Column(Float, nullable=False, default=0.0)
+    total_hold_seconds = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.closed_trades * 100 if self.closed_trades else 0.0
+    
+    @property
+    def avg_hold_seconds(self) -> float:
+        return self.total_hold_seconds / self.closed_trades if self.closed_trades else 0.0
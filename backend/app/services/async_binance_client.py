@@ -0,0 +1,359 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import random
+import time
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+import pandas as pd
+
+from app.services.binance_client import MOCK_FALLBACK, klines_to_dataframe, generate_mock_klines
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.matching_engine import PaperAccountMixin
+from app.services.rate_limiter import get_rate_limiter, request_weight
+
+logger = logging.getLogger(__name__)
+
+# Live accounts talk to Binance; paper accounts read public market data
+# from Binance US (same source the sync BinanceTrader uses).
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+BINANCE_PUBLIC_API_URL = os.getenv("BINANCE_PUBLIC_API_URL", "https://api.binance.us")
+HTTP_MAX_CONNECTIONS = int(os.getenv("BINANCE_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("BINANCE_HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("BINANCE_HTTP_TIMEOUT_SECONDS", "10"))
+RECV_WINDOW_MS = 5000
+# Retries for idempotent reads (GET); orders are never retried
+RETRY_ATTEMPTS = int(os.getenv("BINANCE_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("BINANCE_RETRY_BASE_SECONDS", "0.25"))
+RETRY_MAX_SECONDS = float(os.getenv("BINANCE_RETRY_MAX_SECONDS", "4"))
+
+# Cheap, latency-sensitive reads give up sooner than heavy ones
+ENDPOINT_TIMEOUTS = {
+    '/api/v3/ticker/price': 3.0,
+    '/api/v3/klines': 8.0,
+    '/api/v3/account': 5.0,
+    '/api/v3/exchangeInfo': 15.0,
+}
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def market_data_url(testnet: bool) -> str:
+    """REST base URL an account trades and reads market data on."""
+    return BINANCE_PUBLIC_API_URL if testnet else BINANCE_API_URL
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide keep-alive connection pool shared by every async trader.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            )
+        )
+    return _http_client
+
+def set_http_client(client: httpx.AsyncClient):
+    """Replace the shared pool, e.g. with a client routed to the fake exchange."""
+    global _http_client
+    _http_client = client
+
+async def close_http_client():
+    """Close the shared connection pool (called on shutdown)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (from 1)."""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+async def send_request(method: str, base_url: str, path: str, params: Optional[dict] = None,
+                       build_query: Optional[Callable[[], str]] = None, headers: Optional[dict] = None,
+                       order_account: Optional[str] = None) -> httpx.Response:
+    """
+    Send one Binance REST call through the host's rate limiter and circuit
+    breaker, with the endpoint's timeout. GETs are retried with jittered
+    backoff on transport errors and 5xx responses; anything else is sent
+    once, since a retried order could fill twice.
+
+    `build_query` is called for every attempt so signed requests get a
+    fresh timestamp. Returns the last response; raises httpx errors, or
+    CircuitOpenError while the host is failing.
+    """
+    params = params or {}
+    limiter = get_rate_limiter(base_url)
+    breaker = get_circuit_breaker(base_url)
+    timeout = ENDPOINT_TIMEOUTS.get(path, HTTP_TIMEOUT_SECONDS)
+    attempts = max(RETRY_ATTEMPTS, 1) if method == 'GET' else 1
+
+    for attempt in range(1, attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {breaker.host}, not sending {method} {path}")
+        query = build_query() if build_query else urlencode(params)
+        url = f"{base_url}{path}?{query}" if query else f"{base_url}{path}"
+
+        # Wait for request weight (and order rate for new orders) before sending
+        await limiter.acquire(request_weight(method, path, params), order_account=order_account)
+        try:
+            response = await get_http_client().request(method, url, headers=headers, timeout=timeout)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            if attempt == attempts:
+                raise
+            logger.warning(f"{method} {path} failed ({e!r}), retry {attempt}/{attempts - 1}")
+        else:
+            limiter.observe(response.status_code, response.headers, order_account)
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if attempt == attempts:
+                return response
+            logger.warning(f"{method} {path} returned {response.status_code}, retry {attempt}/{attempts - 1}")
+        breaker.retries += 1
+        await asyncio.sleep(retry_delay(attempt))
+
+def format_decimal(value: float) -> str:
+    """Render a quantity/price the way Binance accepts it (no exponent)."""
+    return f"{value:.8f}".rstrip('0').rstrip('.')
+
+class BinanceRequestError(Exception):
+    """Error response from the Binance REST API."""
+
+    def __init__(self, status_code: int, code: int = None, message: str = ""):
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+        super().__init__(f"APIError(code={code}): {message}" if code is not None else message)
+
+class AsyncBinanceTrader(PaperAccountMixin):
+    """
+    Non-blocking counterpart of BinanceTrader built on the shared httpx pool.
+    Return values match BinanceTrader so callers can switch by adding await.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        # Paper trading mode - use real Binance US data, orders go to the
+        # in-process matching engine (PaperAccountMixin)
+        self.testnet = testnet
+        self.base_url = market_data_url(testnet)
+
+    def _signed_query(self, params: dict) -> str:
+        params = dict(params)
+        params['recvWindow'] = RECV_WINDOW_MS
+        params['timestamp'] = int(time.time() * 1000)
+        query = urlencode(params)
+        signature = hmac.new(
+            self.api_secret.encode('utf-8'), query.encode('utf-8'), hashlib.sha256
+        ).hexdigest()
+        return f"{query}&signature={signature}"
+
+    async def _request(self, method: str, path: str, params: dict = None, signed: bool = False):
+        params = params or {}
+        headers = {}
+        build_query = None
+        if signed:
+            # Sign the exact query string that goes on the wire
+            build_query = lambda: self._signed_query(params)
+            headers['X-MBX-APIKEY'] = self.api_key
+        order_account = self.api_key if method == 'POST' and path == '/api/v3/order' else None
+        response = await send_request(method, self.base_url, path, params, build_query, headers, order_account)
+        if response.status_code >= 400:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = {}
+            raise BinanceRequestError(
+                response.status_code,
+                payload.get('code'),
+                payload.get('msg', response.text)
+            )
+        return response.json()
+
+    async def get_account_balance(self):
+        # Paper trading mode - return simulated balance
+        if self.testnet:
+            return self.paper_balances()
+
+        # Real trading mode
+        try:
+            account = await self._request('GET', '/api/v3/account', signed=True)
+            balances = {}
+            for balance in account['balances']:
+                free = float(balance['free'])
+                locked = float(balance['locked'])
+                if free > 0 or locked > 0:
+                    balances[balance['asset']] = {
+                        'free': free,
+                        'locked': locked,
+                        'total': free + locked
+                    }
+            return balances
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Error getting balance: {e}")
+            return {}
+
+    async def get_usdt_balance(self):
+        balances = await self.get_account_balance()
+        return balances.get('USDT', {}).get('free', 0.0)
+
+    async def get_historical_klines(self, symbol: str, interval: str = '1h', limit: int = 100,
+                                    start_time: Optional[int] = None, end_time: Optional[int] = None,
+                                    allow_mock: bool = True):
+        logger.info(f"Fetching klines for {symbol} (testnet={self.testnet})")
+        params = {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit
+        }
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        try:
+            klines = await self._request('GET', '/api/v3/klines', params)
+            if not klines:
+                logger.warning(f"No klines data returned for {symbol}")
+                return pd.DataFrame()
+
+            df = klines_to_dataframe(klines)
+            logger.info(f"Fetched {len(df)} candles for {symbol}. Latest price: {df['close'].iloc[-1]:,.2f}")
+            return df
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Error fetching klines for {symbol}: {e}")
+            if self.testnet and allow_mock and MOCK_FALLBACK:
+                # Opt-in: random candles instead of none when the public API fails
+                logger.warning(f"Falling back to mock data")
+                return generate_mock_klines(symbol, limit)
+            return pd.DataFrame()
+
+    async def get_current_price(self, symbol: str):
+        if self.testnet:
+            # Paper accounts price off the shared Binance US snapshot
+            from app.services.price_snapshot import get_price_snapshot
+            return await get_price_snapshot(self.base_url).get_price(symbol)
+        try:
+            data = await self._request('GET', '/api/v3/ticker/price', {'symbol': symbol})
+            return float(data['price'])
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Error getting price: {e}")
+            return None
+
+    async def _apply_filters(self, symbol: str, side: str, quantity: float, price: Optional[float],
+                             market: bool) -> Tuple[float, Optional[float], Optional[str]]:
+        """
+        Round quantity (and a limit price) to the symbol's step and tick sizes
+        and check them against its filters before the order goes out.
+        Returns (quantity, price, error); error is None when the order is valid.
+        """
+        from app.services.exchange_info import get_exchange_info
+
+        filters = await get_exchange_info(self.base_url).get(symbol)
+        if filters is None:
+            return quantity, price, None
+        quantity = filters.round_quantity(quantity, market)
+        if price is not None and not market:
+            price = filters.round_price(price, side)
+        error = filters.check(quantity, price, market)
+        return float(quantity), None if price is None else float(price), error
+
+    async def place_market_order(self, symbol: str, side: str, quantity: float):
+        # Pre-validate against the symbol filters; the snapshot price stands
+        # in for the fill price in the min notional check
+        from app.services.price_snapshot import get_price_snapshot
+
+        expected_price = await get_price_snapshot(self.base_url).get_price(symbol)
+        quantity, _, error = await self._apply_filters(symbol, side, quantity, expected_price, market=True)
+        if error:
+            logger.warning(f"{side} {symbol} not sent: {error}")
+            return {'success': False, 'error': error}
+
+        # Paper trading mode - fill on the simulated exchange
+        if self.testnet:
+            return self.paper_order(symbol, side, 'MARKET', quantity, await self.get_current_price(symbol))
+
+        # Real trading mode
+        try:
+            order = await self._request('POST', '/api/v3/order', {
+                'symbol': symbol,
+                'side': side,
+                'type': 'MARKET',
+                'quantity': format_decimal(quantity),
+                'newOrderRespType': 'FULL'
+            }, signed=True)
+            return {
+                'success': True,
+                'order_id': order['orderId'],
+                'price': float(order.get('fills', [{}])[0].get('price', 0)),
+                'quantity': float(order['executedQty']),
+                'quote_quantity': float(order['cummulativeQuoteQty']),
+                # Fees charged in the quote asset; BNB or base-asset fees aren't USDT
+                'commission': sum(float(fill['commission']) for fill in order.get('fills', [])
+                                  if fill.get('commissionAsset') and symbol.endswith(fill['commissionAsset'])),
+                'order': order
+            }
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Order failed: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def place_limit_order(self, symbol: str, side: str, quantity: float, price: float):
+        quantity, price, error = await self._apply_filters(symbol, side, quantity, price, market=False)
+        if error:
+            logger.warning(f"{side} {symbol} limit order not sent: {error}")
+            return {'success': False, 'error': error}
+        if self.testnet:
+            return self.paper_order(symbol, side, 'LIMIT', quantity, await self.get_current_price(symbol), price)
+        try:
+            order = await self._request('POST', '/api/v3/order', {
+                'symbol': symbol,
+                'side': side,
+                'type': 'LIMIT',
+                'timeInForce': 'GTC',
+                'quantity': format_decimal(quantity),
+                'price': format_decimal(price)
+            }, signed=True)
+            return {
+                'success': True,
+                'order_id': order['orderId'],
+                'order': order
+            }
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Limit order failed: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def cancel_order(self, symbol: str, order_id: int):
+        if self.testnet:
+            return self.paper_cancel(symbol, order_id, await self.get_current_price(symbol))
+        try:
+            result = await self._request('DELETE', '/api/v3/order', {
+                'symbol': symbol,
+                'orderId': order_id
+            }, signed=True)
+            return {'success': True, 'result': result}
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Cancel order failed: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def get_order_status(self, symbol: str, order_id: int):
+        if self.testnet:
+            return self.paper_order_status(symbol, order_id, await self.get_current_price(symbol))
+        try:
+            return await self._request('GET', '/api/v3/order', {
+                'symbol': symbol,
+                'orderId': order_id
+            }, signed=True)
+        except (BinanceRequestError, httpx.HTTPError) as e:
+            logger.error(f"Get order failed: {e}")
+            return None
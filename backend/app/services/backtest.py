@@ -0,0 +1,269 @@
+"""
+Vectorized backtests of a strategy over historical candles.
+
+Entries come from the strategy's backtest_signals() over the whole
+history in one pass; exits use the live stop-loss / take-profit rules of
+should_exit_position (stop checked first) on each candle's close, or on
+its low/high with intrabar_exits. Only one position is open at a time and
+a bot that exits on a candle can enter again from the next one, as in the
+trading engine. With a MatchingEngine, entries and exits are market
+orders on it, paying its fees and depth slippage like paper accounts do.
+
+To backtest against the candle store:
+
+    python -m app.services.backtest --symbol BTCUSDT --interval 1h [--limit N]
+"""
+import argparse
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.candle_store import INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+STOP_LOSS_REASON = "STOP_LOSS"
+TAKE_PROFIT_REASON = "TAKE_PROFIT"
+END_OF_DATA_REASON = "END_OF_DATA"
+
+# Symbol backtest orders are placed under on a MatchingEngine
+BACKTEST_SYMBOL = "BACKTESTUSDT"
+
+# First look-ahead window when searching for an exit; doubled until found
+_EXIT_SEARCH_WINDOW = 256
+
+TRADE_COLUMNS = [
+    'entry_index', 'exit_index', 'entry_time', 'exit_time', 'entry_price', 'exit_price',
+    'quantity', 'profit_loss_usdt', 'profit_loss_percent', 'exit_reason'
+]
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame
+    equity: np.ndarray
+    timestamps: Optional[np.ndarray]
+    stats: Dict[str, float] = field(default_factory=dict)
+
+def _find_exit(start: int, stop: float, target: float, close: np.ndarray,
+               low: Optional[np.ndarray], high: Optional[np.ndarray]) -> Optional[Tuple[int, bool]]:
+    """
+    First candle index >= start whose price reaches the stop or target,
+    with whether it was the stop. Searches in growing windows so a short
+    trade only touches a few hundred candles.
+    """
+    n = len(close)
+    window = _EXIT_SEARCH_WINDOW
+    while start < n:
+        end = min(start + window, n)
+        down = (low if low is not None else close)[start:end] <= stop
+        up = (high if high is not None else close)[start:end] >= target
+        hit = down | up
+        if hit.any():
+            offset = int(hit.argmax())
+            return start + offset, bool(down[offset])
+        start = end
+        window *= 2
+    return None
+
+def _equity_curve(n: int, close: np.ndarray, initial_balance: float, entry_idx: np.ndarray,
+                  exit_idx: np.ndarray, quantity: np.ndarray, entry_price: np.ndarray,
+                  pnl: np.ndarray) -> np.ndarray:
+    """Cash plus open position marked to each close, without a per-candle loop."""
+    held = np.zeros(n + 1)
+    cost = np.zeros(n + 1)
+    realized = np.zeros(n + 1)
+    # Held from the entry candle up to (not including) the exit candle,
+    # where the P&L is realized
+    np.add.at(held, entry_idx, quantity)
+    np.add.at(held, exit_idx, -quantity)
+    np.add.at(cost, entry_idx, quantity * entry_price)
+    np.add.at(cost, exit_idx, -quantity * entry_price)
+    np.add.at(realized, exit_idx, pnl)
+    held = np.cumsum(held[:n])
+    cost = np.cumsum(cost[:n])
+    return initial_balance + np.cumsum(realized[:n]) + held * close - cost
+
+def _stats(trades: pd.DataFrame, equity: np.ndarray, initial_balance: float,
+           periods_per_year: float) -> Dict[str, float]:
+    pnl = trades['profit_loss_usdt'].to_numpy()
+    wins = int((pnl > 0).sum())
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = peak - equity
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown_pct = np.where(peak > 0, drawdown / peak * 100, 0.0)
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+    std = returns.std() if len(returns) else 0.0
+    sharpe = float(returns.mean() / std * math.sqrt(periods_per_year)) if std > 0 else 0.0
+    gross_profit = float(pnl[pnl > 0].sum())
+    gross_loss = float(-pnl[pnl <= 0].sum())
+    if gross_loss > 0:
+        profit_factor = gross_profit / gross_loss
+    else:
+        profit_factor = math.inf if gross_profit > 0 else 0.0
+    final = float(equity[-1]) if len(equity) else initial_balance
+    return {
+        'trades': len(pnl),
+        'wins': wins,
+        'losses': len(pnl) - wins,
+        'win_rate': wins / len(pnl) * 100 if len(pnl) else 0.0,
+        'net_profit_usdt': float(pnl.sum()),
+        'gross_profit_usdt': gross_profit,
+        'gross_loss_usdt': gross_loss,
+        'profit_factor': profit_factor,
+        'final_equity_usdt': final,
+        'total_return_percent': (final - initial_balance) / initial_balance * 100,
+        'max_drawdown_usdt': float(drawdown.max()) if len(drawdown) else 0.0,
+        'max_drawdown_percent': float(drawdown_pct.max()) if len(drawdown_pct) else 0.0,
+        'sharpe': sharpe,
+        'avg_hold_candles': float((trades['exit_index'] - trades['entry_index']).mean()) if len(pnl) else 0.0
+    }
+
+def run_backtest(strategy, candles: pd.DataFrame, stop_loss_percent: float = 3.0,
+                 take_profit_percent: float = 5.0, trade_amount_usdt: float = 100.0,
+                 initial_balance: float = 10000.0, interval: str = '1h', fee_rate: float = 0.0,
+                 intrabar_exits: bool = False, signals: Optional[np.ndarray] = None,
+                 engine=None) -> BacktestResult:
+    """
+    Replay `candles` (timestamp/open/high/low/close/volume, oldest first)
+    through `strategy`. Each entry buys `trade_amount_usdt` at the signal
+    candle's close, like execute_buy_order; `fee_rate` is charged on both
+    sides. Precomputed `signals` (as from backtest_signals) skip the
+    indicator pass, e.g. when sweeping exit parameters. With `engine` (a
+    MatchingEngine) orders fill on it instead, and its fee schedule
+    replaces `fee_rate`.
+    """
+    if getattr(strategy, 'force_test_buy', False):
+        logger.warning("Backtesting with force_test_buy on: every candle is an entry signal")
+
+    close = np.ascontiguousarray(candles['close'].to_numpy(dtype=np.float64))
+    n = len(close)
+    low = high = open_ = None
+    if intrabar_exits:
+        low = candles['low'].to_numpy(dtype=np.float64)
+        high = candles['high'].to_numpy(dtype=np.float64)
+        open_ = candles['open'].to_numpy(dtype=np.float64)
+    timestamps = candles['timestamp'].to_numpy() if 'timestamp' in candles else None
+
+    if signals is None:
+        signals = strategy.backtest_signals(close, candles['volume'].to_numpy(dtype=np.float64))
+    buy_idx = np.flatnonzero(signals == 1)
+
+    entries, exits, entry_prices, exit_prices, quantities, fees, reasons = [], [], [], [], [], [], []
+
+    def fill(side: str, quantity: float, price: float) -> Tuple[float, float, float]:
+        """(price, quantity, fee) of a market order at `price`."""
+        if engine is None:
+            return price, quantity, fee_rate * quantity * price
+        engine.update_price(BACKTEST_SYMBOL, price)
+        order = engine.place_order(BACKTEST_SYMBOL, side, 'MARKET', quantity)
+        return order.average_price, order.executed, order.commission
+
+    def close_trade(entry: int, exit_index: int, price: float, reason: str, entry_fill: Tuple[float, float, float]):
+        entry_price, quantity, entry_fee = entry_fill
+        exit_price, _, exit_fee = fill('SELL', quantity, price)
+        entries.append(entry)
+        exits.append(exit_index)
+        entry_prices.append(entry_price)
+        exit_prices.append(exit_price)
+        quantities.append(quantity)
+        fees.append(entry_fee + exit_fee)
+        reasons.append(reason)
+
+    position = 0
+    # One iteration per trade, not per candle: the next entry is found by
+    # binary search in the signal indices and the exit by a vectorized scan
+    while True:
+        k = int(np.searchsorted(buy_idx, position))
+        if k == len(buy_idx):
+            break
+        entry = int(buy_idx[k])
+        entry_fill = fill('BUY', trade_amount_usdt / close[entry], close[entry])
+        entry_price = entry_fill[0]
+        stop = entry_price * (1 - stop_loss_percent / 100)
+        target = entry_price * (1 + take_profit_percent / 100)
+        found = _find_exit(entry + 1, stop, target, close, low, high)
+        if found is None:
+            close_trade(entry, n - 1, close[-1], END_OF_DATA_REASON, entry_fill)
+            break
+        exit_index, is_stop = found
+        if intrabar_exits:
+            # A candle that opens through the level fills at its open
+            price = min(open_[exit_index], stop) if is_stop else max(open_[exit_index], target)
+        else:
+            price = close[exit_index]
+        close_trade(entry, exit_index, price, STOP_LOSS_REASON if is_stop else TAKE_PROFIT_REASON, entry_fill)
+        position = exit_index + 1
+
+    entry_idx = np.asarray(entries, dtype=np.int64)
+    exit_idx = np.asarray(exits, dtype=np.int64)
+    entry_price = np.asarray(entry_prices, dtype=np.float64)
+    exit_price = np.asarray(exit_prices, dtype=np.float64)
+    quantity = np.asarray(quantities, dtype=np.float64)
+    pnl = (exit_price - entry_price) * quantity - np.asarray(fees, dtype=np.float64)
+
+    trades = pd.DataFrame({
+        'entry_index': entry_idx,
+        'exit_index': exit_idx,
+        'entry_time': timestamps[entry_idx] if timestamps is not None else entry_idx,
+        'exit_time': timestamps[exit_idx] if timestamps is not None else exit_idx,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'quantity': quantity,
+        'profit_loss_usdt': pnl,
+        'profit_loss_percent': (exit_price - entry_price) / entry_price * 100,
+        'exit_reason': reasons
+    }, columns=TRADE_COLUMNS)
+
+    equity = _equity_curve(n, close, initial_balance, entry_idx, exit_idx, quantity, entry_price, pnl)
+    periods_per_year = 365 * 86400 / INTERVAL_SECONDS.get(interval, 3600)
+    return BacktestResult(trades, equity, timestamps, _stats(trades, equity, initial_balance, periods_per_year))
+
+def main():
+    from app.database import SessionLocal
+    from app.services.async_binance_client import BINANCE_PUBLIC_API_URL
+    from app.services.candle_store import CandleStore
+    from app.services.matching_engine import MatchingEngine
+    from app.strategies.registry import strategy_class, strategy_names
+
+    parser = argparse.ArgumentParser(description="Backtest a strategy on stored candles")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--strategy", default="mean_reversion", choices=strategy_names())
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--venue", default=BINANCE_PUBLIC_API_URL, help="REST base URL the candles came from")
+    parser.add_argument("--limit", type=int, default=100_000, help="latest N stored candles")
+    parser.add_argument("--stop-loss", type=float, default=3.0, help="percent")
+    parser.add_argument("--take-profit", type=float, default=5.0, help="percent")
+    parser.add_argument("--trade-amount", type=float, default=100.0)
+    parser.add_argument("--fee-rate", type=float, default=0.0)
+    parser.add_argument("--intrabar", action="store_true", help="exit on candle low/high")
+    parser.add_argument("--simulate", action="store_true",
+                        help="fill on the paper matching engine (fees and slippage; ignores --fee-rate)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        candles = CandleStore(db, args.venue).load(args.symbol, args.interval, args.limit)
+    finally:
+        db.close()
+    if candles.empty:
+        print(f"No stored {args.interval} candles for {args.symbol}")
+        return
+
+    result = run_backtest(
+        strategy_class(args.strategy)({'force_test_buy': False}), candles,
+        stop_loss_percent=args.stop_loss, take_profit_percent=args.take_profit,
+        trade_amount_usdt=args.trade_amount, interval=args.interval,
+        fee_rate=args.fee_rate, intrabar_exits=args.intrabar,
+        engine=MatchingEngine() if args.simulate else None
+    )
+    print(f"{len(candles)} candles {candles['timestamp'].iloc[0]} .. {candles['timestamp'].iloc[-1]}")
+    for name, value in result.stats.items():
+        print(f"{name:>22}: {value:.4f}" if isinstance(value, float) else f"{name:>22}: {value}")
+
+if __name__ == "__main__":
+    main()
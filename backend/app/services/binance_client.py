@@ -6,33 +6,84 @@ from ta.momentum import RSIIndicator
 from ta.trend import SMAIndicator
 from datetime import datetime
 import logging
+import os
 import requests
 
+from app.services.kline_parser import parse_klines
+from app.services.matching_engine import PaperAccountMixin
+
 logger = logging.getLogger(__name__)
 
-class BinanceTrader:
+# Off by default: mock candles would feed random prices into real signals.
+# Only for offline development of paper accounts.
+MOCK_FALLBACK = os.getenv("BINANCE_MOCK_FALLBACK", "false").lower() == "true"
+
+def klines_to_dataframe(klines: list) -> pd.DataFrame:
+    """Convert raw Binance kline rows into a DataFrame with float OHLCV columns."""
+    return parse_klines(klines).to_frame()
+
+def generate_mock_klines(symbol: str, limit: int = 100):
+    """Generate realistic mock kline data for paper trading."""
+    import random
+    from datetime import datetime, timedelta
+    
+    # Base price for different symbols
+    base_prices = {
+        'BTCUSDT': 95000,
+        'ETHUSDT': 3500,
+        'BNBUSDT': 600
+    }
+    
+    base_price = base_prices.get(symbol, 100)
+    
+    klines = []
+    current_time = datetime.utcnow() - timedelta(hours=limit)
+    current_price = base_price
+    
+    for i in range(limit):
+        # Simulate price movement (-1% to +1%)
+        price_change = random.uniform(-0.01, 0.01)
+        current_price = current_price * (1 + price_change)
+        
+        # Create OHLCV data
+        open_price = current_price * (1 + random.uniform(-0.002, 0.002))
+        high_price = max(open_price, current_price) * (1 + random.uniform(0, 0.005))
+        low_price = min(open_price, current_price) * (1 - random.uniform(0, 0.005))
+        close_price = current_price
+        volume = random.uniform(100, 1000)
+        
+        klines.append({
+            'timestamp': current_time,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'close': close_price,
+            'volume': volume
+        })
+        
+        current_time += timedelta(hours=1)
+    
+    df = pd.DataFrame(klines)
+    logger.info(f"Generated {len(df)} mock candles. Latest price: {df['close'].iloc[-1]:.2f}")
+    return df
+
+class BinanceTrader(PaperAccountMixin):
     def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
+        self.api_key = api_key
         if testnet:
-            # Paper trading mode - use real Binance data but don't place orders
+            # Paper trading mode - use real Binance data, orders go to the
+            # in-process matching engine (PaperAccountMixin)
             self.testnet = True  # Flag for paper trading
-            self.paper_balance = None  # Will be set from database
             # Don't initialize client for paper trading - use public APIs instead
             self.client = None
         else:
             self.client = Client(api_key, api_secret)
             self.testnet = False
-            self.paper_balance = None
     
     def get_account_balance(self):
         # Paper trading mode - return simulated balance
         if self.testnet:
-            return {
-                'USDT': {
-                    'free': self.paper_balance,
-                    'locked': 0.0,
-                    'total': self.paper_balance
-                }
-            }
+            return self.paper_balances()
         
         # Real trading mode
         try:
@@ -72,15 +123,7 @@ class BinanceTrader:
             )
             logger.info(f"Successfully fetched {len(klines)} klines for {symbol}")
             
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
+            df = klines_to_dataframe(klines)
             
             return df
         except BinanceAPIException as e:
@@ -110,72 +153,23 @@ class BinanceTrader:
                 return pd.DataFrame()
             
             # Convert to DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
+            df = klines_to_dataframe(klines)
             
             logger.info(f"Fetched {len(df)} real-time candles. Latest price: ${df['close'].iloc[-1]:,.2f}")
             return df
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching public klines: {e}")
-            # Fallback to mock data if API fails
-            logger.warning(f"Falling back to mock data")
-            return self._generate_mock_klines(symbol, limit)
         except Exception as e:
             logger.error(f"Unexpected error in _fetch_public_klines: {e}", exc_info=True)
+        if MOCK_FALLBACK:
+            logger.warning(f"Falling back to mock data")
             return self._generate_mock_klines(symbol, limit)
+        return pd.DataFrame()
     
     def _generate_mock_klines(self, symbol: str, limit: int = 100):
         """Generate realistic mock kline data for paper trading."""
-        import random
-        from datetime import datetime, timedelta
-        
-        # Base price for different symbols
-        base_prices = {
-            'BTCUSDT': 95000,
-            'ETHUSDT': 3500,
-            'BNBUSDT': 600
-        }
-        
-        base_price = base_prices.get(symbol, 100)
-        
-        klines = []
-        current_time = datetime.utcnow() - timedelta(hours=limit)
-        current_price = base_price
-        
-        for i in range(limit):
-            # Simulate price movement (-1% to +1%)
-            price_change = random.uniform(-0.01, 0.01)
-            current_price = current_price * (1 + price_change)
-            
-            # Create OHLCV data
-            open_price = current_price * (1 + random.uniform(-0.002, 0.002))
-            high_price = max(open_price, current_price) * (1 + random.uniform(0, 0.005))
-            low_price = min(open_price, current_price) * (1 - random.uniform(0, 0.005))
-            close_price = current_price
-            volume = random.uniform(100, 1000)
-            
-            klines.append({
-                'timestamp': current_time,
-                'open': open_price,
-                'high': high_price,
-                'low': low_price,
-                'close': close_price,
-                'volume': volume
-            })
-            
-            current_time += timedelta(hours=1)
-        
-        df = pd.DataFrame(klines)
-        logger.info(f"Generated {len(df)} mock candles. Latest price: {df['close'].iloc[-1]:.2f}")
-        return df
+        return generate_mock_klines(symbol, limit)
     
     def get_current_price(self, symbol: str):
         try:
@@ -192,52 +186,14 @@ class BinanceTrader:
             
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
-        except BinanceAPIException as e:
+        except (BinanceAPIException, requests.RequestException) as e:
             logger.error(f"Error getting price: {e}")
             return None
     
     def place_market_order(self, symbol: str, side: str, quantity: float):
-        # Paper trading mode - simulate order without placing real order
+        # Paper trading mode - fill on the simulated exchange
         if self.testnet:
-            try:
-                current_price = self.get_current_price(symbol)
-                if not current_price:
-                    return {'success': False, 'error': 'Could not get current price'}
-                
-                # Update paper balance
-                order_value = current_price * quantity
-                if side == 'BUY':
-                    if self.paper_balance < order_value:
-                        return {'success': False, 'error': f'Insufficient balance: {self.paper_balance:.2f} < {order_value:.2f}'}
-                    self.paper_balance -= order_value
-                    logger.info(f"PAPER TRADE: Bought {quantity} {symbol} @ {current_price}. Balance: ${self.paper_balance:.2f}")
-                elif side == 'SELL':
-                    self.paper_balance += order_value
-                    logger.info(f"PAPER TRADE: Sold {quantity} {symbol} @ {current_price}. Balance: ${self.paper_balance:.2f}")
-                
-                # Simulate successful order
-                import random
-                simulated_order_id = random.randint(100000, 999999)
-                
-                logger.info(f"PAPER TRADE: Simulated {side} {quantity} {symbol} @ {current_price}")
-                
-                return {
-                    'success': True,
-                    'order_id': simulated_order_id,
-                    'price': current_price,
-                    'quantity': quantity,
-                    'order': {
-                        'orderId': simulated_order_id,
-                        'symbol': symbol,
-                        'side': side,
-                        'executedQty': str(quantity),
-                        'status': 'FILLED',
-                        'type': 'MARKET'
-                    }
-                }
-            except Exception as e:
-                logger.error(f"Paper trade simulation error: {e}")
-                return {'success': False, 'error': str(e)}
+            return self.paper_order(symbol, side, 'MARKET', quantity, self.get_current_price(symbol))
         
         # Real trading mode
         try:
@@ -259,6 +215,8 @@ class BinanceTrader:
             return {'success': False, 'error': str(e)}
     
     def place_limit_order(self, symbol: str, side: str, quantity: float, price: float):
+        if self.testnet:
+            return self.paper_order(symbol, side, 'LIMIT', quantity, self.get_current_price(symbol), price)
         try:
             order = self.client.create_order(
                 symbol=symbol,
@@ -278,6 +236,8 @@ class BinanceTrader:
             return {'success': False, 'error': str(e)}
     
     def cancel_order(self, symbol: str, order_id: int):
+        if self.testnet:
+            return self.paper_cancel(symbol, order_id, self.get_current_price(symbol))
         try:
             result = self.client.cancel_order(symbol=symbol, orderId=order_id)
             return {'success': True, 'result': result}
@@ -286,6 +246,8 @@ class BinanceTrader:
             return {'success': False, 'error': str(e)}
     
     def get_order_status(self, symbol: str, order_id: int):
+        if self.testnet:
+            return self.paper_order_status(symbol, order_id, self.get_current_price(symbol))
         try:
             order = self.client.get_order(symbol=symbol, orderId=order_id)
             return order
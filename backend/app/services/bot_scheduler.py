@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.database import SessionLocal
+from app.models.models import BotConfig, BotStatus
+from app.services.candle_store import INTERVAL_SECONDS
+from app.services.leader_lease import (
+    TRADING_CYCLE_MODE, TRADING_CYCLE_LEASE, claim_bot_slots, try_acquire_lease
+)
+
+logger = logging.getLogger(__name__)
+
+# per_bot: each bot runs when its own candle interval closes (this module).
+# hourly:  one cron job runs every active bot at minute 0.
+TRADING_SCHEDULE = os.getenv("TRADING_SCHEDULE", "per_bot").lower()
+BOT_SCHEDULE_JITTER_SECONDS = float(os.getenv("BOT_SCHEDULE_JITTER_SECONDS", "30"))
+BOT_SCHEDULE_POLL_SECONDS = float(os.getenv("BOT_SCHEDULE_POLL_SECONDS", "30"))
+
+SCHEDULE_INTERVALS = ('1m', '5m', '15m', '1h', '4h')
+DEFAULT_SCHEDULE_INTERVAL = '1h'
+
+def schedule_interval(config_params: Optional[dict]) -> str:
+    """The bot's run interval: its kline interval when it's a schedulable one."""
+    interval = (config_params or {}).get('interval', DEFAULT_SCHEDULE_INTERVAL)
+    if interval not in SCHEDULE_INTERVALS:
+        logger.warning(f"Unsupported schedule interval {interval!r}, using {DEFAULT_SCHEDULE_INTERVAL}")
+        return DEFAULT_SCHEDULE_INTERVAL
+    return interval
+
+def bot_jitter(bot_id: int, interval: str, window: float = BOT_SCHEDULE_JITTER_SECONDS) -> float:
+    """
+    Fixed per-bot offset inside the jitter window, so runs are spread over
+    the window instead of all starting at the candle close. Capped at half
+    the interval so short intervals stay close to their candle.
+    """
+    window = min(window, INTERVAL_SECONDS[interval] / 2)
+    if window <= 0:
+        return 0.0
+    return (zlib.crc32(str(bot_id).encode()) % 10_000) / 10_000 * window
+
+def next_candle_close(interval: str, now: float) -> float:
+    """Epoch seconds of the first close of an `interval` candle after `now`."""
+    step = INTERVAL_SECONDS[interval]
+    return (math.floor(now / step) + 1) * step
+
+class BotSchedule:
+    """
+    Min-heap of (due time, bot) with lazy deletion: rescheduling or
+    cancelling a bot only bumps its version, and stale heap entries are
+    dropped when they surface. Pushes and pops are O(log n), so thousands
+    of bots cost one heap rather than one scheduler job each.
+    """
+
+    def __init__(self, jitter_seconds: float = BOT_SCHEDULE_JITTER_SECONDS):
+        self.jitter_seconds = jitter_seconds
+        self._heap: List[Tuple[float, int, int]] = []
+        # bot_id -> (interval, version, candle close of the pending run)
+        self._bots: Dict[int, Tuple[str, int, float]] = {}
+        self._version = 0
+
+    def __len__(self):
+        return len(self._bots)
+
+    def __contains__(self, bot_id: int) -> bool:
+        return bot_id in self._bots
+
+    def bot_ids(self) -> List[int]:
+        return list(self._bots)
+
+    def interval_of(self, bot_id: int) -> Optional[str]:
+        entry = self._bots.get(bot_id)
+        return entry[0] if entry else None
+
+    def schedule(self, bot_id: int, interval: str, now: Optional[float] = None) -> float:
+        """(Re)schedule a bot for the next close of its interval; returns the due time."""
+        now = time.time() if now is None else now
+        close = next_candle_close(interval, now)
+        due = close + bot_jitter(bot_id, interval, self.jitter_seconds)
+        self._version += 1
+        self._bots[bot_id] = (interval, self._version, close)
+        heapq.heappush(self._heap, (due, self._version, bot_id))
+        return due
+
+    def cancel(self, bot_id: int):
+        self._bots.pop(bot_id, None)
+
+    def _discard_stale(self):
+        while self._heap:
+            _, version, bot_id = self._heap[0]
+            entry = self._bots.get(bot_id)
+            if entry and entry[1] == version:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Remove every bot due by `now` and schedule its next run. Returns
+        (bot_id, candle close) for each due bot.
+        """
+        now = time.time() if now is None else now
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, bot_id = heapq.heappop(self._heap)
+            interval, _, close = self._bots[bot_id]
+            due.append((bot_id, close))
+            self.schedule(bot_id, interval, max(now, close))
+        return due
+
+class BotScheduler:
+    """
+    Runs each active bot when its candle interval closes (plus its jitter).
+
+    The schedule is synced from the database every poll interval, which is
+    how a separate worker sees bots started or paused through the API; in
+    the API process routes call notify() so the change applies at once.
+    A bot still running from its previous slot is skipped for the next one.
+    """
+
+    def __init__(self, session_factory=SessionLocal, poll_seconds: float = BOT_SCHEDULE_POLL_SECONDS,
+                 jitter_seconds: float = BOT_SCHEDULE_JITTER_SECONDS, use_lease: bool = True):
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.schedule = BotSchedule(jitter_seconds)
+        self.use_lease = use_lease
+        self.active = not use_lease
+        self.runs = 0
+        self.skipped = 0
+        self._in_flight: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_sync: Optional[float] = None
+
+    def notify(self, bot_id: int, status: BotStatus, config_params: Optional[dict] = None,
+               now: Optional[float] = None):
+        """Apply a bot's new status or interval right away."""
+        if status == BotStatus.ACTIVE:
+            self.schedule.schedule(bot_id, schedule_interval(config_params), now)
+        else:
+            self.schedule.cancel(bot_id)
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _load_active(self) -> Tuple[bool, list]:
+        """(may this replica run bots, [(bot_id, config_params)] of active bots)."""
+        db = self.session_factory()
+        try:
+            active = True
+            if self.use_lease and TRADING_CYCLE_MODE == 'leader':
+                active = try_acquire_lease(db, TRADING_CYCLE_LEASE)
+            rows = db.query(BotConfig.id, BotConfig.config_params).filter(
+                BotConfig.status == BotStatus.ACTIVE
+            ).all()
+            return active, rows
+        finally:
+            db.close()
+
+    def _apply(self, active: bool, rows: list, now: Optional[float] = None):
+        self.active = active
+        active_ids = set()
+        for bot_id, config_params in rows:
+            active_ids.add(bot_id)
+            interval = schedule_interval(config_params)
+            if self.schedule.interval_of(bot_id) != interval:
+                self.schedule.schedule(bot_id, interval, now)
+        for bot_id in self.schedule.bot_ids():
+            if bot_id not in active_ids:
+                self.schedule.cancel(bot_id)
+        self._last_sync = time.time() if now is None else now
+
+    def sync(self, now: Optional[float] = None):
+        """Match the schedule to the active bots in the database."""
+        self._apply(*self._load_active(), now=now)
+
+    def stats(self) -> Dict:
+        next_due = self.schedule.next_due()
+        return {
+            'scheduled_bots': len(self.schedule),
+            'next_due': datetime.utcfromtimestamp(next_due).isoformat() if next_due else None,
+            'in_flight': len(self._in_flight),
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'active': self.active
+        }
+
+    def dispatch_due(self, now: Optional[float] = None) -> Optional[asyncio.Task]:
+        """Start one engine run for every bot that is due."""
+        due = self.schedule.pop_due(now)
+        if not due or not self.active:
+            return None
+        ready = []
+        for bot_id, close in due:
+            if bot_id in self._in_flight:
+                logger.warning(f"Bot {bot_id} is still running from its previous slot, skipping")
+                self.skipped += 1
+                continue
+            ready.append((bot_id, close))
+        if not ready:
+            return None
+        self._in_flight.update(bot_id for bot_id, _ in ready)
+        task = asyncio.create_task(self._run(ready))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, due: List[Tuple[int, float]]):
+        from app.services.trading_engine import TradingEngine
+
+        bot_ids = [bot_id for bot_id, _ in due]
+        db = self.session_factory()
+        try:
+            if TRADING_CYCLE_MODE == 'claim':
+                # One claim per bot and candle close, so only one replica runs each slot
+                by_slot = defaultdict(list)
+                for bot_id, close in due:
+                    by_slot[datetime.utcfromtimestamp(close).isoformat()].append(bot_id)
+                bot_ids = [
+                    bot_id for slot, ids in by_slot.items()
+                    for bot_id in claim_bot_slots(db, ids, slot)
+                ]
+                if not bot_ids:
+                    return
+            stats = await TradingEngine(db, self.session_factory).execute_bots(bot_ids)
+            self.runs += stats['bots']
+            logger.info(f"Ran {stats['bots']} scheduled bots in {stats['wall_clock_seconds']:.2f}s")
+        except Exception as e:
+            logger.error(f"Error running scheduled bots {bot_ids}: {e}")
+        finally:
+            db.close()
+            self._in_flight.difference_update(bot_id for bot_id, _ in due)
+
+    async def run(self):
+        """Sleep until the next due bot or DB sync, whichever comes first, forever."""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                now = time.time()
+                if self._last_sync is None or now - self._last_sync >= self.poll_seconds:
+                    try:
+                        # Query off the loop, but touch the heap only on it
+                        self._apply(*await asyncio.to_thread(self._load_active))
+                    except Exception as e:
+                        logger.error(f"Error syncing bot schedule: {e}")
+                        self._last_sync = now
+                self.dispatch_due()
+
+                wake_at = self._last_sync + self.poll_seconds
+                next_due = self.schedule.next_due()
+                if next_due is not None:
+                    wake_at = min(wake_at, next_due)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(wake_at - time.time(), 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+bot_scheduler = BotScheduler()
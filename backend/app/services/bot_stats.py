@@ -0,0 +1,207 @@
+"""
+Per-bot trading statistics kept as running counters in `bot_stats`.
+
+record_trade_close() is called in the transaction that closes a trade, so
+the counters never need a scan of the trades table. To recompute them from
+the trade history and report drift:
+
+    python -m app.services.bot_stats [--bot-id ID] [--check]
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import BotConfig, BotStats, Trade
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = [
+    'closed_trades', 'wins', 'losses', 'gross_profit_usdt', 'gross_loss_usdt',
+    'net_profit_usdt', 'peak_profit_usdt', 'max_drawdown_usdt', 'total_hold_seconds'
+]
+
+def hold_seconds(trade: Trade) -> float:
+    if not trade.entry_time or not trade.exit_time:
+        return 0.0
+    return max((trade.exit_time - trade.entry_time).total_seconds(), 0.0)
+
+def record_trade_close(db: Session, bot: BotConfig, profit_loss_usdt: float, held_seconds: float):
+    """
+    Add one closed trade to the bot's counters and refresh the summary
+    columns on bot_configs. Both are single UPDATE statements computed by
+    the database, so concurrent closes can't lose an increment; the caller
+    commits them together with the trade.
+    """
+    bot_id = bot.id
+    pnl = float(profit_loss_usdt or 0.0)
+    is_win = pnl > 0
+    net_after = BotStats.net_profit_usdt + pnl
+
+    updated = db.query(BotStats).filter(BotStats.bot_config_id == bot_id).update({
+        BotStats.closed_trades: BotStats.closed_trades + 1,
+        BotStats.wins: BotStats.wins + (1 if is_win else 0),
+        BotStats.losses: BotStats.losses + (0 if is_win else 1),
+        BotStats.gross_profit_usdt: BotStats.gross_profit_usdt + max(pnl, 0.0),
+        BotStats.gross_loss_usdt: BotStats.gross_loss_usdt + max(-pnl, 0.0),
+        BotStats.net_profit_usdt: net_after,
+        # Every SET expression sees the row's old values
+        BotStats.peak_profit_usdt: case(
+            (net_after > BotStats.peak_profit_usdt, net_after), else_=BotStats.peak_profit_usdt
+        ),
+        BotStats.max_drawdown_usdt: case(
+            (BotStats.peak_profit_usdt - net_after > BotStats.max_drawdown_usdt,
+             BotStats.peak_profit_usdt - net_after),
+            else_=BotStats.max_drawdown_usdt
+        ),
+        BotStats.total_hold_seconds: BotStats.total_hold_seconds + held_seconds,
+        BotStats.updated_at: datetime.utcnow()
+    }, synchronize_session=False)
+
+    if not updated:
+        try:
+            with db.begin_nested():
+                db.add(BotStats(
+                    bot_config_id=bot_id,
+                    closed_trades=1,
+                    wins=1 if is_win else 0,
+                    losses=0 if is_win else 1,
+                    gross_profit_usdt=max(pnl, 0.0),
+                    gross_loss_usdt=max(-pnl, 0.0),
+                    net_profit_usdt=pnl,
+                    peak_profit_usdt=max(pnl, 0.0),
+                    max_drawdown_usdt=max(-pnl, 0.0),
+                    total_hold_seconds=held_seconds,
+                    updated_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another close created the row first; add to it instead
+            return record_trade_close(db, bot, pnl, held_seconds)
+
+    _sync_bot_summary(db, bot_id)
+    # The loaded BotConfig no longer matches its row
+    db.expire(bot, ['total_trades', 'total_profit_usdt', 'win_rate'])
+
+def _sync_bot_summary(db: Session, bot_id: int):
+    """Copy the counters into the bot_configs columns the API and dashboard read."""
+    stats = select(BotStats).where(BotStats.bot_config_id == bot_id).subquery()
+    db.query(BotConfig).filter(BotConfig.id == bot_id).update({
+        BotConfig.total_trades: select(stats.c.closed_trades).scalar_subquery(),
+        BotConfig.total_profit_usdt: select(stats.c.net_profit_usdt).scalar_subquery(),
+        BotConfig.win_rate: select(
+            case((stats.c.closed_trades > 0, stats.c.wins * 100.0 / stats.c.closed_trades), else_=0.0)
+        ).scalar_subquery()
+    }, synchronize_session=False)
+
+def compute_stats(trades: List[Trade]) -> Dict[str, float]:
+    """Counters for a bot's closed trades, replayed in exit order."""
+    counters = dict.fromkeys(COUNTERS, 0.0)
+    counters['closed_trades'] = counters['wins'] = counters['losses'] = 0
+    ordered = sorted(trades, key=lambda t: (t.exit_time or datetime.min, t.id))
+    for trade in ordered:
+        pnl = float(trade.profit_loss_usdt or 0.0)
+        counters['closed_trades'] += 1
+        if pnl > 0:
+            counters['wins'] += 1
+            counters['gross_profit_usdt'] += pnl
+        else:
+            counters['losses'] += 1
+            counters['gross_loss_usdt'] += -pnl
+        counters['net_profit_usdt'] += pnl
+        counters['peak_profit_usdt'] = max(counters['peak_profit_usdt'], counters['net_profit_usdt'])
+        counters['max_drawdown_usdt'] = max(
+            counters['max_drawdown_usdt'], counters['peak_profit_usdt'] - counters['net_profit_usdt']
+        )
+        counters['total_hold_seconds'] += hold_seconds(trade)
+    return counters
+
+def rebuild_stats(db: Session, bot_id: Optional[int] = None, write: bool = True,
+                  tolerance: float = 1e-6) -> Dict[int, Dict[str, tuple]]:
+    """
+    Recompute every bot's counters from its closed trades. Returns the
+    drift found, {bot_id: {counter: (stored, recomputed)}}, and unless
+    `write` is False replaces the stored counters with the recomputed ones.
+    """
+    bots = db.query(BotConfig.id)
+    if bot_id is not None:
+        bots = bots.filter(BotConfig.id == bot_id)
+    bot_ids = [row[0] for row in bots.all()]
+
+    closed: Dict[int, List[Trade]] = {bid: [] for bid in bot_ids}
+    for trade in db.query(Trade).filter(
+        Trade.bot_config_id.in_(bot_ids),
+        Trade.exit_price.isnot(None)
+    ).all():
+        closed[trade.bot_config_id].append(trade)
+    stored = {s.bot_config_id: s for s in db.query(BotStats).filter(BotStats.bot_config_id.in_(bot_ids)).all()}
+
+    drift = {}
+    for bid in bot_ids:
+        expected = compute_stats(closed[bid])
+        row = stored.get(bid)
+        diffs = {}
+        for name, value in expected.items():
+            current = getattr(row, name) if row else 0
+            if abs((current or 0) - value) > tolerance:
+                diffs[name] = (current, value)
+        if diffs:
+            drift[bid] = diffs
+        if write and (diffs or row is None):
+            if row is None:
+                row = BotStats(bot_config_id=bid)
+                db.add(row)
+            for name, value in expected.items():
+                setattr(row, name, value)
+            row.updated_at = datetime.utcnow()
+            db.flush()
+            _sync_bot_summary(db, bid)
+    if write:
+        db.commit()
+    return drift
+
+def seed_missing_stats(db: Session) -> int:
+    """
+    Create the counters of bots that have none yet (bots that traded before
+    bot_stats existed) from their trade history. Run at startup, before any
+    close: a close on a bot without counters starts them at that trade and
+    would reset the bot's totals. Returns the number of bots seeded.
+    """
+    missing = [row[0] for row in db.query(BotConfig.id).filter(
+        ~exists().where(BotStats.bot_config_id == BotConfig.id)
+    ).all()]
+    for bot_id in missing:
+        try:
+            rebuild_stats(db, bot_id)
+        except IntegrityError:
+            # Another replica seeded this bot first
+            db.rollback()
+    if missing:
+        logger.info(f"Seeded bot_stats for {len(missing)} bot(s)")
+    return len(missing)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute bot statistics from the trade history")
+    parser.add_argument("--bot-id", type=int, help="only this bot")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        drift = rebuild_stats(db, args.bot_id, write=not args.check)
+    finally:
+        db.close()
+
+    for bot_id, diffs in sorted(drift.items()):
+        for name, (stored, expected) in diffs.items():
+            print(f"bot {bot_id}: {name} stored={stored} recomputed={expected}")
+    action = "found" if args.check else "fixed"
+    print(f"Drift {action} for {len(drift)} bot(s)")
+
+if __name__ == "__main__":
+    main()
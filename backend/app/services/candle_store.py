@@ -0,0 +1,282 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import func, inspect, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import MarketData
+from app.services.async_binance_client import AsyncBinanceTrader
+
+logger = logging.getLogger(__name__)
+
+CANDLE_STORE_ENABLED = os.getenv("CANDLE_STORE_ENABLED", "true").lower() == "true"
+MAX_KLINES_PER_REQUEST = 1000
+# How long a symbol whose stored history already starts at the exchange's
+# first candle is not asked for older candles again
+BACKFILL_RETRY_SECONDS = float(os.getenv("CANDLE_BACKFILL_RETRY_SECONDS", "3600"))
+
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '3m': 3 * 60,
+    '5m': 5 * 60,
+    '15m': 15 * 60,
+    '30m': 30 * 60,
+    '1h': 60 * 60,
+    '2h': 2 * 60 * 60,
+    '4h': 4 * 60 * 60,
+    '6h': 6 * 60 * 60,
+    '8h': 8 * 60 * 60,
+    '12h': 12 * 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+def interval_delta(interval: str) -> timedelta:
+    return timedelta(seconds=INTERVAL_SECONDS[interval])
+
+def latest_closed_open_time(interval: str, now: Optional[datetime] = None) -> datetime:
+    """Open time (naive UTC) of the most recent fully closed candle."""
+    now = now or datetime.utcnow()
+    step = INTERVAL_SECONDS[interval]
+    current_open = int((now - _EPOCH).total_seconds()) // step * step
+    return _EPOCH + timedelta(seconds=current_open - step)
+
+def to_millis(ts: datetime) -> int:
+    return int((ts - _EPOCH).total_seconds() * 1000)
+
+def ensure_candle_store_schema(bind):
+    """
+    Bring an existing market_data table up to the candle store's schema
+    (create_all does not alter existing tables): add the venue column and
+    the unique (venue, symbol, timeframe, timestamp) index.
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table(MarketData.__tablename__):
+        return
+    columns = {column['name'] for column in inspector.get_columns(MarketData.__tablename__)}
+    if 'venue' not in columns:
+        with bind.begin() as conn:
+            conn.execute(text("ALTER TABLE market_data ADD COLUMN venue VARCHAR"))
+            # Rows written before venues were tracked can't be attributed
+            # to one; the store fetches them again
+            conn.execute(text("DELETE FROM market_data WHERE venue IS NULL"))
+    for index in MarketData.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+# (venue, symbol, interval) -> (first stored candle, monotonic time) when
+# the exchange had nothing older
+_history_starts: Dict[Tuple[str, str, str], Tuple[datetime, float]] = {}
+
+class CandleStore:
+    """
+    Closed OHLCV candles persisted in the market_data table, one row per
+    (venue, symbol, timeframe, timestamp). `venue` is the REST base URL the
+    candles come from (see market_data_url).
+    """
+
+    def __init__(self, db: Session, venue: str):
+        self.db = db
+        self.venue = venue
+
+    def _filter(self, query, symbol: str, timeframe: str):
+        return query.filter(
+            MarketData.venue == self.venue,
+            MarketData.symbol == symbol,
+            MarketData.timeframe == timeframe
+        )
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[datetime]:
+        return self._filter(self.db.query(func.max(MarketData.timestamp)), symbol, timeframe).scalar()
+
+    def extent(self, symbol: str, timeframe: str) -> Tuple[int, Optional[datetime]]:
+        """(number of stored candles, open time of the oldest one)."""
+        count, first = self._filter(
+            self.db.query(func.count(MarketData.id), func.min(MarketData.timestamp)), symbol, timeframe
+        ).one()
+        return count, first
+
+    def upsert(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """Insert or update candles from a klines frame; returns the row count."""
+        if df is None or df.empty:
+            return 0
+
+        rows = [{
+            'venue': self.venue,
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'timestamp': ts.to_pydatetime(),
+            'open_price': float(o),
+            'high_price': float(h),
+            'low_price': float(l),
+            'close_price': float(c),
+            'volume': float(v)
+        } for ts, o, h, l, c, v in zip(
+            df['timestamp'], df['open'], df['high'], df['low'], df['close'], df['volume']
+        )]
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(MarketData).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['venue', 'symbol', 'timeframe', 'timestamp'],
+                set_={col: stmt.excluded[col] for col in
+                      ('open_price', 'high_price', 'low_price', 'close_price', 'volume')}
+            )
+            self.db.execute(stmt)
+        else:
+            for row in rows:
+                existing = self._filter(self.db.query(MarketData), symbol, timeframe).filter(
+                    MarketData.timestamp == row['timestamp']
+                ).first()
+                if existing:
+                    for key, value in row.items():
+                        setattr(existing, key, value)
+                else:
+                    self.db.add(MarketData(**row))
+
+        self.db.commit()
+        return len(rows)
+
+    def load(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+        """Latest `limit` stored candles in ascending time order, as a klines frame."""
+        rows = self._filter(self.db.query(
+            MarketData.timestamp,
+            MarketData.open_price,
+            MarketData.high_price,
+            MarketData.low_price,
+            MarketData.close_price,
+            MarketData.volume
+        ), symbol, timeframe).order_by(MarketData.timestamp.desc()).limit(limit).all()
+
+        df = pd.DataFrame(
+            list(reversed(rows)),
+            columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
+        )
+        if not df.empty:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    async def sync(self, trader: AsyncBinanceTrader, symbol: str, interval: str, limit: int) -> int:
+        """
+        Bring the store up to date for a `limit`-candle read: fetch the
+        closed candles newer than the last stored one, then backfill older
+        ones while fewer than `limit` are stored. Returns the number of
+        candles written.
+        """
+        written = await self._sync_latest(trader, symbol, interval, limit)
+        return written + await self.backfill(trader, symbol, interval, limit)
+
+    async def _sync_latest(self, trader: AsyncBinanceTrader, symbol: str, interval: str, limit: int) -> int:
+        latest_closed = latest_closed_open_time(interval)
+        last = self.last_timestamp(symbol, interval)
+        if last is not None and last >= latest_closed:
+            return 0
+
+        step = interval_delta(interval)
+        if last is not None and (latest_closed - last) / step <= MAX_KLINES_PER_REQUEST:
+            # Delta: everything after the last stored candle (plus the open one)
+            missing = int((latest_closed - last) / step)
+            df = await trader.get_historical_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=missing + 1,
+                start_time=to_millis(last + step),
+                allow_mock=False
+            )
+        else:
+            # Cold start or a gap too large to page through: take the latest window
+            df = await trader.get_historical_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=min(limit + 1, MAX_KLINES_PER_REQUEST),
+                allow_mock=False
+            )
+
+        if df is None or df.empty:
+            return 0
+
+        # Never persist the candle that is still open
+        df = df[df['timestamp'] <= pd.Timestamp(latest_closed)]
+        written = self.upsert(symbol, interval, df)
+        logger.info(f"Candle store: wrote {written} {interval} candles for {symbol}")
+        return written
+
+    async def backfill(self, trader: AsyncBinanceTrader, symbol: str, interval: str, limit: int) -> int:
+        """
+        Page in candles older than the first stored one (endTime) until
+        `limit` are stored or the exchange has none older.
+        """
+        stored, first = self.extent(symbol, interval)
+        if first is None or stored >= limit:
+            return 0
+        key = (self.venue, symbol, interval)
+        known = _history_starts.get(key)
+        if known is not None and known[0] == first and time.monotonic() - known[1] < BACKFILL_RETRY_SECONDS:
+            return 0
+
+        written = 0
+        while stored < limit:
+            page = min(limit - stored, MAX_KLINES_PER_REQUEST)
+            df = await trader.get_historical_klines(
+                symbol=symbol,
+                interval=interval,
+                limit=page,
+                end_time=to_millis(first) - 1,
+                allow_mock=False
+            )
+            if df is not None and not df.empty:
+                df = df[df['timestamp'] < pd.Timestamp(first)]
+            if df is None or df.empty:
+                _history_starts[key] = (first, time.monotonic())
+                break
+            count = self.upsert(symbol, interval, df)
+            written += count
+            stored += count
+            first = df['timestamp'].iloc[0].to_pydatetime()
+            if len(df) < page:
+                # A short page reached the start of the symbol's history
+                _history_starts[key] = (first, time.monotonic())
+                break
+
+        if written:
+            logger.info(f"Candle store: backfilled {written} {interval} candles for {symbol}")
+        return written
+
+async def get_klines(trader: AsyncBinanceTrader, symbol: str, interval: str = '1h', limit: int = 100,
+                     session_factory=SessionLocal) -> pd.DataFrame:
+    """
+    Closed candles for a symbol, served from the candle store and topped
+    up with a delta fetch when the store is behind. Falls back to a direct
+    exchange fetch when the store is disabled or unavailable.
+    """
+    if not CANDLE_STORE_ENABLED or interval not in INTERVAL_SECONDS:
+        return await trader.get_historical_klines(symbol=symbol, interval=interval, limit=limit)
+
+    db = session_factory()
+    try:
+        store = CandleStore(db, trader.base_url)
+        await store.sync(trader, symbol, interval, limit)
+        df = store.load(symbol, interval, limit)
+    except Exception as e:
+        logger.error(f"Candle store error for {symbol} {interval}: {e}")
+        db.rollback()
+        df = None
+    finally:
+        db.close()
+
+    if df is None or df.empty:
+        return await trader.get_historical_klines(symbol=symbol, interval=interval, limit=limit)
+    return df
@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BINANCE_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BINANCE_BREAKER_RESET_SECONDS", "30"))
+
+class CircuitOpenError(httpx.HTTPError):
+    """
+    Raised instead of sending a request while the host's breaker is open.
+    An httpx.HTTPError so existing handlers treat it like the exchange
+    being unreachable.
+    """
+
+class CircuitBreaker:
+    """
+    Fails fast while a host is down. After `failure_threshold` consecutive
+    failures (transport errors and 5xx) the breaker opens and requests are
+    refused for `reset_seconds`; then one probe request is let through, and
+    its outcome closes the breaker or opens it for another period.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self.failures = 0
+        self.rejected = 0
+        self.retries = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        if self.state == self.HALF_OPEN:
+            # One probe at a time; a probe that never reported back (its
+            # caller was cancelled) is replaced after a reset period
+            if self._probe_started is None or now - self._probe_started >= self.reset_seconds:
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit breaker for {self.host} closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit breaker for {self.host} opened after {self.consecutive_failures} failures, "
+                f"failing fast for {self.reset_seconds:.0f}s"
+            )
+
+    def stats(self) -> Dict:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(self.opened_at + self.reset_seconds - time.monotonic(), 0.0), 1)
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'retries': self.retries,
+            'times_opened': self.times_opened,
+            'retry_in_seconds': retry_in
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+    """The breaker for the host of `url`."""
+    host = urlsplit(url).netloc or url
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(host)
+    return breaker
+
+def breaker_stats() -> Dict[str, Dict]:
+    return {host: breaker.stats() for host, breaker in _breakers.items()}
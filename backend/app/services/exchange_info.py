@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from decimal import ROUND_CEILING, ROUND_DOWN, Decimal
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.services.async_binance_client import send_request
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_INFO_TTL_SECONDS = float(os.getenv("EXCHANGE_INFO_TTL_SECONDS", "3600"))
+# After a failed first load, orders go out unvalidated for this long
+# instead of each one retrying the weight-20 call
+EXCHANGE_INFO_RETRY_SECONDS = 60.0
+
+ZERO = Decimal(0)
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+def _floor_to(value: Decimal, step: Decimal) -> Decimal:
+    if step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+def _ceil_to(value: Decimal, step: Decimal) -> Decimal:
+    if step <= 0:
+        return value
+    return (value / step).to_integral_value(rounding=ROUND_CEILING) * step
+
+@dataclass(frozen=True)
+class SymbolFilters:
+    """The order filters of one symbol; a zero value means the filter is off."""
+    symbol: str
+    step_size: Decimal = ZERO
+    min_qty: Decimal = ZERO
+    max_qty: Decimal = ZERO
+    market_step_size: Decimal = ZERO
+    market_min_qty: Decimal = ZERO
+    market_max_qty: Decimal = ZERO
+    tick_size: Decimal = ZERO
+    min_price: Decimal = ZERO
+    max_price: Decimal = ZERO
+    min_notional: Decimal = ZERO
+    min_notional_applies_to_market: bool = True
+
+    @classmethod
+    def from_exchange_info(cls, info: dict) -> 'SymbolFilters':
+        """Build from one entry of exchangeInfo's `symbols` list."""
+        fields = {'symbol': info['symbol']}
+        for f in info.get('filters', []):
+            kind = f.get('filterType')
+            if kind == 'LOT_SIZE':
+                fields.update(step_size=_decimal(f.get('stepSize')), min_qty=_decimal(f.get('minQty')),
+                              max_qty=_decimal(f.get('maxQty')))
+            elif kind == 'MARKET_LOT_SIZE':
+                fields.update(market_step_size=_decimal(f.get('stepSize')),
+                              market_min_qty=_decimal(f.get('minQty')),
+                              market_max_qty=_decimal(f.get('maxQty')))
+            elif kind == 'PRICE_FILTER':
+                fields.update(tick_size=_decimal(f.get('tickSize')), min_price=_decimal(f.get('minPrice')),
+                              max_price=_decimal(f.get('maxPrice')))
+            elif kind == 'MIN_NOTIONAL':
+                fields.update(min_notional=_decimal(f.get('minNotional')),
+                              min_notional_applies_to_market=bool(f.get('applyToMarket', True)))
+            elif kind == 'NOTIONAL':
+                fields.update(min_notional=_decimal(f.get('minNotional')),
+                              min_notional_applies_to_market=bool(f.get('applyMinToMarket', True)))
+        return cls(**fields)
+
+    def _lot(self, market: bool) -> Tuple[Decimal, Decimal, Decimal]:
+        # MARKET_LOT_SIZE, when set, replaces LOT_SIZE for market orders
+        if market and self.market_step_size > 0:
+            return self.market_step_size, self.market_min_qty, self.market_max_qty
+        return self.step_size, self.min_qty, self.max_qty
+
+    def round_quantity(self, quantity: float, market: bool = True) -> Decimal:
+        """Round down to the lot step, so an order never spends more than asked."""
+        step, _, _ = self._lot(market)
+        return _floor_to(_decimal(quantity), step)
+
+    def round_price(self, price: float, side: str) -> Decimal:
+        """Round to the tick away from the market: buys down, sells up."""
+        price = _decimal(price)
+        if side == 'SELL':
+            return _ceil_to(price, self.tick_size)
+        return _floor_to(price, self.tick_size)
+
+    def check(self, quantity, price=None, market: bool = True) -> Optional[str]:
+        """
+        Why an order for `quantity` at `price` would be rejected, or None.
+        For market orders `price` is the expected fill price and may be
+        None, in which case the notional isn't checked.
+        """
+        quantity = _decimal(quantity)
+        price = None if price is None else _decimal(price)
+        _, min_qty, max_qty = self._lot(market)
+        if quantity <= 0 or quantity < min_qty:
+            return f"Quantity {quantity} below minimum {min_qty} for {self.symbol} (LOT_SIZE)"
+        if max_qty > 0 and quantity > max_qty:
+            return f"Quantity {quantity} above maximum {max_qty} for {self.symbol} (LOT_SIZE)"
+        if price is None:
+            return None
+        if not market:
+            if price < self.min_price or (self.max_price > 0 and price > self.max_price):
+                return f"Price {price} outside [{self.min_price}, {self.max_price}] for {self.symbol} (PRICE_FILTER)"
+        if market and not self.min_notional_applies_to_market:
+            return None
+        notional = quantity * price
+        if notional < self.min_notional:
+            return f"Order value {notional:.8f} below minimum notional {self.min_notional} for {self.symbol}"
+        return None
+
+class ExchangeInfoCache:
+    """
+    Symbol filters from one bulk /api/v3/exchangeInfo call (weight 20).
+
+    Loaded on first use; once older than the TTL the cached filters keep
+    being served while a single background refresh replaces them, so
+    order placement never waits on exchangeInfo after the first load.
+    """
+
+    def __init__(self, base_url: str, ttl_seconds: float = EXCHANGE_INFO_TTL_SECONDS):
+        self.base_url = base_url
+        self.ttl_seconds = ttl_seconds
+        self._symbols: Dict[str, SymbolFilters] = {}
+        self._fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._failed_at: Optional[float] = None
+        self.refreshes = 0
+
+    def is_fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl_seconds
+
+    def lookup(self, symbol: str) -> Optional[SymbolFilters]:
+        """Cached filters only; never fetches."""
+        return self._symbols.get(symbol)
+
+    async def get(self, symbol: str) -> Optional[SymbolFilters]:
+        """
+        Filters for `symbol`. None when the symbol is unknown or exchangeInfo
+        has never loaded, in which case orders go out unvalidated.
+        """
+        if self._fetched_at is None:
+            if self._failed_at is not None and time.monotonic() - self._failed_at < EXCHANGE_INFO_RETRY_SECONDS:
+                return None
+            try:
+                await self.refresh()
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                logger.error(f"Error loading exchange info from {self.base_url}: {e}")
+                self._failed_at = time.monotonic()
+                return None
+        elif not self.is_fresh():
+            self._refresh_in_background()
+        return self._symbols.get(symbol)
+
+    def _refresh_in_background(self):
+        if self._inflight is not None and not self._inflight.done():
+            return
+        task = asyncio.ensure_future(self.refresh())
+        task.add_done_callback(self._log_refresh_error)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error refreshing exchange info: {task.exception()}")
+
+    async def refresh(self) -> Dict[str, SymbolFilters]:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Dict[str, SymbolFilters]:
+        response = await send_request('GET', self.base_url, '/api/v3/exchangeInfo')
+        response.raise_for_status()
+        self._symbols = {
+            info['symbol']: SymbolFilters.from_exchange_info(info)
+            for info in response.json().get('symbols', [])
+        }
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        logger.info(f"Exchange info loaded from {self.base_url}: {len(self._symbols)} symbols")
+        return self._symbols
+
+_caches: Dict[str, ExchangeInfoCache] = {}
+
+def get_exchange_info(base_url: str) -> ExchangeInfoCache:
+    """The exchangeInfo cache for one Binance base URL."""
+    cache = _caches.get(base_url)
+    if cache is None:
+        cache = _caches[base_url] = ExchangeInfoCache(base_url)
+    return cache
@@ -0,0 +1,180 @@
+import logging
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import BinanceAccount, BotConfig, BotStatus, OrderStatus, Trade
+from app.services.async_binance_client import market_data_url
+from app.services.leader_lease import try_acquire_lease
+from app.services.price_snapshot import get_price_snapshot
+from app.services.rate_limiter import Priority, request_priority
+from app.services.trader_pool import get_trader
+
+logger = logging.getLogger(__name__)
+
+EXIT_CHECK_SECONDS = float(os.getenv("EXIT_CHECK_SECONDS", "60"))
+EXIT_CHECK_LEASE = "exit-checks"
+
+STOP_LOSS_REASON = "STOP_LOSS"
+TAKE_PROFIT_REASON = "TAKE_PROFIT"
+
+class ExitDecision(NamedTuple):
+    trade_id: int
+    bot_id: int
+    symbol: str
+    price: float
+    reason: str
+
+class OpenPositions:
+    """
+    Every open trade (filled, exit_price NULL) of active bots as parallel
+    arrays, so exits for all of them are decided in one NumPy pass.
+    """
+
+    def __init__(self, trade_ids, bot_ids, symbols: List[str], symbol_idx, entry, stop, target):
+        self.trade_ids = np.asarray(trade_ids, dtype=np.int64)
+        self.bot_ids = np.asarray(bot_ids, dtype=np.int64)
+        self.symbols = symbols
+        self.symbol_idx = np.asarray(symbol_idx, dtype=np.intp)
+        self.entry = np.asarray(entry, dtype=np.float64)
+        self.stop = np.asarray(stop, dtype=np.float64)
+        self.target = np.asarray(target, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.trade_ids)
+
+    @classmethod
+    def load(cls, db: Session, testnet: Optional[bool] = None) -> 'OpenPositions':
+        """
+        Open trades of active bots; with `testnet`, only those on paper
+        (True) or live (False) accounts, which are priced on different venues.
+        """
+        query = db.query(Trade.id, Trade.bot_config_id, BotConfig.symbol, Trade.entry_price,
+                         BotConfig.stop_loss_percent, BotConfig.take_profit_percent).join(
+            BotConfig, Trade.bot_config_id == BotConfig.id
+        ).filter(
+            and_(
+                BotConfig.status == BotStatus.ACTIVE,
+                Trade.status == OrderStatus.FILLED,
+                Trade.exit_price.is_(None),
+                Trade.entry_price.isnot(None)
+            )
+        )
+        if testnet is not None:
+            query = query.join(BinanceAccount, BotConfig.binance_account_id == BinanceAccount.id).filter(
+                func.coalesce(BinanceAccount.testnet, False) == testnet
+            )
+        rows = query.all()
+        if not rows:
+            return cls([], [], [], [], [], [], [])
+
+        trade_ids, bot_ids, symbols, entry, stop_pct, target_pct = zip(*rows)
+        symbol_list = sorted(set(symbols))
+        position = {symbol: i for i, symbol in enumerate(symbol_list)}
+        entry = np.array(entry, dtype=np.float64)
+        return cls(
+            trade_ids, bot_ids, symbol_list, [position[s] for s in symbols], entry,
+            entry * (1 - np.array(stop_pct, dtype=np.float64) / 100),
+            entry * (1 + np.array(target_pct, dtype=np.float64) / 100)
+        )
+
+    def price_vector(self, prices: Dict[str, float]) -> np.ndarray:
+        """One price per tracked symbol; NaN where no price is known."""
+        return np.array([prices.get(symbol, np.nan) for symbol in self.symbols], dtype=np.float64)
+
+    def exit_mask(self, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized decision for a price vector aligned with `self.symbols`:
+        (mask of trades to close, mask of those closed by their stop).
+        Same rules as MeanReversionStrategy.should_exit_position: the stop
+        is checked first, and NaN prices (unknown symbols) never exit.
+        """
+        current = prices[self.symbol_idx]
+        stop_hit = current <= self.stop
+        return stop_hit | (current >= self.target), stop_hit
+
+    def evaluate(self, prices) -> List[ExitDecision]:
+        """
+        Trades whose stop-loss or take-profit is crossed at `prices`
+        (a {symbol: price} dict or a vector aligned with `self.symbols`).
+        """
+        if not len(self):
+            return []
+        if isinstance(prices, dict):
+            prices = self.price_vector(prices)
+        exit_mask, stop_hit = self.exit_mask(prices)
+        current = prices[self.symbol_idx]
+
+        hits = np.flatnonzero(exit_mask)
+        return [
+            ExitDecision(trade_id, bot_id, self.symbols[symbol_idx], price,
+                         STOP_LOSS_REASON if is_stop else TAKE_PROFIT_REASON)
+            for trade_id, bot_id, symbol_idx, price, is_stop in zip(
+                self.trade_ids[hits].tolist(), self.bot_ids[hits].tolist(),
+                self.symbol_idx[hits].tolist(), current[hits].tolist(), stop_hit[hits].tolist()
+            )
+        ]
+
+async def close_trade(trade_id: int, price: float, exit_reason: str, session_factory=SessionLocal) -> bool:
+    """
+    Sell an open trade through TradingEngine.execute_sell_order in its own
+    session. Returns True when the trade was closed.
+    """
+    from app.services.trading_engine import TradingEngine
+
+    db = session_factory()
+    try:
+        trade = db.query(Trade).filter(Trade.id == trade_id).first()
+        if not trade or trade.exit_price is not None:
+            return False
+        bot = db.query(BotConfig).filter(BotConfig.id == trade.bot_config_id).first()
+        account = db.query(BinanceAccount).filter(BinanceAccount.id == bot.binance_account_id).first()
+        if not account or not account.is_active:
+            logger.warning(f"No active Binance account for bot {bot.id}, cannot close trade {trade_id}")
+            return False
+        engine = TradingEngine(db, session_factory)
+        await engine.execute_sell_order(bot, get_trader(account), trade, price, exit_reason)
+        return trade.exit_price is not None
+    except Exception as e:
+        logger.error(f"Error closing trade {trade_id}: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+async def check_exits(session_factory=SessionLocal, use_lease: bool = True) -> int:
+    """
+    Scheduler job: evaluate every open trade against the price snapshot of
+    its account's venue and close the ones past their stop or target.
+    Returns the number closed.
+    """
+    db = session_factory()
+    try:
+        if use_lease and not try_acquire_lease(db, EXIT_CHECK_LEASE):
+            return 0
+        venues = {testnet: OpenPositions.load(db, testnet) for testnet in (True, False)}
+    finally:
+        db.close()
+
+    closed = 0
+    for testnet, positions in venues.items():
+        if not len(positions):
+            continue
+        snapshot = get_price_snapshot(market_data_url(testnet))
+        try:
+            with request_priority(Priority.EXIT):
+                prices = await snapshot.get_prices()
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            # No stale fallback here: skip this venue until the next check
+            logger.error(f"Exit check skipped for {snapshot.base_url}: {e}")
+            continue
+        for decision in positions.evaluate(prices):
+            logger.info(f"{decision.reason} for trade {decision.trade_id} ({decision.symbol} @ {decision.price})")
+            if await close_trade(decision.trade_id, decision.price, decision.reason, session_factory):
+                closed += 1
+    return closed
@@ -0,0 +1,539 @@
+"""
+In-process stand-in for the Binance spot REST API, for load and
+integration tests that must not touch the network.
+
+It serves the endpoints the traders use (klines, ticker/price,
+exchangeInfo, account, order placement, status and cancel) from
+synthetic random-walk prices, with configurable latency, injected 5xx
+errors and the X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-10S headers.
+Signatures are not checked; signed endpoints only need X-MBX-APIKEY.
+
+In the same process, route the shared HTTP client to it:
+
+    exchange = FakeExchange(latency_seconds=0.02, error_rate=0.01)
+    install_fake_exchange(exchange)
+
+or run it as a server and point BINANCE_API_URL / BINANCE_PUBLIC_API_URL
+at it:
+
+    python -m app.services.fake_exchange --port 9100
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import math
+import random
+import time
+import zlib
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.services import async_binance_client
+from app.services.candle_store import INTERVAL_SECONDS
+from app.services.exchange_info import SymbolFilters
+from app.services.rate_limiter import request_weight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYMBOLS = {
+    'BTCUSDT': 95000.0,
+    'ETHUSDT': 3500.0,
+    'BNBUSDT': 600.0,
+    'SOLUSDT': 150.0
+}
+QUOTE_ASSET = 'USDT'
+STEP_SIZE = '0.00001'
+MIN_NOTIONAL = '5.0'
+
+class _PricePath:
+    """
+    One symbol's 1-minute closes from `origin` (epoch minute) on, a
+    geometric random walk scaled so the close at creation equals
+    `start_price`. Extended on demand as the clock moves.
+    """
+
+    def __init__(self, symbol: str, start_price: float, now_minute: int, history_minutes: int,
+                 volatility: float, seed: int):
+        self.rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+        self.volatility = volatility
+        self.origin = now_minute - history_minutes
+        returns = self.rng.normal(0.0, volatility, history_minutes + 1)
+        log_path = np.cumsum(returns)
+        self.closes = start_price * np.exp(log_path - log_path[-1])
+        self.volumes = self.rng.gamma(2.0, 50.0, history_minutes + 1)
+        self.decimals = min(8, max(2, 6 - int(math.floor(math.log10(start_price)))))
+
+    def extend_to(self, minute: int):
+        missing = minute - self.origin + 1 - len(self.closes)
+        if missing <= 0:
+            return
+        returns = self.rng.normal(0.0, self.volatility, missing)
+        extension = self.closes[-1] * np.exp(np.cumsum(returns))
+        self.closes = np.concatenate([self.closes, extension])
+        self.volumes = np.concatenate([self.volumes, self.rng.gamma(2.0, 50.0, missing)])
+
+class ExchangeError(Exception):
+    """A Binance-style error response: HTTP status plus {code, msg}."""
+
+    def __init__(self, status_code: int, code: int, msg: str):
+        self.status_code = status_code
+        self.code = code
+        self.msg = msg
+        super().__init__(msg)
+
+class FakeExchange:
+    """
+    Synthetic exchange state: price paths, per-API-key balances, orders and
+    the request-weight / order-count windows. `app` is the ASGI app serving it.
+    """
+
+    def __init__(self, symbols: Optional[Dict[str, float]] = None, volatility: float = 0.001,
+                 history_minutes: int = 1000 * 240, seed: int = 0,
+                 latency_seconds: float = 0.0, latency_jitter_seconds: float = 0.0,
+                 error_rate: float = 0.0, weight_limit: int = 1200, order_limit_10s: int = 50,
+                 initial_balances: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.clock = clock
+        now_minute = int(clock() // 60)
+        self.paths = {
+            symbol: _PricePath(symbol, price, now_minute, history_minutes, volatility, seed)
+            for symbol, price in (symbols or DEFAULT_SYMBOLS).items()
+        }
+        self.filters = {symbol: self._symbol_filters(symbol) for symbol in self.paths}
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.error_rate = error_rate
+        self.weight_limit = weight_limit
+        self.order_limit_10s = order_limit_10s
+        self.initial_balances = initial_balances or {QUOTE_ASSET: 1_000_000.0}
+        self.balances: Dict[str, Dict[str, List[float]]] = {}
+        self.orders: Dict[int, dict] = {}
+        self._order_ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._weight_window = (None, 0)
+        self._order_windows: Dict[str, Tuple[int, int]] = {}
+        self.requests = Counter()
+        self.errors_injected = 0
+        self.throttled = 0
+        self.orders_filled = 0
+        self.orders_rejected = 0
+        self.app = self._build_app()
+
+    # Market data
+
+    def _symbol_filters(self, symbol: str) -> dict:
+        tick = f"{10 ** -self.paths[symbol].decimals:.{self.paths[symbol].decimals}f}"
+        return {
+            'symbol': symbol,
+            'status': 'TRADING',
+            'baseAsset': symbol[:-len(QUOTE_ASSET)],
+            'quoteAsset': QUOTE_ASSET,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': tick, 'maxPrice': '10000000.00', 'tickSize': tick},
+                {'filterType': 'LOT_SIZE', 'minQty': STEP_SIZE, 'maxQty': '100000.0', 'stepSize': STEP_SIZE},
+                {'filterType': 'NOTIONAL', 'minNotional': MIN_NOTIONAL, 'applyMinToMarket': True,
+                 'maxNotional': '10000000.0'}
+            ]
+        }
+
+    def _path(self, symbol: str) -> _PricePath:
+        path = self.paths.get(symbol)
+        if path is None:
+            raise ExchangeError(400, -1121, "Invalid symbol.")
+        return path
+
+    def _now_minute(self) -> int:
+        return int(self.clock() // 60)
+
+    def price(self, symbol: str) -> float:
+        """Current price: the close of the minute in progress."""
+        path = self._path(symbol)
+        minute = self._now_minute()
+        path.extend_to(minute)
+        return float(path.closes[minute - path.origin])
+
+    def klines(self, symbol: str, interval: str, limit: int = 500,
+               start_time: Optional[int] = None, end_time: Optional[int] = None) -> list:
+        """Raw kline rows aggregated from the 1-minute path, the open candle last."""
+        if interval not in INTERVAL_SECONDS or INTERVAL_SECONDS[interval] < 60:
+            raise ExchangeError(400, -1120, "Invalid interval.")
+        path = self._path(symbol)
+        step = INTERVAL_SECONDS[interval] // 60
+        now = self._now_minute()
+        path.extend_to(now)
+        limit = max(1, min(int(limit), 1000))
+
+        current = now // step
+        earliest = -(-(path.origin + 1) // step)
+        if start_time is not None:
+            first = max(-(-(int(start_time) // 60000) // step), earliest)
+            last = min(first + limit - 1, current)
+            if end_time is not None:
+                last = min(last, int(end_time) // 60000 // step)
+        else:
+            # The latest `limit` candles opening at or before end_time
+            last = current if end_time is None else min(int(end_time) // 60000 // step, current)
+            first = max(last - limit + 1, earliest)
+        if first > last:
+            return []
+
+        start = first * step - path.origin
+        end = min((last + 1) * step, now + 1) - path.origin
+        closes = path.closes[start:end]
+        volumes = path.volumes[start:end]
+        n = last - first + 1
+        padded = np.full(n * step, np.nan)
+        padded[:len(closes)] = closes
+        blocks = padded.reshape(n, step)
+        highs = np.nanmax(blocks, axis=1)
+        lows = np.nanmin(blocks, axis=1)
+        # Each candle opens at the previous minute's close
+        opens = path.closes[np.arange(first, last + 1) * step - 1 - path.origin]
+        close_idx = np.minimum(np.arange(1, n + 1) * step, len(closes)) - 1
+        candle_closes = closes[close_idx]
+        padded_volume = np.zeros(n * step)
+        padded_volume[:len(volumes)] = volumes
+        candle_volumes = padded_volume.reshape(n, step).sum(axis=1)
+        highs = np.maximum(highs, opens)
+        lows = np.minimum(lows, opens)
+
+        fmt = f"{{:.{path.decimals}f}}"
+        step_ms = step * 60_000
+        rows = []
+        for i, (o, h, l, c, v) in enumerate(zip(opens.tolist(), highs.tolist(), lows.tolist(),
+                                                candle_closes.tolist(), candle_volumes.tolist())):
+            open_time = (first + i) * step_ms
+            rows.append([
+                open_time, fmt.format(o), fmt.format(h), fmt.format(l), fmt.format(c), f"{v:.5f}",
+                open_time + step_ms - 1, f"{v * c:.2f}", int(v), f"{v / 2:.5f}", f"{v * c / 2:.2f}", "0"
+            ])
+        return rows
+
+    # Accounts and orders
+
+    def _account(self, api_key: str) -> Dict[str, List[float]]:
+        account = self.balances.get(api_key)
+        if account is None:
+            # [free, locked] per asset
+            account = self.balances[api_key] = {
+                asset: [float(amount), 0.0] for asset, amount in self.initial_balances.items()
+            }
+        return account
+
+    def _asset(self, account: Dict[str, List[float]], asset: str) -> List[float]:
+        return account.setdefault(asset, [0.0, 0.0])
+
+    def account(self, api_key: str) -> dict:
+        self._match_resting()
+        return {
+            'makerCommission': 0, 'takerCommission': 0,
+            'canTrade': True, 'canWithdraw': True, 'canDeposit': True,
+            'updateTime': int(self.clock() * 1000),
+            'accountType': 'SPOT',
+            'balances': [
+                {'asset': asset, 'free': f"{free:.8f}", 'locked': f"{locked:.8f}"}
+                for asset, (free, locked) in self._account(api_key).items()
+            ]
+        }
+
+    def place_order(self, api_key: str, params: dict) -> dict:
+        symbol = params.get('symbol', '')
+        side = params.get('side')
+        order_type = params.get('type')
+        path = self._path(symbol)
+        if side not in ('BUY', 'SELL') or order_type not in ('MARKET', 'LIMIT'):
+            raise ExchangeError(400, -1116, "Invalid orderType.")
+        try:
+            quantity = float(params['quantity'])
+            price = float(params['price']) if order_type == 'LIMIT' else self.price(symbol)
+        except (KeyError, ValueError):
+            raise ExchangeError(400, -1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+
+        error = SymbolFilters.from_exchange_info(self.filters[symbol]).check(
+            quantity, price, market=order_type == 'MARKET'
+        )
+        if error:
+            self.orders_rejected += 1
+            raise ExchangeError(400, -1013, f"Filter failure: {error}")
+
+        base = symbol[:-len(QUOTE_ASSET)]
+        account = self._account(api_key)
+        spend_asset, spend = (QUOTE_ASSET, quantity * price) if side == 'BUY' else (base, quantity)
+        balance = self._asset(account, spend_asset)
+        if balance[0] < spend - 1e-12:
+            self.orders_rejected += 1
+            raise ExchangeError(400, -2010, "Account has insufficient balance for requested action.")
+
+        order_id = next(self._order_ids)
+        now_ms = int(self.clock() * 1000)
+        order = {
+            'symbol': symbol,
+            'orderId': order_id,
+            'orderListId': -1,
+            'clientOrderId': params.get('newClientOrderId') or f"fake{order_id}",
+            'transactTime': now_ms,
+            'price': f"{price:.{path.decimals}f}" if order_type == 'LIMIT' else "0.00000000",
+            'origQty': f"{quantity:.8f}",
+            'executedQty': "0.00000000",
+            'cummulativeQuoteQty': "0.00000000",
+            'status': 'NEW',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'side': side,
+            'fills': [],
+            '_api_key': api_key
+        }
+        self.orders[order_id] = order
+        # Funds are locked until the order fills or is cancelled
+        balance[0] -= spend
+        balance[1] += spend
+        if order_type == 'MARKET':
+            self._fill(order, price)
+        else:
+            self._match_resting()
+        return self._public(order)
+
+    def _fill(self, order: dict, price: float):
+        quantity = float(order['origQty'])
+        base = order['symbol'][:-len(QUOTE_ASSET)]
+        account = self._account(order['_api_key'])
+        quote = self._asset(account, QUOTE_ASSET)
+        base_balance = self._asset(account, base)
+        if order['side'] == 'BUY':
+            locked = quantity * (float(order['price']) if order['type'] == 'LIMIT' else price)
+            quote[1] -= locked
+            # A limit buy filled below its price gets the difference back
+            quote[0] += locked - quantity * price
+            base_balance[0] += quantity
+        else:
+            base_balance[1] -= quantity
+            quote[0] += quantity * price
+        order.update(
+            status='FILLED',
+            executedQty=f"{quantity:.8f}",
+            cummulativeQuoteQty=f"{quantity * price:.8f}",
+            fills=[{'price': f"{price:.8f}", 'qty': f"{quantity:.8f}", 'commission': "0.00000000",
+                    'commissionAsset': QUOTE_ASSET, 'tradeId': order['orderId']}]
+        )
+        self.orders_filled += 1
+
+    def _match_resting(self):
+        """Fill resting limit orders the current price has crossed."""
+        for order in self.orders.values():
+            if order['status'] != 'NEW' or order['type'] != 'LIMIT':
+                continue
+            limit = float(order['price'])
+            current = self.price(order['symbol'])
+            if (order['side'] == 'BUY' and current <= limit) or (order['side'] == 'SELL' and current >= limit):
+                self._fill(order, limit)
+
+    def _find(self, api_key: str, params: dict, missing_code: int, missing_msg: str) -> dict:
+        try:
+            order = self.orders.get(int(params.get('orderId', 0)))
+        except ValueError:
+            order = None
+        if order is None or order['_api_key'] != api_key or order['symbol'] != params.get('symbol'):
+            raise ExchangeError(400, missing_code, missing_msg)
+        return order
+
+    def order_status(self, api_key: str, params: dict) -> dict:
+        self._match_resting()
+        order = self._find(api_key, params, -2013, "Order does not exist.")
+        return {key: value for key, value in self._public(order).items() if key != 'fills'}
+
+    def cancel_order(self, api_key: str, params: dict) -> dict:
+        self._match_resting()
+        order = self._find(api_key, params, -2011, "Unknown order sent.")
+        if order['status'] != 'NEW':
+            raise ExchangeError(400, -2011, "Unknown order sent.")
+        quantity = float(order['origQty'])
+        account = self._account(api_key)
+        if order['side'] == 'BUY':
+            asset, amount = self._asset(account, QUOTE_ASSET), quantity * float(order['price'])
+        else:
+            asset, amount = self._asset(account, order['symbol'][:-len(QUOTE_ASSET)]), quantity
+        asset[1] -= amount
+        asset[0] += amount
+        order['status'] = 'CANCELED'
+        return {key: value for key, value in self._public(order).items() if key != 'fills'}
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        return {key: value for key, value in order.items() if not key.startswith('_')}
+
+    # Limits and faults
+
+    def _count_weight(self, weight: int) -> int:
+        minute = self._now_minute()
+        window, used = self._weight_window
+        used = weight if window != minute else used + weight
+        self._weight_window = (minute, used)
+        return used
+
+    def _count_order(self, api_key: str) -> int:
+        window = int(self.clock() // 10)
+        current, count = self._order_windows.get(api_key, (None, 0))
+        count = 1 if current != window else count + 1
+        self._order_windows[api_key] = (window, count)
+        return count
+
+    def stats(self) -> Dict:
+        return {
+            'requests': dict(self.requests),
+            'total_requests': sum(self.requests.values()),
+            'errors_injected': self.errors_injected,
+            'throttled': self.throttled,
+            'orders_filled': self.orders_filled,
+            'orders_rejected': self.orders_rejected,
+            'used_weight_1m': self._weight_window[1]
+        }
+
+    # ASGI app
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Binance", docs_url=None, redoc_url=None)
+        exchange = self
+
+        async def params_of(request: Request) -> dict:
+            params = dict(request.query_params)
+            if request.method != 'GET':
+                params.update(parse_qsl((await request.body()).decode()))
+            return params
+
+        def api_key_of(request: Request) -> str:
+            api_key = request.headers.get('X-MBX-APIKEY')
+            if not api_key:
+                raise ExchangeError(401, -2014, "API-key format invalid.")
+            return api_key
+
+        @app.middleware("http")
+        async def simulate(request: Request, call_next):
+            path = request.url.path
+            exchange.requests[f"{request.method} {path}"] += 1
+            if exchange.latency_seconds or exchange.latency_jitter_seconds:
+                await asyncio.sleep(
+                    exchange.latency_seconds + exchange._random.uniform(0, exchange.latency_jitter_seconds)
+                )
+            used = exchange._count_weight(request_weight(request.method, path, dict(request.query_params)))
+            headers = {'X-MBX-USED-WEIGHT-1M': str(used)}
+            if used > exchange.weight_limit:
+                exchange.throttled += 1
+                retry_after = 60 - int(exchange.clock()) % 60
+                return JSONResponse(
+                    {'code': -1003, 'msg': "Too much request weight used; please use WebSocket Streams for live updates to avoid polling the API."},
+                    status_code=429, headers={**headers, 'Retry-After': str(retry_after)}
+                )
+            if exchange.error_rate and exchange._random.random() < exchange.error_rate:
+                exchange.errors_injected += 1
+                return JSONResponse(
+                    {'code': -1001, 'msg': "Internal error; unable to process your request. Please try again."},
+                    status_code=503, headers=headers
+                )
+            if request.method == 'POST' and path == '/api/v3/order' and request.headers.get('X-MBX-APIKEY'):
+                count = exchange._count_order(request.headers['X-MBX-APIKEY'])
+                headers['X-MBX-ORDER-COUNT-10S'] = str(count)
+                if count > exchange.order_limit_10s:
+                    exchange.throttled += 1
+                    return JSONResponse(
+                        {'code': -1015, 'msg': "Too many new orders."}, status_code=429,
+                        headers={**headers, 'Retry-After': '10'}
+                    )
+            response = await call_next(request)
+            response.headers.update(headers)
+            return response
+
+        @app.exception_handler(ExchangeError)
+        async def exchange_error(request: Request, exc: ExchangeError):
+            return JSONResponse({'code': exc.code, 'msg': exc.msg}, status_code=exc.status_code)
+
+        @app.get("/api/v3/ping")
+        async def ping():
+            return {}
+
+        @app.get("/api/v3/time")
+        async def server_time():
+            return {'serverTime': int(exchange.clock() * 1000)}
+
+        @app.get("/api/v3/exchangeInfo")
+        async def exchange_info():
+            return {
+                'timezone': 'UTC',
+                'serverTime': int(exchange.clock() * 1000),
+                'rateLimits': [
+                    {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1,
+                     'limit': exchange.weight_limit},
+                    {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10,
+                     'limit': exchange.order_limit_10s}
+                ],
+                'symbols': list(exchange.filters.values())
+            }
+
+        @app.get("/api/v3/klines")
+        async def klines(symbol: str, interval: str, limit: int = 500, startTime: Optional[int] = None,
+                         endTime: Optional[int] = None):
+            # Skip FastAPI's per-item encoding of up to 1000 rows
+            return JSONResponse(exchange.klines(symbol, interval, limit, startTime, endTime))
+
+        @app.get("/api/v3/ticker/price")
+        async def ticker_price(symbol: Optional[str] = None):
+            if symbol:
+                return {'symbol': symbol, 'price': f"{exchange.price(symbol):.8f}"}
+            return [{'symbol': s, 'price': f"{exchange.price(s):.8f}"} for s in exchange.paths]
+
+        @app.get("/api/v3/account")
+        async def account(request: Request):
+            return exchange.account(api_key_of(request))
+
+        @app.post("/api/v3/order")
+        async def new_order(request: Request):
+            return exchange.place_order(api_key_of(request), await params_of(request))
+
+        @app.get("/api/v3/order")
+        async def get_order(request: Request):
+            return exchange.order_status(api_key_of(request), await params_of(request))
+
+        @app.delete("/api/v3/order")
+        async def cancel_order(request: Request):
+            return exchange.cancel_order(api_key_of(request), await params_of(request))
+
+        return app
+
+def install_fake_exchange(exchange: FakeExchange) -> httpx.AsyncClient:
+    """
+    Route the shared Binance HTTP client (every host) to `exchange`
+    in-process. Undo with close_http_client().
+    """
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=exchange.app))
+    async_binance_client.set_http_client(client)
+    return client
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a fake Binance spot REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency, up to this")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--volatility", type=float, default=0.001, help="per-minute log-return stdev")
+    parser.add_argument("--weight-limit", type=int, default=1200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exchange = FakeExchange(
+        volatility=args.volatility, seed=args.seed,
+        latency_seconds=args.latency_ms / 1000, latency_jitter_seconds=args.jitter_ms / 1000,
+        error_rate=args.error_rate, weight_limit=args.weight_limit
+    )
+    uvicorn.run(exchange.app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
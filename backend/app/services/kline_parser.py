@@ -0,0 +1,60 @@
+from operator import itemgetter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_OHLCV = itemgetter(1, 2, 3, 4, 5)
+_OPEN_TIME = itemgetter(0)
+
+class Klines:
+    """
+    Compact columnar candles: open time in ms (int64) and OHLCV (float64).
+
+    Only the six columns strategies read are kept. `to_frame()` builds a
+    pandas view lazily for callers that still want a DataFrame.
+    """
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume', '_frame')
+
+    def __init__(self, timestamp: np.ndarray, ohlcv: np.ndarray):
+        self.timestamp = timestamp
+        # ohlcv is (5, n) and C-contiguous, so every column is a contiguous view
+        self.open, self.high, self.low, self.close, self.volume = ohlcv
+        self._frame: Optional[pd.DataFrame] = None
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamp) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamp.nbytes + 5 * self.close.nbytes
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with a datetime `timestamp` and float OHLCV columns (cached)."""
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                'timestamp': pd.to_datetime(self.timestamp, unit='ms'),
+                'open': self.open,
+                'high': self.high,
+                'low': self.low,
+                'close': self.close,
+                'volume': self.volume
+            }, copy=False)
+        return self._frame
+
+def parse_klines(raw: list) -> Klines:
+    """
+    Decode a raw /api/v3/klines response (list of 12-field rows, prices as
+    strings) straight into typed arrays, skipping the unused columns.
+    """
+    n = len(raw)
+    timestamp = np.fromiter(map(_OPEN_TIME, raw), dtype=np.int64, count=n)
+    if n == 0:
+        return Klines(timestamp, np.empty((5, 0), dtype=np.float64))
+    ohlcv = np.array(list(map(_OHLCV, raw)), dtype=np.float64).T.copy()
+    return Klines(timestamp, ohlcv)
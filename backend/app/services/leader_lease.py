@@ -0,0 +1,152 @@
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.models import BotConfig, BotStatus, BotCycleClaim, LeaderLease
+
+logger = logging.getLogger(__name__)
+
+# leader: one replica (the lease holder) runs each cycle.
+# claim:  every replica runs the cycle and claims bots in batches with
+#         SELECT ... FOR UPDATE SKIP LOCKED, so the bots are split between them.
+TRADING_CYCLE_MODE = os.getenv("TRADING_CYCLE_MODE", "leader").lower()
+LEASE_TTL_SECONDS = float(os.getenv("LEADER_LEASE_TTL_SECONDS", "30"))
+LEASE_HEARTBEAT_SECONDS = float(os.getenv("LEADER_LEASE_HEARTBEAT_SECONDS", "10"))
+CLAIM_BATCH_SIZE = int(os.getenv("TRADING_CLAIM_BATCH_SIZE", "20"))
+# Claims are only needed while their cycle runs; older ones are pruned
+CLAIM_RETENTION_SECONDS = float(os.getenv("TRADING_CLAIM_RETENTION_SECONDS", str(3 * 3600)))
+TRADING_CYCLE_LEASE = "trading-cycle"
+
+INSTANCE_ID = os.getenv("INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+def current_cycle_key(now: datetime = None) -> str:
+    """Key shared by all replicas for the hourly cycle that contains `now`."""
+    now = now or datetime.utcnow()
+    return now.replace(minute=0, second=0, microsecond=0).isoformat()
+
+def try_acquire_lease(db: Session, name: str = TRADING_CYCLE_LEASE, holder: str = INSTANCE_ID,
+                      ttl_seconds: float = LEASE_TTL_SECONDS) -> bool:
+    """
+    Take or renew a lease. Succeeds when the lease is free, expired or
+    already ours; the conditional UPDATE makes it safe across replicas.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    updated = db.query(LeaderLease).filter(
+        LeaderLease.name == name,
+        or_(LeaderLease.holder == holder, LeaderLease.expires_at < now)
+    ).update({
+        LeaderLease.holder: holder,
+        LeaderLease.expires_at: expires_at,
+        LeaderLease.heartbeat_at: now
+    }, synchronize_session=False)
+    db.commit()
+    if updated:
+        return True
+
+    if db.query(LeaderLease.name).filter(LeaderLease.name == name).first():
+        return False
+
+    try:
+        db.add(LeaderLease(name=name, holder=holder, expires_at=expires_at, heartbeat_at=now))
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another replica created the lease first
+        db.rollback()
+        return False
+
+def release_lease(db: Session, name: str = TRADING_CYCLE_LEASE, holder: str = INSTANCE_ID):
+    """Expire our lease now so another replica can take over without waiting for the TTL."""
+    db.query(LeaderLease).filter(
+        LeaderLease.name == name,
+        LeaderLease.holder == holder
+    ).update({LeaderLease.expires_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+def prune_cycle_claims(db: Session, retention_seconds: float = CLAIM_RETENTION_SECONDS) -> int:
+    """Delete bot claims older than `retention_seconds`. Returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    deleted = db.query(BotCycleClaim).filter(
+        BotCycleClaim.claimed_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def renew_leader_lease():
+    """
+    Scheduler heartbeat: keep (or pick up) the trading-cycle lease and
+    prune old bot claims. In leader mode only the lease holder prunes.
+    """
+    db = SessionLocal()
+    try:
+        if TRADING_CYCLE_MODE == 'leader':
+            if not try_acquire_lease(db):
+                return
+            logger.debug(f"{INSTANCE_ID} holds the {TRADING_CYCLE_LEASE} lease")
+        deleted = prune_cycle_claims(db)
+        if deleted:
+            logger.info(f"Pruned {deleted} old bot cycle claims")
+    except Exception as e:
+        logger.error(f"Error renewing leader lease: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def claim_bots(db: Session, cycle_key: str, limit: int = CLAIM_BATCH_SIZE,
+               holder: str = INSTANCE_ID) -> List[int]:
+    """
+    Claim up to `limit` active bots not yet taken in this cycle.
+
+    Rows locked by another replica's claim transaction are skipped
+    (FOR UPDATE SKIP LOCKED), and each claim is recorded before the lock is
+    released, so no bot is handed to two replicas in the same cycle.
+    """
+    already_claimed = exists().where(and_(
+        BotCycleClaim.bot_config_id == BotConfig.id,
+        BotCycleClaim.cycle_key == cycle_key
+    ))
+    rows = db.query(BotConfig.id).filter(
+        BotConfig.status == BotStatus.ACTIVE,
+        ~already_claimed
+    ).order_by(BotConfig.id).limit(limit).with_for_update(skip_locked=True).all()
+    bot_ids = [row[0] for row in rows]
+    if not bot_ids:
+        db.commit()
+        return []
+
+    try:
+        for bot_id in bot_ids:
+            db.add(BotCycleClaim(bot_config_id=bot_id, cycle_key=cycle_key, claimed_by=holder))
+        db.commit()
+    except IntegrityError:
+        # Lost a race on the unique (bot, cycle) key; the caller retries
+        db.rollback()
+        return claim_bots(db, cycle_key, limit, holder)
+    return bot_ids
+
+def claim_bot_slots(db: Session, bot_ids: List[int], cycle_key: str,
+                    holder: str = INSTANCE_ID) -> List[int]:
+    """
+    Claim specific bots for one run (cycle_key). Returns the bots this
+    replica won; bots already claimed by another replica are dropped.
+    """
+    claimed = []
+    for bot_id in bot_ids:
+        try:
+            with db.begin_nested():
+                db.add(BotCycleClaim(bot_config_id=bot_id, cycle_key=cycle_key, claimed_by=holder))
+            claimed.append(bot_id)
+        except IntegrityError:
+            pass
+    db.commit()
+    return claimed
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.database import SessionLocal
+from app.models.models import BotConfig
+from app.services.async_binance_client import market_data_url
+from app.services.candle_store import get_klines
+from app.services.trader_pool import get_trader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KLINE_INTERVAL = '1h'
+DEFAULT_KLINE_LIMIT = 100
+PREFETCH_CONCURRENCY = int(os.getenv("KLINE_PREFETCH_CONCURRENCY", "10"))
+
+KlineKey = Tuple[str, str, str, int]
+
+def kline_key(bot: BotConfig) -> KlineKey:
+    """
+    The (venue, symbol, interval, limit) a bot needs for its entry signal.
+    The venue is the base URL of the bot's account: paper accounts read
+    Binance US, live accounts the exchange they trade on. Bots may
+    override interval/limit through config_params.
+    """
+    params = bot.config_params or {}
+    account = bot.binance_account
+    return (
+        market_data_url(bool(account and account.testnet)),
+        bot.symbol,
+        params.get('interval', DEFAULT_KLINE_INTERVAL),
+        int(params.get('kline_limit', DEFAULT_KLINE_LIMIT))
+    )
+
+class MarketDataSnapshot:
+    """
+    Klines prefetched once per trading cycle and shared by every bot that
+    trades the same (venue, symbol, interval, limit).
+
+    Frames handed out are shared between bots and must be treated as
+    read-only; strategies work on their own copy.
+    """
+
+    def __init__(self, klines: Dict[KlineKey, pd.DataFrame] = None):
+        self._klines = klines or {}
+
+    def get_klines(self, key: KlineKey) -> Optional[pd.DataFrame]:
+        return self._klines.get(key)
+
+    def __len__(self):
+        return len(self._klines)
+
+    @classmethod
+    async def prefetch(cls, bots: List[BotConfig], session_factory=SessionLocal) -> "MarketDataSnapshot":
+        """
+        Group bots by kline key and fetch each group once, concurrently.
+        A group is fetched with the first active account found in it,
+        through the candle store; the venue in the key keeps live bots off
+        paper accounts' data (and its mock fallback).
+        """
+        groups: Dict[KlineKey, BotConfig] = {}
+        for bot in bots:
+            account = bot.binance_account
+            if not account or not account.is_active:
+                continue
+            groups.setdefault(kline_key(bot), bot)
+
+        limit = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def fetch(key: KlineKey, bot: BotConfig):
+            _, symbol, interval, kline_limit = key
+            account = bot.binance_account
+            async with limit:
+                try:
+                    trader = get_trader(account)
+                    df = await get_klines(
+                        trader,
+                        symbol=symbol,
+                        interval=interval,
+                        limit=kline_limit,
+                        session_factory=session_factory
+                    )
+                except Exception as e:
+                    logger.error(f"Error prefetching klines for {symbol} {interval}: {e}")
+                    return key, None
+            return key, df
+
+        results = await asyncio.gather(*[fetch(key, bot) for key, bot in groups.items()])
+        klines = {key: df for key, df in results if df is not None and not df.empty}
+
+        logger.info(f"Prefetched klines for {len(klines)}/{len(groups)} symbol groups ({len(bots)} bots)")
+        return cls(klines)
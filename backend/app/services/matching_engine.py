@@ -0,0 +1,561 @@
+"""
+In-process simulated exchange for paper accounts and backtests.
+
+Each symbol has a book model around its last price. Market orders (and
+the marketable part of a limit order) walk synthetic depth: levels a
+fixed number of basis points apart, each holding a fixed notional. A
+large order therefore fills at a worse average price, and it fills only
+partly once the modelled depth runs out. Limit orders that do not cross
+rest in per-price FIFO levels indexed by a heap, one per side, so each
+price tick only touches the levels it crosses. They fill at their limit
+price (maker fee) on the ticks or candles that trade through it, up to
+a share of the traded volume when the tick carries one.
+
+Fees are charged in the quote asset. Accounts hold free/locked balances
+like an exchange account. Paper accounts are quote-only: their base
+asset positions are tracked by the trading engine's Trade rows.
+"""
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PAPER_MAKER_FEE_RATE = float(os.getenv("PAPER_MAKER_FEE_RATE", "0.001"))
+PAPER_TAKER_FEE_RATE = float(os.getenv("PAPER_TAKER_FEE_RATE", "0.001"))
+# Synthetic book: half the spread, then `levels` levels `level_bps` apart
+PAPER_SPREAD_BPS = float(os.getenv("PAPER_SPREAD_BPS", "2"))
+PAPER_LEVEL_BPS = float(os.getenv("PAPER_LEVEL_BPS", "1"))
+PAPER_LEVEL_NOTIONAL_USDT = float(os.getenv("PAPER_LEVEL_NOTIONAL_USDT", "50000"))
+PAPER_DEPTH_LEVELS = int(os.getenv("PAPER_DEPTH_LEVELS", "50"))
+# Share of a tick's traded volume resting orders can fill against
+PAPER_PARTICIPATION_RATE = float(os.getenv("PAPER_PARTICIPATION_RATE", "0.1"))
+PAPER_STARTING_BALANCE = float(os.getenv("PAPER_STARTING_BALANCE", "10000"))
+# Filled, canceled and expired orders kept for status lookups, oldest dropped first
+PAPER_MAX_FINISHED_ORDERS = int(os.getenv("PAPER_MAX_FINISHED_ORDERS", "10000"))
+
+QUOTE_ASSETS = ('USDT', 'USDC', 'FDUSD', 'BUSD', 'BTC', 'ETH', 'BNB')
+
+NEW = 'NEW'
+PARTIALLY_FILLED = 'PARTIALLY_FILLED'
+FILLED = 'FILLED'
+CANCELED = 'CANCELED'
+EXPIRED = 'EXPIRED'
+
+def split_symbol(symbol: str) -> Tuple[str, str]:
+    """('BTC', 'USDT') for 'BTCUSDT'."""
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    raise SimulationError(f"Unknown quote asset in {symbol}")
+
+class SimulationError(Exception):
+    """An order the simulated exchange rejects."""
+
+@dataclass(frozen=True)
+class FeeSchedule:
+    maker_rate: float = PAPER_MAKER_FEE_RATE
+    taker_rate: float = PAPER_TAKER_FEE_RATE
+
+    def fee(self, notional: float, maker: bool) -> float:
+        return notional * (self.maker_rate if maker else self.taker_rate)
+
+@dataclass(frozen=True)
+class DepthModel:
+    """Synthetic depth on each side of the last price."""
+    spread_bps: float = PAPER_SPREAD_BPS
+    level_bps: float = PAPER_LEVEL_BPS
+    level_notional: float = PAPER_LEVEL_NOTIONAL_USDT
+    levels: int = PAPER_DEPTH_LEVELS
+
+    def sweep(self, side: str, quantity: float, reference_price: float,
+              limit_price: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        (price, quantity) fills for a taker order of `quantity`, best level
+        first, stopping at `limit_price` or when the depth runs out.
+        """
+        direction = 1.0 if side == 'BUY' else -1.0
+        offsets_bps = self.spread_bps / 2 + self.level_bps * np.arange(self.levels)
+        prices = reference_price * (1 + direction * offsets_bps / 10_000)
+        if limit_price is not None:
+            prices = prices[prices <= limit_price] if side == 'BUY' else prices[prices >= limit_price]
+        sizes = self.level_notional / prices
+        # Levels fully taken, then the one the order ends in
+        filled = np.minimum(np.cumsum(sizes), quantity)
+        sizes = np.diff(filled, prepend=0.0)
+        return [(float(price), float(size)) for price, size in zip(prices, sizes) if size > 0]
+
+@dataclass(eq=False)
+class SimOrder:
+    order_id: int
+    symbol: str
+    side: str
+    order_type: str
+    quantity: float
+    price: Optional[float]
+    account: Optional[str]
+    time_ms: int
+    executed: float = 0.0
+    quote: float = 0.0
+    commission: float = 0.0
+    status: str = NEW
+    # Quote (BUY) or base (SELL) still locked for the unfilled part
+    locked: float = 0.0
+    fills: List[dict] = field(default_factory=list)
+
+    @property
+    def remaining(self) -> float:
+        return self.quantity - self.executed
+
+    @property
+    def average_price(self) -> float:
+        return self.quote / self.executed if self.executed else 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in (NEW, PARTIALLY_FILLED)
+
+    def to_binance(self) -> dict:
+        """The order as Binance's order endpoints return it."""
+        return {
+            'symbol': self.symbol,
+            'orderId': self.order_id,
+            'orderListId': -1,
+            'clientOrderId': f"paper{self.order_id}",
+            'transactTime': self.time_ms,
+            'price': f"{self.price or 0.0:.8f}",
+            'origQty': f"{self.quantity:.8f}",
+            'executedQty': f"{self.executed:.8f}",
+            'cummulativeQuoteQty': f"{self.quote:.8f}",
+            'status': self.status,
+            'timeInForce': 'GTC',
+            'type': self.order_type,
+            'side': self.side,
+            'fills': list(self.fills)
+        }
+
+class OrderBook:
+    """
+    One symbol's resting limit orders: a FIFO per price level, with a heap
+    of level prices per side (bids negated) to find the best level.
+    Emptied levels are dropped from the dict and skipped lazily in the heap.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_price: Optional[float] = None
+        self._levels: Dict[str, Dict[float, Deque[SimOrder]]] = {'BUY': {}, 'SELL': {}}
+        self._heaps: Dict[str, List[float]] = {'BUY': [], 'SELL': []}
+
+    def __len__(self) -> int:
+        return sum(len(level) for levels in self._levels.values() for level in levels.values())
+
+    def add(self, order: SimOrder):
+        levels = self._levels[order.side]
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = deque()
+            heapq.heappush(self._heaps[order.side], -order.price if order.side == 'BUY' else order.price)
+        level.append(order)
+
+    def remove(self, order: SimOrder):
+        levels = self._levels[order.side]
+        level = levels.get(order.price)
+        if level is not None and order in level:
+            level.remove(order)
+            if not level:
+                del levels[order.price]
+
+    def best(self, side: str) -> Optional[float]:
+        heap, levels = self._heaps[side], self._levels[side]
+        while heap:
+            price = -heap[0] if side == 'BUY' else heap[0]
+            if price in levels:
+                return price
+            heapq.heappop(heap)
+        return None
+
+    def crossed(self, low: float, high: float, available: float) -> List[Tuple[SimOrder, float]]:
+        """
+        Take resting orders a tick trading between `low` and `high` fills,
+        best price first and FIFO within a level, up to `available` base
+        quantity per side. Returns (order, fill quantity); fully filled orders leave
+        the book.
+        """
+        fills = []
+        for side in ('BUY', 'SELL'):
+            levels = self._levels[side]
+            left = available
+            while left > 0:
+                price = self.best(side)
+                if price is None or (price < low if side == 'BUY' else price > high):
+                    break
+                level = levels[price]
+                while level and left > 0:
+                    order = level[0]
+                    quantity = min(order.remaining, left)
+                    left -= quantity
+                    fills.append((order, quantity))
+                    if quantity >= order.remaining:
+                        level.popleft()
+                if not level:
+                    del levels[price]
+        return fills
+
+class MatchingEngine:
+    """
+    Books, accounts and orders of the simulated exchange. Thread-safe; all
+    methods complete synchronously.
+    """
+
+    def __init__(self, fees: Optional[FeeSchedule] = None, depth: Optional[DepthModel] = None,
+                 participation_rate: float = PAPER_PARTICIPATION_RATE,
+                 clock: Callable[[], float] = time.time,
+                 max_finished_orders: int = PAPER_MAX_FINISHED_ORDERS):
+        self.fees = fees or FeeSchedule()
+        self.depth = depth or DepthModel()
+        self.participation_rate = participation_rate
+        self.clock = clock
+        self.max_finished_orders = max_finished_orders
+        self.books: Dict[str, OrderBook] = {}
+        # Open orders, plus the most recent finished ones (oldest first in _finished)
+        self.orders: Dict[int, SimOrder] = {}
+        self._finished: Deque[int] = deque()
+        # account -> asset -> [free, locked]
+        self.accounts: Dict[str, Dict[str, List[float]]] = {}
+        self._quote_only = set()
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self.orders_filled = 0
+        self.orders_rejected = 0
+
+    # Accounts
+
+    def open_account(self, account: str, balances: Optional[Dict[str, float]] = None,
+                     quote_only: bool = False):
+        """
+        Create (or reset) an account. A quote-only account does not hold
+        base assets: sells are not checked against a base balance.
+        """
+        with self._lock:
+            self.accounts[account] = {asset: [float(amount), 0.0] for asset, amount in (balances or {}).items()}
+            if quote_only:
+                self._quote_only.add(account)
+            else:
+                self._quote_only.discard(account)
+
+    def set_free(self, account: str, asset: str, amount: float):
+        with self._lock:
+            self._asset(account, asset)[0] = float(amount)
+
+    def free(self, account: str, asset: str) -> float:
+        with self._lock:
+            return self._asset(account, asset)[0]
+
+    def balances(self, account: str) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                asset: {'free': free, 'locked': locked, 'total': free + locked}
+                for asset, (free, locked) in self.accounts.get(account, {}).items()
+                if free or locked
+            }
+
+    def _asset(self, account: str, asset: str) -> List[float]:
+        if account not in self.accounts:
+            raise SimulationError(f"Unknown account {account}")
+        return self.accounts[account].setdefault(asset, [0.0, 0.0])
+
+    # Market data
+
+    def book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def update_price(self, symbol: str, price: float, volume: Optional[float] = None) -> List[SimOrder]:
+        """A trade at `price`: matches resting orders it crosses. Returns the orders filled into."""
+        return self.update_candle(symbol, price, price, price, volume)
+
+    def update_candle(self, symbol: str, high: float, low: float, close: float,
+                      volume: Optional[float] = None) -> List[SimOrder]:
+        """
+        Trading between `low` and `high`, ending at `close`. With a volume,
+        resting orders fill against at most participation_rate of it.
+        """
+        with self._lock:
+            book = self.book(symbol)
+            book.last_price = close
+            available = math.inf if volume is None else volume * self.participation_rate
+            touched = []
+            for order, quantity in book.crossed(low, high, available):
+                self._fill(order, order.price, quantity, maker=True)
+                touched.append(order)
+            return touched
+
+    # Orders
+
+    def place_order(self, symbol: str, side: str, order_type: str, quantity: float,
+                    price: Optional[float] = None, account: Optional[str] = None) -> SimOrder:
+        """
+        A MARKET order fills now against the depth model (the rest EXPIRES
+        if the depth runs out). A LIMIT order takes what crosses and rests
+        with the remainder. Without an account no balances are checked,
+        e.g. in backtests. Raises SimulationError on rejection.
+        """
+        with self._lock:
+            if side not in ('BUY', 'SELL') or order_type not in ('MARKET', 'LIMIT'):
+                raise SimulationError(f"Unsupported order {order_type} {side}")
+            if not quantity or quantity <= 0:
+                raise SimulationError("Quantity must be positive")
+            if order_type == 'LIMIT' and (price is None or price <= 0):
+                raise SimulationError("Limit orders need a positive price")
+            book = self.book(symbol)
+            if order_type == 'MARKET' and book.last_price is None:
+                raise SimulationError(f"No price for {symbol}")
+
+            taker = []
+            if book.last_price is not None:
+                taker = self.depth.sweep(side, quantity, book.last_price, price if order_type == 'LIMIT' else None)
+            taker_quantity = sum(size for _, size in taker)
+            resting_quantity = quantity - taker_quantity if order_type == 'LIMIT' else 0.0
+            if account is not None:
+                self._check_funds(account, symbol, side, taker, resting_quantity, price)
+
+            order = SimOrder(next(self._order_ids), symbol, side, order_type, quantity,
+                             price if order_type == 'LIMIT' else None, account, int(self.clock() * 1000))
+            self.orders[order.order_id] = order
+            for fill_price, size in taker:
+                self._fill(order, fill_price, size, maker=False)
+            if order_type == 'MARKET':
+                if order.remaining > 1e-12:
+                    order.status = EXPIRED
+                    self._finish(order)
+                    logger.info(f"Simulated {side} {symbol} filled {order.executed:.8f} of {quantity:.8f}: depth exhausted")
+            elif order.remaining > 1e-12:
+                if account is not None:
+                    self._lock_funds(order)
+                book.add(order)
+            return order
+
+    def cancel_order(self, order_id: int, account: Optional[str] = None,
+                     symbol: Optional[str] = None) -> SimOrder:
+        with self._lock:
+            order = self.get_order(order_id, account, symbol)
+            if not order.is_open:
+                raise SimulationError(f"Order {order_id} is {order.status}")
+            self.book(order.symbol).remove(order)
+            if order.account is not None and order.locked:
+                asset = self._locked_asset(order)
+                balance = self._asset(order.account, asset)
+                balance[1] -= order.locked
+                balance[0] += order.locked
+                order.locked = 0.0
+            order.status = CANCELED
+            self._finish(order)
+            return order
+
+    def get_order(self, order_id: int, account: Optional[str] = None,
+                  symbol: Optional[str] = None) -> SimOrder:
+        order = self.orders.get(order_id)
+        if order is None or (account is not None and order.account != account) or \
+                (symbol is not None and order.symbol != symbol):
+            raise SimulationError(f"Order {order_id} does not exist")
+        return order
+
+    def _finish(self, order: SimOrder):
+        """Record a filled, canceled or expired order; forget the oldest past the cap."""
+        self._finished.append(order.order_id)
+        while len(self._finished) > self.max_finished_orders:
+            self.orders.pop(self._finished.popleft(), None)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[SimOrder]:
+        with self._lock:
+            return [order for order in self.orders.values()
+                    if order.is_open and (symbol is None or order.symbol == symbol)]
+
+    def _check_funds(self, account: str, symbol: str, side: str, taker: List[Tuple[float, float]],
+                     resting_quantity: float, price: Optional[float]):
+        base, quote = split_symbol(symbol)
+        notional = sum(fill_price * size for fill_price, size in taker)
+        if side == 'BUY':
+            needed = notional + self.fees.fee(notional, maker=False)
+            if resting_quantity > 0:
+                needed += resting_quantity * price * (1 + self.fees.maker_rate)
+            asset, have = quote, self._asset(account, quote)[0]
+        else:
+            if account in self._quote_only:
+                return
+            needed = sum(size for _, size in taker) + resting_quantity
+            asset, have = base, self._asset(account, base)[0]
+        if have < needed - 1e-9:
+            self.orders_rejected += 1
+            raise SimulationError(f"Insufficient {asset} balance: {have:.8f} < {needed:.8f}")
+
+    def _locked_asset(self, order: SimOrder) -> str:
+        base, quote = split_symbol(order.symbol)
+        return quote if order.side == 'BUY' else base
+
+    def _lock_funds(self, order: SimOrder):
+        if order.side == 'SELL' and order.account in self._quote_only:
+            return
+        if order.side == 'BUY':
+            amount = order.remaining * order.price * (1 + self.fees.maker_rate)
+        else:
+            amount = order.remaining
+        balance = self._asset(order.account, self._locked_asset(order))
+        balance[0] -= amount
+        balance[1] += amount
+        order.locked = amount
+
+    def _fill(self, order: SimOrder, price: float, quantity: float, maker: bool):
+        notional = price * quantity
+        fee = self.fees.fee(notional, maker)
+        order.executed += quantity
+        order.quote += notional
+        order.commission += fee
+        order.fills.append({
+            'price': f"{price:.8f}", 'qty': f"{quantity:.8f}", 'commission': f"{fee:.8f}",
+            'commissionAsset': split_symbol(order.symbol)[1], 'tradeId': order.order_id
+        })
+        order.status = FILLED if order.remaining <= 1e-12 else PARTIALLY_FILLED
+        if order.status == FILLED:
+            self.orders_filled += 1
+            self._finish(order)
+        if order.account is not None:
+            self._settle(order, quantity, notional, fee, maker)
+
+    def _settle(self, order: SimOrder, quantity: float, notional: float, fee: float, maker: bool):
+        base, quote = split_symbol(order.symbol)
+        quote_balance = self._asset(order.account, quote)
+        quote_only = order.account in self._quote_only
+        if order.side == 'BUY':
+            if maker:
+                # Funds locked at the limit price (plus maker fee) pay for the fill
+                release = min(order.locked, notional + fee)
+                quote_balance[1] -= release
+                order.locked -= release
+                quote_balance[0] -= notional + fee - release
+            else:
+                quote_balance[0] -= notional + fee
+            if not quote_only:
+                self._asset(order.account, base)[0] += quantity
+        else:
+            if not quote_only:
+                base_balance = self._asset(order.account, base)
+                if maker:
+                    base_balance[1] -= quantity
+                    order.locked -= quantity
+                else:
+                    base_balance[0] -= quantity
+            quote_balance[0] += notional - fee
+        if order.status == FILLED and order.locked:
+            # A buy's maker-fee margin left over after the last fill
+            balance = self._asset(order.account, self._locked_asset(order))
+            balance[1] -= order.locked
+            balance[0] += order.locked
+            order.locked = 0.0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'symbols': len(self.books),
+                'accounts': len(self.accounts),
+                'orders': len(self.orders),
+                'resting_orders': sum(len(book) for book in self.books.values()),
+                'orders_filled': self.orders_filled,
+                'orders_rejected': self.orders_rejected
+            }
+
+def order_result(order: SimOrder) -> dict:
+    """A simulated order as the traders' place_*_order return it."""
+    return {
+        'success': True,
+        'order_id': order.order_id,
+        'price': order.average_price,
+        'quantity': order.executed,
+        'quote_quantity': order.quote,
+        'commission': order.commission,
+        'order': order.to_binance()
+    }
+
+# Shared by every paper trader in the process
+paper_exchange = MatchingEngine()
+
+class PaperAccountMixin:
+    """
+    Paper trading for BinanceTrader / AsyncBinanceTrader: the trader's
+    quote-only account on paper_exchange, keyed by its API key.
+    """
+
+    @property
+    def paper_account(self) -> str:
+        return f"paper:{self.api_key}"
+
+    @property
+    def paper_balance(self) -> Optional[float]:
+        """Free paper USDT; None until set from the database."""
+        if self.paper_account not in paper_exchange.accounts:
+            return None
+        return paper_exchange.free(self.paper_account, 'USDT')
+
+    @paper_balance.setter
+    def paper_balance(self, amount: Optional[float]):
+        if amount is None:
+            return
+        if self.paper_account not in paper_exchange.accounts:
+            paper_exchange.open_account(self.paper_account, quote_only=True)
+        paper_exchange.set_free(self.paper_account, 'USDT', amount)
+
+    def paper_balances(self) -> Dict[str, Dict[str, float]]:
+        if self.paper_balance is None:
+            return {'USDT': {'free': None, 'locked': 0.0, 'total': None}}
+        return paper_exchange.balances(self.paper_account) or {'USDT': {'free': 0.0, 'locked': 0.0, 'total': 0.0}}
+
+    def paper_order(self, symbol: str, side: str, order_type: str, quantity: float,
+                    current_price: Optional[float], price: Optional[float] = None) -> dict:
+        """Send a paper order at `current_price`; returns a place_*_order result."""
+        if not current_price:
+            return {'success': False, 'error': 'Could not get current price'}
+        if self.paper_balance is None:
+            self.paper_balance = PAPER_STARTING_BALANCE
+        try:
+            paper_exchange.update_price(symbol, current_price)
+            order = paper_exchange.place_order(symbol, side, order_type, quantity, price, self.paper_account)
+        except SimulationError as e:
+            logger.warning(f"PAPER TRADE: {order_type} {side} {symbol} rejected: {e}")
+            return {'success': False, 'error': str(e)}
+        if order_type == 'MARKET' and not order.executed:
+            return {'success': False, 'error': 'No liquidity: order expired unfilled'}
+        logger.info(f"PAPER TRADE: {order_type} {side} {order.executed} {symbol} @ {order.average_price} "
+                    f"({order.status}, fee {order.commission:.4f}). Balance: ${self.paper_balance:.2f}")
+        return order_result(order)
+
+    def paper_cancel(self, symbol: str, order_id: int, current_price: Optional[float]) -> dict:
+        if current_price:
+            paper_exchange.update_price(symbol, current_price)
+        try:
+            order = paper_exchange.cancel_order(order_id, self.paper_account, symbol)
+        except SimulationError as e:
+            logger.error(f"Cancel order failed: {e}")
+            return {'success': False, 'error': str(e)}
+        return {'success': True, 'result': order.to_binance()}
+
+    def paper_order_status(self, symbol: str, order_id: int, current_price: Optional[float]) -> Optional[dict]:
+        # Resting orders fill on the price the caller just read
+        if current_price:
+            paper_exchange.update_price(symbol, current_price)
+        try:
+            return paper_exchange.get_order(order_id, self.paper_account, symbol).to_binance()
+        except SimulationError as e:
+            logger.error(f"Get order failed: {e}")
+            return None
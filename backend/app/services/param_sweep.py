@@ -0,0 +1,241 @@
+"""
+Parallel parameter sweeps of a strategy's config_params over one candle
+history.
+
+Parameter combinations (a full grid or a random sample of it) are fanned
+out over a process pool. The candle arrays are copied once into a shared
+memory block that every worker maps at start-up, so tasks only carry the
+parameter dicts. Combinations are ordered by the strategy's indicator_key
+so a worker computes each indicator set once and reuses it for every
+threshold / exit combination that follows.
+
+stop_loss_percent and take_profit_percent are swept like config_params
+but go to run_backtest. Each strategy's PARAM_SPACE is its default
+space; MeanReversionStrategy's leaves out rsi_overbought, which only
+shapes SELL signals that backtests do not act on.
+
+    python -m app.services.param_sweep --symbol BTCUSDT --interval 1h [--random 200] [--workers 4]
+"""
+import argparse
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPACE = MeanReversionStrategy.PARAM_SPACE
+
+# Swept like strategy parameters but passed to run_backtest
+EXIT_PARAMS = ('stop_loss_percent', 'take_profit_percent')
+
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Indicator sets a worker keeps; tasks arrive sorted by indicator_key
+_INDICATOR_CACHE_SIZE = 4
+
+def grid_params(space: Dict[str, Sequence]) -> List[Dict]:
+    """Every combination of the values in `space`."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_params(space: Dict[str, Sequence], n: int, seed: Optional[int] = None) -> List[Dict]:
+    """`n` distinct combinations drawn uniformly from the grid of `space`."""
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = int(np.prod(sizes))
+    # Sample grid positions, not values, so no combination repeats
+    picks = random.Random(seed).sample(range(total), min(n, total))
+    combos = []
+    for pick in picks:
+        combo = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            pick, index = divmod(pick, size)
+            combo[name] = space[name][index]
+        combos.append({name: combo[name] for name in names})
+    return combos
+
+def build_strategy(strategy_class, params: Dict) -> Tuple[object, Dict]:
+    """The strategy for one combo (signals only, no forced test buy) and its run_backtest exit kwargs."""
+    config = {key: value for key, value in params.items() if key not in EXIT_PARAMS}
+    exits = {key: value for key, value in params.items() if key in EXIT_PARAMS}
+    return strategy_class({**config, 'force_test_buy': False}), exits
+
+class SharedArray:
+    """
+    A NumPy array in a shared memory block. The parent creates it; pool
+    workers attach by name and see the same memory.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, shape: tuple, dtype, owner: bool):
+        self.shm = shm
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape: tuple, dtype=np.float64) -> "SharedArray":
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), shape, dtype, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, shape: tuple, dtype=np.float64) -> "SharedArray":
+        # Pool workers share the parent's resource tracker, so the block is
+        # still unlinked exactly once, by the owner
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype, owner=False)
+
+    @property
+    def handle(self) -> tuple:
+        """What a worker needs to attach(): picklable, unlike the block."""
+        return self.shm.name, self.shape, self.dtype.str
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class SharedCandles(SharedArray):
+    """Candle columns as (columns x rows) float64."""
+    @classmethod
+    def from_frame(cls, candles: pd.DataFrame) -> "SharedCandles":
+        shared = cls.create((len(CANDLE_COLUMNS), len(candles)))
+        for row, column in enumerate(CANDLE_COLUMNS):
+            shared.array[row] = candles[column].to_numpy(dtype=np.float64)
+        return shared
+
+    def frame(self) -> pd.DataFrame:
+        """A DataFrame over the shared arrays (no copy)."""
+        return pd.DataFrame({column: self.array[row] for row, column in enumerate(CANDLE_COLUMNS)}, copy=False)
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+def _init_worker(handle: tuple, strategy_class, backtest_kwargs: Dict):
+    _set_worker(SharedCandles.attach(*handle), strategy_class, backtest_kwargs)
+
+def _set_worker(shared: SharedCandles, strategy_class, backtest_kwargs: Dict):
+    candles = shared.frame()
+    _worker.update(
+        shared=shared, candles=candles, close=candles['close'].to_numpy(),
+        volume=candles['volume'].to_numpy(), strategy_class=strategy_class,
+        backtest_kwargs=backtest_kwargs, indicators={}
+    )
+
+def _evaluate(params: Dict) -> Dict:
+    strategy, exits = build_strategy(_worker['strategy_class'], params)
+
+    cache = _worker['indicators']
+    key = getattr(strategy, 'indicator_key', None)
+    if key is not None and key in cache:
+        indicators = cache[key]
+    else:
+        indicators = strategy.backtest_indicators(_worker['close'], _worker['volume'])
+        if key is not None:
+            if len(cache) >= _INDICATOR_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[key] = indicators
+    signals = strategy.backtest_signals(_worker['close'], _worker['volume'], indicators=indicators)
+    result = run_backtest(strategy, _worker['candles'], signals=signals,
+                          **{**_worker['backtest_kwargs'], **exits})
+    return {**params, **result.stats}
+
+def _evaluate_chunk(chunk: List[Dict]) -> List[Dict]:
+    return [_evaluate(params) for params in chunk]
+
+def indicator_sort_key(strategy_class, params: Dict) -> tuple:
+    """Sort key that groups combos sharing an indicator set."""
+    key = getattr(build_strategy(strategy_class, params)[0], 'indicator_key', None)
+    return key if key is not None else ()
+
+def run_sweep(candles: pd.DataFrame, combos: Iterable[Dict], strategy_class=MeanReversionStrategy,
+              workers: Optional[int] = None, rank_by: str = 'sharpe', min_trades: int = 1,
+              chunks_per_worker: int = 4, **backtest_kwargs) -> pd.DataFrame:
+    """
+    Backtest every parameter dict in `combos` and return one row per combo
+    (parameters then run_backtest stats), best `rank_by` first. Combos with
+    fewer than `min_trades` trades rank after the rest. `backtest_kwargs`
+    go to run_backtest for every combo; `workers=1` runs in-process.
+    """
+    combos = sorted(combos, key=lambda params: indicator_sort_key(strategy_class, params))
+    workers = workers or os.cpu_count() or 1
+    if not combos:
+        return pd.DataFrame()
+
+    shared = SharedCandles.from_frame(candles)
+    try:
+        if workers == 1:
+            _set_worker(shared, strategy_class, backtest_kwargs)
+            try:
+                rows = _evaluate_chunk(combos)
+            finally:
+                _worker.clear()
+        else:
+            # Contiguous chunks keep combos with the same indicators together
+            size = max(1, -(-len(combos) // (workers * chunks_per_worker)))
+            chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.handle, strategy_class, backtest_kwargs)) as pool:
+                rows = [row for chunk in pool.map(_evaluate_chunk, chunks) for row in chunk]
+    finally:
+        shared.close()
+
+    table = pd.DataFrame(rows)
+    eligible = table['trades'] >= min_trades
+    order = np.lexsort((-table[rank_by].to_numpy(dtype=np.float64), ~eligible.to_numpy()))
+    table = table.iloc[order].reset_index(drop=True)
+    table.index = table.index + 1
+    table.index.name = 'rank'
+    return table
+
+def main():
+    from app.database import SessionLocal
+    from app.services.async_binance_client import BINANCE_PUBLIC_API_URL
+    from app.services.candle_store import CandleStore
+    from app.strategies.registry import strategy_class, strategy_names
+
+    parser = argparse.ArgumentParser(description="Sweep a strategy's parameters on stored candles")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--strategy", default="mean_reversion", choices=strategy_names())
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--venue", default=BINANCE_PUBLIC_API_URL, help="REST base URL the candles came from")
+    parser.add_argument("--limit", type=int, default=100_000, help="latest N stored candles")
+    parser.add_argument("--random", type=int, default=0, help="sample N combinations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="sharpe")
+    parser.add_argument("--min-trades", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--fee-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    db = SessionLocal()
+    try:
+        candles = CandleStore(db, args.venue).load(args.symbol, args.interval, args.limit)
+    finally:
+        db.close()
+    if candles.empty:
+        print(f"No stored {args.interval} candles for {args.symbol}")
+        return
+
+    cls = strategy_class(args.strategy)
+    space = cls.PARAM_SPACE
+    combos = random_params(space, args.random, args.seed) if args.random else grid_params(space)
+    table = run_sweep(candles, combos, strategy_class=cls, workers=args.workers, rank_by=args.rank_by,
+                      min_trades=args.min_trades, interval=args.interval, fee_rate=args.fee_rate)
+    columns = list(space) + ['trades', 'win_rate', 'total_return_percent', 'max_drawdown_percent', 'sharpe']
+    print(f"{len(combos)} combinations over {len(candles)} candles")
+    print(table[columns].head(args.top).to_string(float_format=lambda value: f"{value:.2f}"))
+
+if __name__ == "__main__":
+    main()
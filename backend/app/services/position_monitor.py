@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.database import SessionLocal
+from app.services.exit_evaluator import OpenPositions, STOP_LOSS_REASON, TAKE_PROFIT_REASON, close_trade
+from app.services.leader_lease import try_acquire_lease
+
+logger = logging.getLogger(__name__)
+
+POSITION_MONITOR_ENABLED = os.getenv("POSITION_MONITOR_ENABLED", "true").lower() == "true"
+# All-market mini ticker streams: one connection covers every symbol, so the
+# subscription doesn't change as positions open and close. Paper accounts
+# price on Binance US, live accounts on Binance.
+POSITION_MONITOR_WS_URL = os.getenv("POSITION_MONITOR_WS_URL", "wss://stream.binance.us:9443/ws/!miniTicker@arr")
+POSITION_MONITOR_LIVE_WS_URL = os.getenv(
+    "POSITION_MONITOR_LIVE_WS_URL", "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+)
+POSITION_MONITOR_REFRESH_SECONDS = float(os.getenv("POSITION_MONITOR_REFRESH_SECONDS", "10"))
+POSITION_MONITOR_LEASE = "position-monitor"
+
+@dataclass(frozen=True)
+class ExitLevels:
+    trade_id: int
+    symbol: str
+    stop_loss: float
+    take_profit: float
+
+class ExitIndex:
+    """
+    Open trades per symbol, kept in two sorted lists: stop-loss prices and
+    take-profit prices. A tick only touches the trades whose level it
+    crossed (bisect), not every open trade.
+    """
+
+    def __init__(self):
+        self._stops: Dict[str, List[Tuple[float, int]]] = {}
+        self._targets: Dict[str, List[Tuple[float, int]]] = {}
+        self._levels: Dict[int, ExitLevels] = {}
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __contains__(self, trade_id: int) -> bool:
+        return trade_id in self._levels
+
+    def symbols(self) -> Set[str]:
+        return {levels.symbol for levels in self._levels.values()}
+
+    def add(self, levels: ExitLevels):
+        if levels.trade_id in self._levels:
+            self.remove(levels.trade_id)
+        self._levels[levels.trade_id] = levels
+        insort(self._stops.setdefault(levels.symbol, []), (levels.stop_loss, levels.trade_id))
+        insort(self._targets.setdefault(levels.symbol, []), (levels.take_profit, levels.trade_id))
+
+    def remove(self, trade_id: int) -> Optional[ExitLevels]:
+        levels = self._levels.pop(trade_id, None)
+        if levels is None:
+            return None
+        for book, price in ((self._stops, levels.stop_loss), (self._targets, levels.take_profit)):
+            entries = book[levels.symbol]
+            del entries[bisect_left(entries, (price, trade_id))]
+            if not entries:
+                del book[levels.symbol]
+        return levels
+
+    def crossed(self, symbol: str, price: float) -> List[Tuple[ExitLevels, str]]:
+        """
+        Remove and return every trade on `symbol` whose stop-loss
+        (price <= stop) or take-profit (price >= target) is hit by `price`.
+        """
+        hits = []
+        stops = self._stops.get(symbol)
+        if stops:
+            # Stops at or above the price are hit; they sit at the end of the list
+            start = bisect_left(stops, (price, -1))
+            hits.extend((trade_id, STOP_LOSS_REASON) for _, trade_id in stops[start:])
+        targets = self._targets.get(symbol)
+        if targets:
+            end = bisect_right(targets, (price, float('inf')))
+            hits.extend((trade_id, TAKE_PROFIT_REASON) for _, trade_id in targets[:end])
+
+        result = []
+        for trade_id, reason in hits:
+            levels = self.remove(trade_id)
+            if levels is not None:
+                result.append((levels, reason))
+        return result
+
+class BinanceTickerStream:
+    """
+    Price source backed by the Binance websocket mini ticker stream.
+    Yields (symbol, last price) and reconnects with backoff when the
+    connection drops.
+    """
+
+    def __init__(self, url: str = POSITION_MONITOR_WS_URL, max_backoff: float = 60.0):
+        self.url = url
+        self.max_backoff = max_backoff
+
+    async def prices(self) -> AsyncIterator[Tuple[str, float]]:
+        import websockets
+
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    logger.info(f"Connected to price stream {self.url}")
+                    backoff = 1.0
+                    async for message in ws:
+                        payload = json.loads(message)
+                        # Combined streams wrap the payload in {"stream": ..., "data": ...}
+                        if isinstance(payload, dict) and 'data' in payload:
+                            payload = payload['data']
+                        for ticker in payload if isinstance(payload, list) else [payload]:
+                            yield ticker['s'], float(ticker['c'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Price stream error: {e} - reconnecting in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+class QueuePriceStream:
+    """In-process price source for tests and simulations: push ticks, the monitor consumes them."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def push(self, symbol: str, price: float):
+        self._queue.put_nowait((symbol, price))
+
+    def close(self):
+        self._queue.put_nowait(None)
+
+    async def prices(self) -> AsyncIterator[Tuple[str, float]]:
+        while True:
+            tick = await self._queue.get()
+            if tick is None:
+                return
+            yield tick
+
+class PositionMonitor:
+    """
+    Closes positions as soon as a tick crosses their stop-loss or
+    take-profit instead of waiting for the hourly cycle.
+
+    The index is rebuilt from the open trades every refresh interval, which
+    also picks up trades opened or closed elsewhere. With several replicas,
+    only the holder of the position-monitor lease sells. With `testnet`,
+    only trades of paper (True) or live (False) accounts are watched, so
+    each runs on its own venue's stream.
+    """
+
+    def __init__(self, stream=None, session_factory=SessionLocal,
+                 refresh_seconds: float = POSITION_MONITOR_REFRESH_SECONDS, use_lease: bool = True,
+                 testnet: Optional[bool] = None):
+        self.stream = stream or BinanceTickerStream()
+        self.testnet = testnet
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self.use_lease = use_lease
+        self.index = ExitIndex()
+        self.active = not use_lease
+        self.exits = 0
+        self._closing: Dict[int, asyncio.Task] = {}
+
+    def refresh(self):
+        """Reload open trades of active bots into a fresh index."""
+        db = self.session_factory()
+        try:
+            if self.use_lease:
+                self.active = try_acquire_lease(db, POSITION_MONITOR_LEASE)
+            positions = OpenPositions.load(db, self.testnet)
+        finally:
+            db.close()
+
+        index = ExitIndex()
+        for i, trade_id in enumerate(positions.trade_ids.tolist()):
+            if trade_id in self._closing:
+                continue
+            index.add(ExitLevels(
+                trade_id=trade_id,
+                symbol=positions.symbols[positions.symbol_idx[i]],
+                stop_loss=float(positions.stop[i]),
+                take_profit=float(positions.target[i])
+            ))
+        self.index = index
+
+    def on_price(self, symbol: str, price: float) -> List[asyncio.Task]:
+        """Handle one tick: start a close for every trade whose level it crossed."""
+        if not self.active:
+            return []
+        tasks = []
+        for levels, reason in self.index.crossed(symbol, price):
+            logger.info(f"{reason} for trade {levels.trade_id} ({symbol} @ {price})")
+            task = asyncio.create_task(self._close(levels.trade_id, price, reason))
+            self._closing[levels.trade_id] = task
+            task.add_done_callback(lambda _, trade_id=levels.trade_id: self._closing.pop(trade_id, None))
+            tasks.append(task)
+        return tasks
+
+    async def _close(self, trade_id: int, price: float, exit_reason: str):
+        if await close_trade(trade_id, price, exit_reason, self.session_factory):
+            self.exits += 1
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Error refreshing position monitor: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def run(self):
+        """Consume the price stream until it ends or the task is cancelled."""
+        refresher = asyncio.create_task(self._refresh_loop())
+        try:
+            async for symbol, price in self.stream.prices():
+                self.on_price(symbol, price)
+        finally:
+            refresher.cancel()
+            if self._closing:
+                await asyncio.gather(*self._closing.values(), return_exceptions=True)
+
+async def run_position_monitors():
+    """Paper and live positions, each watched on its own venue's ticker stream."""
+    await asyncio.gather(
+        PositionMonitor(BinanceTickerStream(POSITION_MONITOR_WS_URL), testnet=True).run(),
+        PositionMonitor(BinanceTickerStream(POSITION_MONITOR_LIVE_WS_URL), testnet=False).run()
+    )
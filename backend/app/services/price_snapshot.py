@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.services.async_binance_client import send_request
+
+logger = logging.getLogger(__name__)
+
+PRICE_SNAPSHOT_TTL_SECONDS = float(os.getenv("PRICE_SNAPSHOT_TTL_SECONDS", "5"))
+# Oldest snapshot get_price falls back to when a refresh fails
+PRICE_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("PRICE_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+
+class PriceSnapshot:
+    """
+    In-memory map of every symbol's last price on one Binance base URL,
+    pulled with one bulk /api/v3/ticker/price call and reused until the
+    TTL runs out.
+
+    Refreshes are single-flight: callers that arrive while a fetch is in
+    progress await the same upstream request.
+    """
+
+    def __init__(self, base_url: str, ttl_seconds: float = PRICE_SNAPSHOT_TTL_SECONDS,
+                 max_age_seconds: float = PRICE_SNAPSHOT_MAX_AGE_SECONDS):
+        self.base_url = base_url
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._prices: Dict[str, float] = {}
+        self._fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self.refreshes = 0
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful fetch; None before the first."""
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    def is_fresh(self) -> bool:
+        age = self.age()
+        return age is not None and age < self.ttl_seconds
+
+    async def get_prices(self) -> Dict[str, float]:
+        """All prices, refreshed first if the snapshot is stale."""
+        if self.is_fresh():
+            return self._prices
+        return await self.refresh()
+
+    async def get_price(self, symbol: str) -> Optional[float]:
+        """
+        Last price for one symbol. Falls back to the stale snapshot when
+        the refresh fails, as long as it is within max_age_seconds; None if
+        the symbol is unknown or the snapshot is too old.
+        """
+        try:
+            prices = await self.get_prices()
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            age = self.age()
+            if age is None or age > self.max_age_seconds:
+                logger.error(f"Error refreshing price snapshot from {self.base_url}: {e} - no recent prices")
+                return None
+            logger.error(f"Error refreshing price snapshot from {self.base_url}: {e} - using prices {age:.0f}s old")
+            prices = self._prices
+        return prices.get(symbol)
+
+    async def refresh(self) -> Dict[str, float]:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._fetch())
+        # shield: one caller being cancelled must not cancel the shared fetch
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> Dict[str, float]:
+        response = await send_request('GET', self.base_url, '/api/v3/ticker/price')
+        response.raise_for_status()
+        self._prices = {item['symbol']: float(item['price']) for item in response.json()}
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        logger.debug(f"Price snapshot refreshed: {len(self._prices)} symbols")
+        return self._prices
+
+_snapshots: Dict[str, PriceSnapshot] = {}
+
+def get_price_snapshot(base_url: str) -> PriceSnapshot:
+    """The price snapshot for one Binance base URL (see market_data_url)."""
+    snapshot = _snapshots.get(base_url)
+    if snapshot is None:
+        snapshot = _snapshots[base_url] = PriceSnapshot(base_url)
+    return snapshot
@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Binance allows 6000 weight/min per IP on api.binance.com and 1200 on
+# api.binance.us; the default is the lower one. The headroom keeps a margin
+# for requests we can't see (other processes on the same IP).
+REQUEST_WEIGHT_PER_MINUTE = int(os.getenv("BINANCE_REQUEST_WEIGHT_PER_MINUTE", "1200"))
+ORDERS_PER_10_SECONDS = int(os.getenv("BINANCE_ORDERS_PER_10_SECONDS", "50"))
+RATE_LIMIT_HEADROOM = float(os.getenv("BINANCE_RATE_LIMIT_HEADROOM", "0.9"))
+WAIT_SAMPLES = 1000
+
+class Priority(IntEnum):
+    """Lower runs first when callers are queued for request weight."""
+    EXIT = 0
+    ENTRY = 1
+    MARKET_DATA = 2
+    DASHBOARD = 3
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("binance_request_priority", default=Priority.MARKET_DATA)
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Queue the Binance requests made inside this block at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+def request_weight(method: str, path: str, params: Optional[dict] = None) -> int:
+    """Request weight of a Binance spot REST call (per the API docs)."""
+    params = params or {}
+    if path == '/api/v3/klines':
+        limit = int(params.get('limit', 500))
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+    if path == '/api/v3/ticker/price':
+        return 2 if 'symbol' in params else 4
+    if path == '/api/v3/account':
+        return 20
+    if path == '/api/v3/exchangeInfo':
+        return 20
+    if path == '/api/v3/order':
+        return 4 if method == 'GET' else 1
+    return 1
+
+class TokenBucket:
+    """Tokens refilled continuously up to `capacity` at `capacity / period` per second."""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        self.refill()
+        return max(amount - self.tokens, 0.0) / self.rate
+
+    def sync_used(self, used: float):
+        """Align with the server's count of what's already been spent this window."""
+        self.refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+
+class RateLimiter:
+    """
+    Request-weight budget for one Binance host, shared by every trader in
+    the process. Callers that can't be served right away wait in a
+    priority queue (exits before entries before dashboard refreshes); the
+    budget is corrected from the X-MBX-USED-WEIGHT-1M header of every
+    response and paused entirely after a 429/418.
+    """
+
+    def __init__(self, weight_per_minute: int = REQUEST_WEIGHT_PER_MINUTE,
+                 orders_per_10s: int = ORDERS_PER_10_SECONDS, headroom: float = RATE_LIMIT_HEADROOM):
+        self.weight = TokenBucket(weight_per_minute * headroom, 60.0)
+        self.orders_per_10s = orders_per_10s * headroom
+        # Order rate limits are per account (API key)
+        self.orders: Dict[str, TokenBucket] = {}
+        self.blocked_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.acquired = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.throttled = 0
+        self.used_weight = None
+
+    def _order_bucket(self, account: str) -> TokenBucket:
+        bucket = self.orders.get(account)
+        if bucket is None:
+            bucket = self.orders[account] = TokenBucket(self.orders_per_10s, 10.0)
+        return bucket
+
+    def _delay(self, weight: float, account: Optional[str]) -> float:
+        delay = max(self.blocked_until - time.monotonic(), 0.0, self.weight.seconds_until(weight))
+        if account is not None:
+            delay = max(delay, self._order_bucket(account).seconds_until(1))
+        return delay
+
+    def _take(self, weight: float, account: Optional[str]):
+        self.weight.tokens -= weight
+        if account is not None:
+            self._order_bucket(account).tokens -= 1
+        self.acquired += 1
+
+    async def acquire(self, weight: float, priority: Optional[Priority] = None,
+                      order_account: Optional[str] = None):
+        """
+        Wait until `weight` (and one order for `order_account`, if given)
+        fits in the budget. Higher-priority callers are served first.
+        """
+        # A single request heavier than the whole budget would never fit
+        weight = min(weight, self.weight.capacity)
+        if not self._waiters and self._delay(weight, order_account) == 0:
+            self._take(weight, order_account)
+            self._waits.append(0.0)
+            return
+
+        priority = current_priority() if priority is None else priority
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), weight, order_account, future))
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._serve())
+
+        started = time.monotonic()
+        await future
+        self._waits.append(time.monotonic() - started)
+
+    async def _serve(self):
+        """Hand out budget to queued callers in priority order."""
+        while self._waiters:
+            _, _, weight, account, future = self._waiters[0]
+            if future.done():
+                # Caller was cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay(weight, account)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiters)
+            self._take(weight, account)
+            future.set_result(None)
+
+    def observe(self, status_code: int, headers, order_account: Optional[str] = None):
+        """Update the budget from a response's rate-limit headers."""
+        for name, value in headers.items():
+            name = name.lower()
+            if name == 'x-mbx-used-weight-1m':
+                self.used_weight = int(value)
+                self.weight.sync_used(int(value))
+            elif name == 'x-mbx-order-count-10s' and order_account is not None:
+                self._order_bucket(order_account).sync_used(int(value))
+
+        if status_code in (418, 429):
+            retry_after = float(headers.get('Retry-After') or 60)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self.throttled += 1
+            logger.warning(f"Binance rate limit hit ({status_code}), pausing requests for {retry_after:.0f}s")
+
+    def stats(self) -> Dict:
+        waits = sorted(self._waits)
+        return {
+            'queue_depth': len(self._waiters),
+            'max_queue_depth': self.max_queue_depth,
+            'acquired': self.acquired,
+            'queued': self.queued,
+            'wait_p50_seconds': waits[len(waits) // 2] if waits else 0.0,
+            'wait_p99_seconds': waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+            'weight_available': round(self.weight.tokens, 1),
+            'used_weight_1m': self.used_weight,
+            'throttled': self.throttled,
+            'blocked_for_seconds': round(max(self.blocked_until - time.monotonic(), 0.0), 1)
+        }
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """The limiter for the host of `url` (Binance limits are per IP and host)."""
+    host = urlsplit(url).netloc or url
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = _limiters[host] = RateLimiter()
+    return limiter
+
+def rate_limit_stats() -> Dict[str, Dict]:
+    return {host: limiter.stats() for host, limiter in _limiters.items()}
@@ -0,0 +1,155 @@
+import logging
+import os
+import traceback
+from datetime import datetime
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.database import SessionLocal
+from app.models.models import TradingRun, TradingRunStatus
+from app.services.trading_engine import TradingEngine
+from app.services.exit_evaluator import EXIT_CHECK_SECONDS, check_exits
+from app.services.bot_scheduler import TRADING_SCHEDULE
+from app.services.leader_lease import (
+    TRADING_CYCLE_MODE, LEASE_HEARTBEAT_SECONDS, INSTANCE_ID,
+    current_cycle_key, renew_leader_lease, try_acquire_lease
+)
+
+logger = logging.getLogger(__name__)
+
+TRADING_RUN_POLL_SECONDS = float(os.getenv("TRADING_RUN_POLL_SECONDS", "5"))
+
+async def scheduled_trading_execution():
+    """
+    Scheduled task that runs every hour to execute trades.
+    """
+    logger.info("Starting scheduled trading execution")
+    db = SessionLocal()
+    try:
+        engine = TradingEngine(db)
+        if TRADING_CYCLE_MODE == 'claim':
+            # Every replica runs; bots are split by row-level claims
+            return await engine.execute_hourly_trading(cycle_key=current_cycle_key())
+        if not try_acquire_lease(db):
+            logger.info(f"{INSTANCE_ID} is not the leader - skipping this cycle")
+            return None
+        return await engine.execute_hourly_trading()
+    except Exception as e:
+        logger.error(f"Error in scheduled trading: {e}")
+    finally:
+        db.close()
+
+async def scheduled_exit_checks():
+    """
+    Close open trades past their stop-loss or take-profit.
+    """
+    try:
+        closed = await check_exits()
+        if closed:
+            logger.info(f"Exit checks closed {closed} trades")
+    except Exception as e:
+        logger.error(f"Error in exit checks: {e}")
+
+def _claim_pending_run(db):
+    """
+    Move the oldest pending run to RUNNING. The conditional UPDATE makes the
+    claim safe when several workers poll the same table.
+    """
+    run = db.query(TradingRun).filter(
+        TradingRun.status == TradingRunStatus.PENDING
+    ).order_by(TradingRun.created_at).first()
+    if not run:
+        return None
+
+    claimed = db.query(TradingRun).filter(
+        TradingRun.id == run.id,
+        TradingRun.status == TradingRunStatus.PENDING
+    ).update({
+        TradingRun.status: TradingRunStatus.RUNNING,
+        TradingRun.started_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        return None
+    db.refresh(run)
+    return run
+
+async def process_trading_runs(session_factory=SessionLocal):
+    """
+    Execute manually requested trading cycles (POST /api/trading/execute-now).
+
+    In leader mode only the trading-cycle lease holder takes runs, so a run
+    shares a process with the scheduled cycles and the engine skips bots
+    they are processing. In claim mode the run's bots are claimed under the
+    run's own cycle key.
+    """
+    db = session_factory()
+    try:
+        if TRADING_CYCLE_MODE != 'claim' and not try_acquire_lease(db):
+            return
+        while True:
+            run = _claim_pending_run(db)
+            if not run:
+                return
+            logger.info(f"Executing requested trading run {run.id}")
+            cycle_key = f"run-{run.id}" if TRADING_CYCLE_MODE == 'claim' else None
+            try:
+                engine = TradingEngine(db, session_factory)
+                stats = await engine.execute_hourly_trading(cycle_key=cycle_key)
+                run.status = TradingRunStatus.COMPLETED
+                run.stats = stats
+            except Exception as e:
+                logger.error(f"Error in trading run {run.id}: {e}")
+                logger.error(traceback.format_exc())
+                db.rollback()
+                run.status = TradingRunStatus.FAILED
+                run.error_message = str(e)
+            run.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+def create_scheduler() -> AsyncIOScheduler:
+    """
+    Scheduler with the hourly trading cycle, the leader lease heartbeat,
+    the exit checks and the requested-run poller.
+    """
+    scheduler = AsyncIOScheduler()
+
+    # Runs every hour at minute 0. With the per-bot schedule the bots are
+    # run by BotScheduler instead.
+    if TRADING_SCHEDULE == 'hourly':
+        scheduler.add_job(
+            scheduled_trading_execution,
+            CronTrigger(hour='*', minute='0'),
+            id='hourly_trading',
+            replace_existing=True
+        )
+    scheduler.add_job(
+        renew_leader_lease,
+        IntervalTrigger(seconds=LEASE_HEARTBEAT_SECONDS),
+        id='leader_lease',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    # Stop-loss / take-profit checks for every open trade between cycles
+    scheduler.add_job(
+        scheduled_exit_checks,
+        IntervalTrigger(seconds=EXIT_CHECK_SECONDS),
+        id='exit_checks',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        process_trading_runs,
+        IntervalTrigger(seconds=TRADING_RUN_POLL_SECONDS),
+        id='trading_runs',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    return scheduler
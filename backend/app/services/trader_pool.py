@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+from app.models.models import BinanceAccount
+from app.services.async_binance_client import AsyncBinanceTrader
+from app.services.matching_engine import PAPER_STARTING_BALANCE
+
+logger = logging.getLogger(__name__)
+
+TRADER_POOL_MAX_SIZE = int(os.getenv("TRADER_POOL_MAX_SIZE", "500"))
+TRADER_POOL_TTL_SECONDS = float(os.getenv("TRADER_POOL_TTL_SECONDS", "900"))
+
+def credentials_hash(api_key: str, api_secret: str, testnet: bool) -> str:
+    """Fingerprint of an account's credentials; secrets are never kept as keys."""
+    raw = f"{api_key}\0{api_secret}\0{bool(testnet)}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+class _PoolEntry:
+    __slots__ = ('credentials', 'trader', 'last_used')
+
+    def __init__(self, credentials: str, trader: AsyncBinanceTrader, last_used: float):
+        self.credentials = credentials
+        self.trader = trader
+        self.last_used = last_used
+
+class TraderPool:
+    """
+    Process-wide cache of traders keyed by BinanceAccount.id.
+
+    An entry is reused only while its credentials hash matches the account;
+    idle entries expire after the TTL and the least recently used entry is
+    evicted once the pool is full.
+    """
+
+    def __init__(self, max_size: int = TRADER_POOL_MAX_SIZE, ttl_seconds: float = TRADER_POOL_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, account: BinanceAccount) -> AsyncBinanceTrader:
+        """Return the pooled trader for an account, creating it on a miss."""
+        credentials = credentials_hash(account.api_key, account.api_secret, account.testnet)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(account.id)
+            if entry is not None and entry.credentials == credentials:
+                self.hits += 1
+                entry.last_used = now
+                self._entries.move_to_end(account.id)
+                self._sync_paper_balance(entry.trader, account)
+                return entry.trader
+
+            self.misses += 1
+            trader = AsyncBinanceTrader(
+                api_key=account.api_key,
+                api_secret=account.api_secret,
+                testnet=account.testnet
+            )
+            self._sync_paper_balance(trader, account)
+            self._entries[account.id] = _PoolEntry(credentials, trader, now)
+            self._entries.move_to_end(account.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return trader
+
+    @staticmethod
+    def _sync_paper_balance(trader: AsyncBinanceTrader, account: BinanceAccount):
+        # The database is the record of a paper account's USDT; the trading
+        # engine adjusts it after every fill
+        if account.testnet:
+            balance = account.balance_usdt
+            trader.paper_balance = PAPER_STARTING_BALANCE if balance is None else balance
+
+    def invalidate(self, account_id: int):
+        """Drop an account's trader, e.g. after its API keys change."""
+        with self._lock:
+            if self._entries.pop(account_id, None) is not None:
+                logger.info(f"Invalidated pooled trader for account {account_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
+
+    def _evict_expired(self, now: float):
+        # Entries are in LRU order, so expired ones sit at the front
+        while self._entries:
+            account_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= self.ttl_seconds:
+                break
+            del self._entries[account_id]
+            self.evictions += 1
+
+trader_pool = TraderPool()
+
+def get_trader(account: BinanceAccount) -> AsyncBinanceTrader:
+    """Shortcut for trader_pool.get()."""
+    return trader_pool.get(account)
@@ -1,106 +1,304 @@
+import asyncio
 import logging
+import math
+import os
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import List, Dict, Optional, Set
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, func, text
 import pandas as pd
 
+from app.database import SessionLocal
 from app.models.models import (
     BotConfig, Trade, BinanceAccount, BotStatus, 
     OrderSide, OrderStatus, TradingStrategy
 )
-from app.services.binance_client import BinanceTrader
-from app.strategies.mean_reversion import MeanReversionStrategy
+from app.services.async_binance_client import AsyncBinanceTrader, market_data_url
+from app.services.trader_pool import get_trader
+from app.services.matching_engine import PAPER_STARTING_BALANCE
+from app.services.price_snapshot import get_price_snapshot
+from app.services.market_data import MarketDataSnapshot, kline_key
+from app.services.candle_store import get_klines
+from app.services.leader_lease import claim_bots
+from app.services.bot_stats import hold_seconds, record_trade_close
+from app.services.rate_limiter import Priority, request_priority
+from app.strategies.registry import get_strategy
 
 logger = logging.getLogger(__name__)
 
+# Concurrent cycle settings. Each bot runs in its own DB session; the global
+# limit caps in-flight bots and the per-account limit keeps one Binance
+# account from hogging the exchange.
+CONCURRENT_EXECUTION = os.getenv("TRADING_CONCURRENT_EXECUTION", "true").lower() == "true"
+MAX_CONCURRENT_BOTS = int(os.getenv("TRADING_MAX_CONCURRENT_BOTS", "20"))
+MAX_CONCURRENT_BOTS_PER_ACCOUNT = int(os.getenv("TRADING_MAX_CONCURRENT_BOTS_PER_ACCOUNT", "3"))
+BOT_TIME_BUDGET_SECONDS = float(os.getenv("TRADING_BOT_TIME_BUDGET_SECONDS", "30"))
+
+# Bots some cycle in this process is processing right now. A cycle that
+# overlaps another (a requested run during the scheduled one) skips them
+# instead of acting on the same open trades twice.
+_bots_in_flight: Set[int] = set()
+
+def ensure_order_status_enum(bind):
+    """
+    Add CLOSING to an existing PostgreSQL orderstatus type (create_all does
+    not alter types). Other databases store the enum as VARCHAR.
+    """
+    if bind.dialect.name != 'postgresql':
+        return
+    # ADD VALUE can't run inside a transaction block before PostgreSQL 12
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ALTER TYPE orderstatus ADD VALUE IF NOT EXISTS '{OrderStatus.CLOSING.name}'"))
+
+def adjust_paper_balance(db: Session, account_id: int, amount: float, default_balance: float):
+    """
+    Add `amount` to an account's paper balance with one UPDATE, so bots
+    and manual trades sharing the account can't overwrite each other's
+    changes. The caller commits.
+    """
+    db.query(BinanceAccount).filter(
+        BinanceAccount.id == account_id
+    ).update({
+        BinanceAccount.balance_usdt: func.coalesce(BinanceAccount.balance_usdt, default_balance) + amount
+    }, synchronize_session=False)
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of floats (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
 class TradingEngine:
     """
     Core trading engine that executes trades based on bot configurations.
     Runs hourly to check signals and manage positions.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory=SessionLocal):
         self.db = db
+        self.session_factory = session_factory
     
     def get_strategy(self, strategy_type: TradingStrategy, config_params: dict):
-        """Get strategy instance based on type."""
-        if strategy_type == TradingStrategy.MEAN_REVERSION:
-            return MeanReversionStrategy(config_params)
-        # Add other strategies here
-        return None
+        """Shared strategy instance for a bot's type and config_params (see strategies.registry)."""
+        return get_strategy(strategy_type, config_params)
     
-    async def execute_hourly_trading(self):
+    async def execute_hourly_trading(self, cycle_key: Optional[str] = None):
         """
         Main execution method called every hour.
-        Processes all active bot configs.
+        Processes all active bot configs and returns the cycle stats.
+        With a cycle_key, bots are claimed in batches so several replicas
+        can split the same cycle.
         """
         logger.info("Starting hourly trading execution")
+        cycle_start = time.perf_counter()
+        latencies = []
         
-        active_bots = self.db.query(BotConfig).filter(
-            BotConfig.status == BotStatus.ACTIVE
-        ).all()
-        
-        logger.info(f"Found {len(active_bots)} active bots")
+        if cycle_key is None:
+            active_bots = self._load_active_bots()
+            logger.info(f"Found {len(active_bots)} active bots")
+            latencies = await self._run_bots(active_bots)
+        else:
+            while True:
+                bot_ids = claim_bots(self.db, cycle_key)
+                if not bot_ids:
+                    break
+                logger.info(f"Claimed {len(bot_ids)} bots for cycle {cycle_key}")
+                latencies.extend(await self._run_bots(self._load_active_bots(bot_ids)))
         
+        stats = self._cycle_stats(latencies, time.perf_counter() - cycle_start)
+        logger.info(
+            f"Hourly trading execution completed: {stats['bots']} bots in {stats['wall_clock_seconds']:.2f}s "
+            f"(p50={stats['p50_seconds']:.2f}s, p99={stats['p99_seconds']:.2f}s, "
+            f"over budget={stats['over_budget']})"
+        )
+        return stats
+    
+    async def execute_bots(self, bot_ids: List[int]) -> Dict:
+        """
+        Run the given bots now (those still active) and return the stats.
+        Used by the per-bot scheduler for bots whose candle just closed.
+        """
+        started = time.perf_counter()
+        latencies = await self._run_bots(self._load_active_bots(bot_ids))
+        return self._cycle_stats(latencies, time.perf_counter() - started)
+    
+    def _load_active_bots(self, bot_ids: Optional[List[int]] = None) -> List[BotConfig]:
+        """Active bots (all, or those in bot_ids) with their Binance accounts."""
+        query = self.db.query(BotConfig).options(
+            selectinload(BotConfig.binance_account)
+        ).filter(BotConfig.status == BotStatus.ACTIVE)
+        if bot_ids is not None:
+            query = query.filter(BotConfig.id.in_(bot_ids))
+        return query.all()
+    
+    def _load_open_trades(self, bot_ids: List[int]) -> Dict[int, Trade]:
+        """
+        Open trade (filled or closing, no exit yet) of each bot, in one
+        query. A closing trade still counts, so the bot doesn't enter again.
+        """
+        if not bot_ids:
+            return {}
+        open_trades = {}
+        for trade in self.db.query(Trade).filter(
+            and_(
+                Trade.bot_config_id.in_(bot_ids),
+                Trade.status.in_([OrderStatus.FILLED, OrderStatus.CLOSING]),
+                Trade.exit_price.is_(None)
+            )
+        ).order_by(Trade.id).all():
+            open_trades.setdefault(trade.bot_config_id, trade)
+        return open_trades
+    
+    async def _run_bots(self, bots: List[BotConfig]) -> List[float]:
+        """
+        Prefetch market data for a set of bots, then process them.
+        The bots (with their accounts) and their open trades are loaded up
+        front, so processing a bot issues no further SELECTs of its own.
+        Bots another cycle is already processing are skipped.
+        """
+        busy = [bot.id for bot in bots if bot.id in _bots_in_flight]
+        if busy:
+            logger.info(f"Skipping bots already being processed: {busy}")
+            bots = [bot for bot in bots if bot.id not in _bots_in_flight]
+        bot_ids = {bot.id for bot in bots}
+        _bots_in_flight.update(bot_ids)
+        try:
+            open_trades = self._load_open_trades([bot.id for bot in bots])
+            # Bots without an open position need klines for their entry signal;
+            # fetch each (venue, symbol, interval, limit) once for the whole set.
+            market_data = await MarketDataSnapshot.prefetch(
+                [bot for bot in bots if bot.id not in open_trades],
+                self.session_factory
+            )
+            
+            if CONCURRENT_EXECUTION:
+                return await self._run_concurrent(bots, open_trades, market_data)
+            return await self._run_sequential(bots, open_trades, market_data)
+        finally:
+            _bots_in_flight.difference_update(bot_ids)
+    
+    async def _run_sequential(self, active_bots: List[BotConfig], open_trades: Dict[int, Trade],
+                              market_data: Optional[MarketDataSnapshot] = None) -> List[float]:
+        """Process bots one after another, each in its own DB session."""
+        latencies = []
         for bot in active_bots:
+            started = time.perf_counter()
+            await self._process_bot_isolated(bot, open_trades.get(bot.id), market_data)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+    
+    async def _run_concurrent(self, active_bots: List[BotConfig], open_trades: Dict[int, Trade],
+                              market_data: Optional[MarketDataSnapshot] = None) -> List[float]:
+        """
+        Process bots concurrently, bounded by a global and a per-account limit.
+        """
+        global_limit = asyncio.Semaphore(MAX_CONCURRENT_BOTS)
+        account_limits: Dict[int, asyncio.Semaphore] = {}
+        
+        async def run(bot: BotConfig) -> float:
+            account_limit = account_limits.setdefault(
+                bot.binance_account_id, asyncio.Semaphore(MAX_CONCURRENT_BOTS_PER_ACCOUNT)
+            )
+            # Take the account slot first so a bot waiting on a busy account
+            # doesn't sit on one of the global slots.
+            async with account_limit:
+                async with global_limit:
+                    started = time.perf_counter()
+                    await self._process_bot_isolated(bot, open_trades.get(bot.id), market_data)
+                    return time.perf_counter() - started
+        
+        return await asyncio.gather(*[run(bot) for bot in active_bots])
+    
+    async def _process_bot_isolated(self, bot: BotConfig, open_trade: Optional[Trade],
+                                    market_data: Optional[MarketDataSnapshot] = None):
+        """
+        Process one bot in its own DB session so a failure only rolls back that bot.
+        The cycle's already-loaded rows are attached with merge(load=False)
+        instead of being queried again.
+        """
+        bot_id = bot.id
+        # The session only lives for this bot, so keep its rows loaded after
+        # commits rather than refreshing them
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            bot = db.merge(bot, load=False)
+            trades = {bot_id: db.merge(open_trade, load=False)} if open_trade else {}
             try:
-                await self.process_bot(bot)
+                await TradingEngine(db, self.session_factory).process_bot(bot, market_data, trades)
             except Exception as e:
-                logger.error(f"Error processing bot {bot.id}: {e}")
+                logger.error(f"Error processing bot {bot_id}: {e}")
+                db.rollback()
                 bot.status = BotStatus.ERROR
-                self.db.commit()
-        
-        logger.info("Hourly trading execution completed")
+                db.commit()
+        finally:
+            db.close()
+    
+    def _cycle_stats(self, latencies: List[float], wall_clock: float) -> Dict:
+        """Summarize a cycle: wall-clock time, per-bot latency percentiles and budget overruns."""
+        return {
+            'bots': len(latencies),
+            'concurrent': CONCURRENT_EXECUTION,
+            'wall_clock_seconds': wall_clock,
+            'p50_seconds': _percentile(latencies, 50),
+            'p99_seconds': _percentile(latencies, 99),
+            'over_budget': sum(1 for latency in latencies if latency > BOT_TIME_BUDGET_SECONDS),
+            'budget_seconds': BOT_TIME_BUDGET_SECONDS
+        }
     
-    async def process_bot(self, bot: BotConfig):
+    async def process_bot(self, bot: BotConfig, market_data: Optional[MarketDataSnapshot] = None,
+                          open_trades: Optional[Dict[int, Trade]] = None):
         """
         Process a single bot configuration.
+        `open_trades` is the cycle's open trade per bot id; when omitted the
+        bot's open trade is queried.
         """
         logger.info(f"Processing bot {bot.id} ({bot.name}) - {bot.symbol}")
         
-        binance_account = self.db.query(BinanceAccount).filter(
-            BinanceAccount.id == bot.binance_account_id
-        ).first()
+        binance_account = bot.binance_account
         
         if not binance_account or not binance_account.is_active:
             logger.warning(f"Binance account not active for bot {bot.id}")
             return
         
-        trader = BinanceTrader(
-            api_key=binance_account.api_key,
-            api_secret=binance_account.api_secret,
-            testnet=binance_account.testnet
-        )
+        trader = get_trader(binance_account)
         
         # Check for open positions first
-        open_trade = self.db.query(Trade).filter(
-            and_(
-                Trade.bot_config_id == bot.id,
-                Trade.status == OrderStatus.FILLED,
-                Trade.exit_price.is_(None)
-            )
-        ).first()
+        if open_trades is None:
+            open_trades = self._load_open_trades([bot.id])
+        open_trade = open_trades.get(bot.id)
         
         if open_trade:
             await self.manage_open_position(bot, trader, open_trade)
         else:
-            await self.check_entry_signal(bot, trader)
+            await self.check_entry_signal(bot, trader, market_data)
         
         bot.last_run = datetime.utcnow()
         self.db.commit()
     
-    async def check_entry_signal(self, bot: BotConfig, trader: BinanceTrader):
+    async def check_entry_signal(self, bot: BotConfig, trader: AsyncBinanceTrader,
+                                 market_data: Optional[MarketDataSnapshot] = None):
         """
         Check if there's an entry signal for the bot.
+        Uses the cycle's prefetched klines when available.
         """
         try:
+            key = kline_key(bot)
+            venue, symbol, interval, limit = key
+            df = market_data.get_klines(key) if market_data else None
+            
             # Fetch historical data
-            df = trader.get_historical_klines(
-                symbol=bot.symbol,
-                interval='1h',
-                limit=100
-            )
+            if df is None:
+                df = await get_klines(
+                    trader,
+                    symbol=symbol,
+                    interval=interval,
+                    limit=limit,
+                    session_factory=self.session_factory
+                )
             
             if df.empty:
                 logger.warning(f"No klines data for {bot.symbol}")
@@ -111,7 +309,7 @@ class TradingEngine:
             
             # Get strategy and generate signal
             strategy = self.get_strategy(bot.strategy, bot.config_params or {})
-            signal_data = strategy.generate_signal(df)
+            signal_data = strategy.generate_signal(df, strategy.indicator_state(venue, symbol, interval))
             
             logger.info(f"Signal for bot {bot.id}: {signal_data['signal']} - {signal_data['reason']}")
             
@@ -121,7 +319,7 @@ class TradingEngine:
         except Exception as e:
             logger.error(f"Error checking entry signal for bot {bot.id}: {e}")
     
-    async def execute_buy_order(self, bot: BotConfig, trader: BinanceTrader, signal_data: Dict):
+    async def execute_buy_order(self, bot: BotConfig, trader: AsyncBinanceTrader, signal_data: Dict):
         """
         Execute a buy order based on signal.
         """
@@ -132,11 +330,12 @@ class TradingEngine:
             logger.info(f"Executing BUY order for bot {bot.id}: {quantity} {bot.symbol} @ {current_price}")
             
             # Place market order
-            order_result = trader.place_market_order(
-                symbol=bot.symbol,
-                side='BUY',
-                quantity=quantity
-            )
+            with request_priority(Priority.ENTRY):
+                order_result = await trader.place_market_order(
+                    symbol=bot.symbol,
+                    side='BUY',
+                    quantity=quantity
+                )
             
             logger.info(f"Bot {bot.id} order result: {order_result}")
             
@@ -146,14 +345,11 @@ class TradingEngine:
                 filled_qty = order_result.get('quantity', quantity)
                 
                 # Update paper trading balance in database
-                binance_account = self.db.query(BinanceAccount).filter(
-                    BinanceAccount.id == bot.binance_account_id
-                ).first()
-                
-                if binance_account and binance_account.testnet:
-                    # Deduct trade amount from paper balance
-                    binance_account.balance_usdt = (binance_account.balance_usdt or 10000.0) - bot.trade_amount_usdt
-                    logger.info(f"Updated paper balance: ${binance_account.balance_usdt:.2f}")
+                if bot.binance_account and bot.binance_account.testnet:
+                    # Deduct what the fill cost, fee included, from paper balance
+                    cost = order_result.get('quote_quantity', bot.trade_amount_usdt) + order_result.get('commission', 0.0)
+                    self._adjust_paper_balance(bot, -cost, default_balance=PAPER_STARTING_BALANCE)
+                    logger.info(f"Updated paper balance: -${cost:.2f}")
                 
                 # Record trade
                 trade = Trade(
@@ -170,8 +366,6 @@ class TradingEngine:
                     strategy_signal=signal_data['reason']
                 )
                 self.db.add(trade)
-                
-                bot.total_trades += 1
                 self.db.commit()
                 
                 logger.info(f"BUY order executed successfully for bot {bot.id}")
@@ -182,12 +376,18 @@ class TradingEngine:
         except Exception as e:
             logger.error(f"Error executing buy order for bot {bot.id}: {e}", exc_info=True)
     
-    async def manage_open_position(self, bot: BotConfig, trader: BinanceTrader, trade: Trade):
+    def _adjust_paper_balance(self, bot: BotConfig, amount: float, default_balance: float):
+        adjust_paper_balance(self.db, bot.binance_account_id, amount, default_balance)
+    
+    async def manage_open_position(self, bot: BotConfig, trader: AsyncBinanceTrader, trade: Trade):
         """
         Manage an open position (check stop-loss, take-profit).
         """
         try:
-            current_price = trader.get_current_price(bot.symbol)
+            with request_priority(Priority.EXIT):
+                current_price = await get_price_snapshot(
+                    market_data_url(bot.binance_account.testnet)
+                ).get_price(bot.symbol)
             
             if not current_price:
                 logger.warning(f"Could not get current price for {bot.symbol}")
@@ -208,37 +408,110 @@ class TradingEngine:
         except Exception as e:
             logger.error(f"Error managing open position for bot {bot.id}: {e}")
     
-    async def execute_sell_order(self, bot: BotConfig, trader: BinanceTrader, 
+    def _claim_trade_for_close(self, trade: Trade) -> bool:
+        """
+        Move an open trade from FILLED to CLOSING with one conditional
+        UPDATE. Only one of the closers (the cycle, the exit checks and the
+        position monitor) wins, so a trade is sold once.
+        """
+        claimed = self.db.query(Trade).filter(
+            Trade.id == trade.id,
+            Trade.status == OrderStatus.FILLED,
+            Trade.exit_price.is_(None)
+        ).update({Trade.status: OrderStatus.CLOSING}, synchronize_session=False)
+        self.db.commit()
+        if claimed != 1:
+            return False
+        set_committed_value(trade, 'status', OrderStatus.CLOSING)
+        return True
+    
+    def _release_trade_claim(self, trade: Trade):
+        """Put a claimed trade back to FILLED after its exit order failed."""
+        self.db.query(Trade).filter(
+            Trade.id == trade.id,
+            Trade.status == OrderStatus.CLOSING
+        ).update({Trade.status: OrderStatus.FILLED}, synchronize_session=False)
+        self.db.commit()
+        set_committed_value(trade, 'status', OrderStatus.FILLED)
+    
+    def _split_unfilled(self, trade: Trade, filled_qty: float):
+        """
+        Shrink `trade` to the quantity that sold and add the unfilled
+        remainder as a new open trade with the same entry.
+        """
+        remaining = trade.quantity - filled_qty
+        share = remaining / trade.quantity
+        self.db.add(Trade(
+            user_id=trade.user_id,
+            bot_config_id=trade.bot_config_id,
+            symbol=trade.symbol,
+            side=trade.side,
+            entry_price=trade.entry_price,
+            quantity=remaining,
+            amount_usdt=(trade.amount_usdt or 0.0) * share,
+            status=OrderStatus.FILLED,
+            order_id=trade.order_id,
+            entry_time=trade.entry_time,
+            strategy_signal=trade.strategy_signal
+        ))
+        trade.amount_usdt = (trade.amount_usdt or 0.0) * (1 - share)
+        trade.quantity = filled_qty
+        logger.warning(f"Trade {trade.id}: SELL filled {filled_qty} of {filled_qty + remaining}, "
+                       f"{remaining} left open")
+    
+    async def execute_sell_order(self, bot: BotConfig, trader: AsyncBinanceTrader, 
                                  trade: Trade, current_price: float, exit_reason: str):
         """
         Execute a sell order to close position.
+        
+        Every exit goes through here. The trade is claimed (CLOSING) before
+        the order is placed, and released if the order fails, so concurrent
+        closers can't sell it twice.
         """
+        if not self._claim_trade_for_close(trade):
+            logger.info(f"Bot {bot.id}: trade {trade.id} is already closed or being closed")
+            return
         try:
             logger.info(f"Executing SELL order for bot {bot.id}: {trade.quantity} {bot.symbol} @ {current_price}")
             
-            order = trader.place_market_order(
-                symbol=bot.symbol,
-                side='SELL',
-                quantity=trade.quantity
-            )
+            # Exits go ahead of entries when request weight runs short
+            with request_priority(Priority.EXIT):
+                order = await trader.place_market_order(
+                    symbol=bot.symbol,
+                    side='SELL',
+                    quantity=trade.quantity
+                )
             
-            if order and order.get('status') == 'FILLED':
-                exit_price = float(order.get('fills', [{}])[0].get('price', current_price))
+            if order and order.get('success') and order.get('quantity') == 0:
+                order = {'success': False, 'error': 'Order expired unfilled'}
+            
+            if order and order.get('success'):
+                filled_qty = min(float(order.get('quantity', trade.quantity)), trade.quantity)
+                exit_price = float(order.get('price') or current_price)
+                exit_value = order.get('quote_quantity')
+                if exit_value is None:
+                    exit_value = exit_price * filled_qty
+                elif filled_qty:
+                    # Average over every fill, not the first fill's price
+                    exit_price = exit_value / filled_qty
+                commission = order.get('commission', 0.0)
                 
-                # Calculate P&L
-                profit_loss_usdt = (exit_price - trade.entry_price) * trade.quantity
-                profit_loss_percent = ((exit_price - trade.entry_price) / trade.entry_price) * 100
+                # A market order can expire part filled when the book runs
+                # dry: close what sold and leave the rest open as its own trade
+                status = (order.get('order') or {}).get('status')
+                if status in ('EXPIRED', 'PARTIALLY_FILLED') and filled_qty < trade.quantity:
+                    self._split_unfilled(trade, filled_qty)
                 
-                # Update paper trading balance in database
-                binance_account = self.db.query(BinanceAccount).filter(
-                    BinanceAccount.id == bot.binance_account_id
-                ).first()
+                # Calculate P&L, the exit fee included
+                entry_cost = trade.entry_price * filled_qty
+                profit_loss_usdt = exit_value - commission - entry_cost
+                profit_loss_percent = profit_loss_usdt / entry_cost * 100 if entry_cost else 0.0
                 
-                if binance_account and binance_account.testnet:
-                    # Add back the trade amount + profit/loss to paper balance
-                    exit_value = exit_price * trade.quantity
-                    binance_account.balance_usdt = (binance_account.balance_usdt or 0.0) + exit_value
-                    logger.info(f"Updated paper balance after SELL: ${binance_account.balance_usdt:.2f}")
+                # Update paper trading balance in database
+                if bot.binance_account and bot.binance_account.testnet:
+                    # Add back what the fill raised, less the fee, to paper balance
+                    self._adjust_paper_balance(bot, exit_value - commission, default_balance=0.0)
+                    logger.info(f"Updated paper balance after SELL: +${exit_value - commission:.2f}")
                 
                 # Update trade
                 trade.exit_price = exit_price
@@ -246,21 +519,20 @@ class TradingEngine:
                 trade.profit_loss_percent = profit_loss_percent
                 trade.exit_time = datetime.utcnow()
                 trade.exit_reason = exit_reason
+                trade.status = OrderStatus.FILLED
                 
-                # Update bot stats
-                bot.total_profit_usdt += profit_loss_usdt
-                if profit_loss_usdt > 0:
-                    wins = self.db.query(Trade).filter(
-                        and_(
-                            Trade.bot_config_id == bot.id,
-                            Trade.profit_loss_usdt > 0
-                        )
-                    ).count()
-                    bot.win_rate = (wins / bot.total_trades) * 100 if bot.total_trades > 0 else 0
+                # Update bot stats in the same transaction as the close
+                record_trade_close(self.db, bot, profit_loss_usdt, hold_seconds(trade))
                 
                 self.db.commit()
                 
                 logger.info(f"SELL order executed: P&L = ${profit_loss_usdt:.2f} ({profit_loss_percent:.2f}%)")
+            else:
+                error_msg = order.get('error', 'Unknown error') if order else 'No response from exchange'
+                logger.error(f"Bot {bot.id}: SELL order FAILED - {error_msg}")
+                self._release_trade_claim(trade)
         
         except Exception as e:
             logger.error(f"Error executing sell order for bot {bot.id}: {e}")
+            self.db.rollback()
+            self._release_trade_claim(trade)
@@ -0,0 +1,246 @@
+"""
+Walk-forward optimization: out-of-sample validation of parameter sweeps.
+
+The candle history is cut into rolling train / test windows. Each window
+picks the best parameter combination on its train span (as run_sweep
+ranks them) and backtests only that combination on the test span that
+follows. The test spans do not overlap, and their equity curves are
+stitched into one out-of-sample curve.
+
+Signals are computed once per combination over the full history, each
+indicator set once for all combinations that share it, into a shared
+memory matrix the windows slice. Rolling indicators only look back, so a
+slice equals what the live engine would have seen at that point, with
+warm-up taken from the candles before the window. Windows then run in
+parallel on a process pool. A position still open at the end of a window
+closes there (END_OF_DATA) and the next window starts flat.
+
+    python -m app.services.walk_forward --symbol BTCUSDT --interval 1h --train 2000 --test 500 [--anchored]
+"""
+import argparse
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import _stats, run_backtest
+from app.services.candle_store import INTERVAL_SECONDS
+from app.services.param_sweep import (
+    SharedArray, SharedCandles, build_strategy, grid_params, indicator_sort_key, random_params
+)
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WalkForwardResult:
+    windows: pd.DataFrame
+    trades: pd.DataFrame
+    equity: np.ndarray
+    timestamps: Optional[np.ndarray]
+    stats: Dict[str, float] = field(default_factory=dict)
+
+def make_windows(n: int, train_size: int, test_size: int, anchored: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    (train_start, test_start, test_end) candle indices. Test spans are
+    back to back; with `anchored` every train span starts at candle 0.
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train and test sizes must be positive")
+    windows = []
+    test_start = train_size
+    while test_start + test_size <= n:
+        windows.append((0 if anchored else test_start - train_size, test_start, test_start + test_size))
+        test_start += test_size
+    return windows
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+def _init_worker(candles_handle: tuple, signals_handle: tuple, combos: List[Dict], strategy_class,
+                 rank_by: str, min_trades: int, backtest_kwargs: Dict):
+    _set_worker(SharedCandles.attach(*candles_handle), SharedArray.attach(*signals_handle), combos,
+                strategy_class, rank_by, min_trades, backtest_kwargs)
+
+def _set_worker(candles: SharedCandles, signals: SharedArray, combos: List[Dict], strategy_class,
+                rank_by: str, min_trades: int, backtest_kwargs: Dict):
+    _worker.update(
+        candles=candles, signals=signals, frame=candles.frame(), combos=combos,
+        strategy_class=strategy_class, rank_by=rank_by, min_trades=min_trades,
+        backtest_kwargs=backtest_kwargs
+    )
+
+def _compute_signals(rows: List[int]) -> int:
+    """Full-history signals for combos sharing one indicator set."""
+    frame = _worker['frame']
+    close = frame['close'].to_numpy()
+    volume = frame['volume'].to_numpy()
+    indicators = None
+    for row in rows:
+        strategy, _ = build_strategy(_worker['strategy_class'], _worker['combos'][row])
+        if indicators is None:
+            indicators = strategy.backtest_indicators(close, volume)
+        _worker['signals'].array[row] = strategy.backtest_signals(close, volume, indicators=indicators)
+    return len(rows)
+
+def _backtest(row: int, start: int, end: int):
+    strategy, exits = build_strategy(_worker['strategy_class'], _worker['combos'][row])
+    return run_backtest(strategy, _worker['frame'].iloc[start:end],
+                        signals=_worker['signals'].array[row, start:end],
+                        **{**_worker['backtest_kwargs'], **exits})
+
+def _run_window(window: Tuple[int, int, int]) -> Dict:
+    train_start, test_start, test_end = window
+    rank_by = _worker['rank_by']
+    best_row, best_score, best_stats = None, None, None
+    for row in range(len(_worker['combos'])):
+        stats = _backtest(row, train_start, test_start).stats
+        # Same order as run_sweep: enough trades first, then the metric
+        score = (stats['trades'] >= _worker['min_trades'], stats[rank_by])
+        if best_score is None or score > best_score:
+            best_row, best_score, best_stats = row, score, stats
+    test = _backtest(best_row, test_start, test_end)
+    return {'window': window, 'params': _worker['combos'][best_row], 'train': best_stats,
+            'test': test.stats, 'trades': test.trades, 'equity': test.equity}
+
+def walk_forward(candles: pd.DataFrame, combos: Iterable[Dict], train_size: int, test_size: int,
+                 anchored: bool = False, strategy_class=MeanReversionStrategy, workers: Optional[int] = None,
+                 rank_by: str = 'sharpe', min_trades: int = 1, initial_balance: float = 10000.0,
+                 interval: str = '1h', **backtest_kwargs) -> WalkForwardResult:
+    """
+    Optimize `combos` on each train window and score the winner on the
+    next test window. `backtest_kwargs` go to run_backtest; `workers=1`
+    runs in-process.
+    """
+    windows = make_windows(len(candles), train_size, test_size, anchored)
+    if not windows:
+        raise ValueError(f"{len(candles)} candles do not fit one {train_size} + {test_size} window")
+    combos = sorted(combos, key=lambda params: indicator_sort_key(strategy_class, params))
+    if not combos:
+        raise ValueError("no parameter combinations")
+    workers = workers or os.cpu_count() or 1
+    backtest_kwargs = {**backtest_kwargs, 'initial_balance': initial_balance, 'interval': interval}
+    groups = [
+        [row for row, _ in group]
+        for _, group in itertools.groupby(enumerate(combos),
+                                          key=lambda item: indicator_sort_key(strategy_class, item[1]))
+    ]
+
+    shared_candles = SharedCandles.from_frame(candles)
+    signals = SharedArray.create((len(combos), len(candles)), np.int8)
+    try:
+        if workers == 1:
+            _set_worker(shared_candles, signals, combos, strategy_class, rank_by, min_trades, backtest_kwargs)
+            try:
+                for rows in groups:
+                    _compute_signals(rows)
+                results = [_run_window(window) for window in windows]
+            finally:
+                _worker.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared_candles.handle, signals.handle, combos, strategy_class,
+                                               rank_by, min_trades, backtest_kwargs)) as pool:
+                # Every signal row is written before any window reads it
+                list(pool.map(_compute_signals, groups))
+                results = list(pool.map(_run_window, windows))
+    finally:
+        signals.close()
+        shared_candles.close()
+
+    timestamps = candles['timestamp'].to_numpy() if 'timestamp' in candles else None
+    rows, trades, curves = [], [], []
+    offset = 0.0
+    for number, result in enumerate(results, start=1):
+        train_start, test_start, test_end = result['window']
+        window_trades = result['trades'].copy()
+        window_trades['window'] = number
+        for column in ('entry_index', 'exit_index'):
+            window_trades[column] += test_start
+        if timestamps is not None:
+            window_trades['entry_time'] = timestamps[window_trades['entry_index'].to_numpy()]
+            window_trades['exit_time'] = timestamps[window_trades['exit_index'].to_numpy()]
+        trades.append(window_trades)
+        # Fixed trade sizes: each window's curve only shifts by the P&L before it
+        curves.append(result['equity'] + offset)
+        offset += result['equity'][-1] - initial_balance
+        rows.append({
+            'window': number,
+            'train_start': train_start,
+            'test_start': test_start,
+            'test_end': test_end,
+            **result['params'],
+            f'train_{rank_by}': result['train'][rank_by],
+            'train_trades': result['train']['trades'],
+            f'test_{rank_by}': result['test'][rank_by],
+            'test_trades': result['test']['trades'],
+            'test_net_profit_usdt': result['test']['net_profit_usdt'],
+            'test_max_drawdown_percent': result['test']['max_drawdown_percent']
+        })
+
+    trades = pd.concat(trades, ignore_index=True)
+    equity = np.concatenate(curves)
+    first, last = windows[0][1], windows[-1][2]
+    periods_per_year = 365 * 86400 / INTERVAL_SECONDS.get(interval, 3600)
+    stats = _stats(trades, equity, initial_balance, periods_per_year)
+    stats['windows'] = len(windows)
+    return WalkForwardResult(
+        windows=pd.DataFrame(rows),
+        trades=trades,
+        equity=equity,
+        timestamps=timestamps[first:last] if timestamps is not None else None,
+        stats=stats
+    )
+
+def main():
+    from app.database import SessionLocal
+    from app.services.async_binance_client import BINANCE_PUBLIC_API_URL
+    from app.services.candle_store import CandleStore
+    from app.strategies.registry import strategy_class, strategy_names
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimize a strategy on stored candles")
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--strategy", default="mean_reversion", choices=strategy_names())
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--venue", default=BINANCE_PUBLIC_API_URL, help="REST base URL the candles came from")
+    parser.add_argument("--limit", type=int, default=100_000, help="latest N stored candles")
+    parser.add_argument("--train", type=int, required=True, help="train window in candles")
+    parser.add_argument("--test", type=int, required=True, help="test window in candles")
+    parser.add_argument("--anchored", action="store_true", help="train from the first candle every window")
+    parser.add_argument("--random", type=int, default=0, help="sample N combinations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="sharpe")
+    parser.add_argument("--min-trades", type=int, default=5)
+    parser.add_argument("--fee-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    db = SessionLocal()
+    try:
+        candles = CandleStore(db, args.venue).load(args.symbol, args.interval, args.limit)
+    finally:
+        db.close()
+    if candles.empty:
+        print(f"No stored {args.interval} candles for {args.symbol}")
+        return
+
+    cls = strategy_class(args.strategy)
+    space = cls.PARAM_SPACE
+    combos = random_params(space, args.random, args.seed) if args.random else grid_params(space)
+    result = walk_forward(candles, combos, args.train, args.test, anchored=args.anchored,
+                          strategy_class=cls, workers=args.workers,
+                          rank_by=args.rank_by, min_trades=args.min_trades, interval=args.interval,
+                          fee_rate=args.fee_rate)
+    print(result.windows.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    print("out of sample:")
+    for name, value in result.stats.items():
+        print(f"{name:>22}: {value:.4f}" if isinstance(value, float) else f"{name:>22}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Common vectorized interface of the trading strategies.
+
+A strategy computes its indicators for a batch of symbols at once
+(backtest_indicators over (n_symbols x n_candles) arrays) and turns them
+into a signal matrix: 1 = BUY, -1 = SELL, 0 = HOLD. The live engine
+reads the last column, the backtester the whole row. Exits are the bot's
+stop-loss / take-profit for every strategy.
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+class VectorizedStrategy:
+    """
+    Subclasses set PARAM_SPACE (for sweeps) and implement indicator_key,
+    min_candles, backtest_indicators, signal_matrix and describe.
+    """
+    PARAM_SPACE: Dict[str, list] = {}
+
+    def __init__(self, config: dict = None):
+        self.config = config or {}
+
+    @property
+    def indicator_key(self) -> tuple:
+        """
+        The parameters the indicators depend on: strategies with equal keys
+        can share one backtest_indicators() result.
+        """
+        raise NotImplementedError
+
+    @property
+    def min_candles(self) -> int:
+        raise NotImplementedError
+
+    def backtest_indicators(self, close, volume) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def signal_matrix(self, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        raise NotImplementedError
+
+    def describe(self, signal: int, latest: Dict[str, float]) -> str:
+        """The reason string for a signal on the latest candle."""
+        raise NotImplementedError
+
+    def indicator_state(self, venue: str, symbol: str, interval: str):
+        """No streaming state: generate_signal recomputes over the frame."""
+        return None
+
+    def backtest_signals(self, close, volume, indicators: Dict[str, np.ndarray] = None) -> np.ndarray:
+        """
+        signal_matrix() over one symbol's whole history (1-D close/volume),
+        as the backtester consumes it. Pass `indicators` from a strategy
+        with the same indicator_key to skip recomputing them.
+        """
+        if indicators is None:
+            indicators = self.backtest_indicators(close, volume)
+        return self.signal_matrix(indicators)[0]
+
+    def generate_signal(self, df: pd.DataFrame, indicator_state=None) -> dict:
+        """Signal dict ('BUY', 'SELL' or 'HOLD') for the latest candle of `df`."""
+        if df is None or len(df) < self.min_candles:
+            return {'signal': 'HOLD', 'reason': 'Insufficient data'}
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        return self.generate_signals_batch(['_'], close, volume)['_']
+
+    def generate_signals_batch(self, symbols: List[str], close, volume) -> Dict[str, dict]:
+        """
+        Signals for a whole batch of symbols in one vectorized pass.
+        close/volume are aligned (n_symbols x n_candles) arrays; the result
+        maps each symbol to the same dict generate_signal returns.
+        """
+        indicators = self.backtest_indicators(close, volume)
+        if indicators['close'].shape[1] < self.min_candles:
+            return {symbol: {'signal': 'HOLD', 'reason': 'Insufficient data'} for symbol in symbols}
+        signals = self.signal_matrix(indicators)[:, -1]
+        return {
+            symbol: self._signal_dict(int(signals[i]), {key: float(values[i, -1]) for key, values in indicators.items()})
+            for i, symbol in enumerate(symbols)
+        }
+
+    def _signal_dict(self, signal: int, latest: Dict[str, float]) -> dict:
+        indicators = {key: value for key, value in latest.items() if key not in ('close', 'volume')}
+        if signal == 1:
+            current_price = latest['close']
+            return {
+                'signal': 'BUY',
+                'reason': self.describe(signal, latest),
+                'entry_price': current_price,
+                'stop_loss': current_price * 0.97,
+                'take_profit': current_price * 1.05,
+                'indicators': indicators
+            }
+        if signal == -1:
+            return {'signal': 'SELL', 'reason': self.describe(signal, latest), 'indicators': indicators}
+        return {'signal': 'HOLD', 'reason': 'No clear signal', 'indicators': indicators}
+
+    def should_exit_position(self, entry_price: float, current_price: float, stop_loss: float, take_profit: float):
+        """
+        Check if should exit current position.
+        """
+        if current_price <= stop_loss:
+            return True, 'STOP_LOSS'
+        if current_price >= take_profit:
+            return True, 'TAKE_PROFIT'
+        return False, None
+
+def crossed_above(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """True where `a` moves from <= `b` on the previous candle to > `b` (an array or a level)."""
+    b = np.broadcast_to(b, a.shape)
+    out = np.zeros(a.shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        out[:, 1:] = (a[:, 1:] > b[:, 1:]) & (a[:, :-1] <= b[:, :-1])
+    return out
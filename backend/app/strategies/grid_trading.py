@@ -0,0 +1,65 @@
+from typing import Dict
+
+import numpy as np
+
+from app.strategies.base import VectorizedStrategy
+from app.strategies.indicators import _as_2d, sma
+
+class GridTradingStrategy(VectorizedStrategy):
+    """
+    Grid around a moving average.
+
+    Grid lines sit every grid_spacing_pct percent above and below the
+    grid_period SMA, grid_levels on each side.
+    Entry: the close falls through a grid line below the average.
+    Sell signal: the close rises through a grid line above the average.
+    Exits: the bot's stop loss / take profit (set take profit near the
+    grid spacing).
+    """
+    PARAM_SPACE = {
+        'grid_period': [20, 50, 100],
+        'grid_spacing_pct': [0.5, 1.0, 2.0],
+        'grid_levels': [3, 5, 10]
+    }
+
+    def __init__(self, config: dict = None):
+        super().__init__(config)
+        self.grid_period = self.config.get('grid_period', 50)
+        self.grid_spacing_pct = self.config.get('grid_spacing_pct', 1.0)
+        self.grid_levels = self.config.get('grid_levels', 5)
+
+    @property
+    def indicator_key(self) -> tuple:
+        return (self.grid_period,)
+
+    @property
+    def min_candles(self) -> int:
+        return self.grid_period + 1
+
+    def backtest_indicators(self, close, volume) -> Dict[str, np.ndarray]:
+        close = _as_2d(close)
+        center = sma(close, self.grid_period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset_pct = (close - center) / center * 100
+        return {'close': close, 'volume': _as_2d(volume), 'grid_center': center, 'offset_pct': offset_pct}
+
+    def signal_matrix(self, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        offset = indicators['offset_pct']
+        signals = np.zeros(offset.shape, dtype=np.int8)
+        # Grid band of each close: 0 just above the center, -1 just below.
+        # Band k > 0 starts at grid line k above; band -k-1 starts below grid
+        # line k below, so crossing the center alone (into -1) is no signal.
+        with np.errstate(invalid='ignore'):
+            band = np.floor(offset / self.grid_spacing_pct)
+            previous = np.full(band.shape, np.nan)
+            previous[:, 1:] = band[:, :-1]
+            down = (band < previous) & (band <= -2) & (band >= -self.grid_levels - 1)
+            up = (band > previous) & (band > 0) & (band <= self.grid_levels)
+        signals[up] = -1
+        signals[down] = 1
+        return signals
+
+    def describe(self, signal: int, latest: Dict[str, float]) -> str:
+        direction = "below" if signal == 1 else "above"
+        return (f"Crossed a grid line {abs(latest['offset_pct']):.2f}% {direction} "
+                f"SMA{self.grid_period} {latest['grid_center']:.2f}")
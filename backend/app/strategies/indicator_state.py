@@ -0,0 +1,154 @@
+import math
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+class _RollingMean:
+    """Fixed-window mean maintained with a running sum."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def push(self, value: float):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    def peek(self, value: float) -> float:
+        """Mean if `value` were pushed, without pushing it."""
+        if len(self.values) + 1 < self.window:
+            return math.nan
+        total = self.total + value
+        if len(self.values) == self.window:
+            total -= self.values[0]
+        return total / self.window
+
+class IndicatorState:
+    """
+    Streaming RSI / SMA / volume MA for one (symbol, interval, params).
+
+    Produces the same values as MeanReversionStrategy.calculate_indicators
+    (ta's Wilder RSI and rolling means) but costs O(1) per new candle.
+
+    Every candle except the latest one in a frame is committed to the
+    state; the latest is only peeked at, because it may still be open and
+    change before the next cycle.
+    """
+
+    def __init__(self, rsi_period: int = 14, ma_period: int = 20, long_ma_period: int = 50):
+        self.rsi_period = rsi_period
+        self.ma_period = ma_period
+        self.long_ma_period = long_ma_period
+        self.alpha = 1.0 / rsi_period
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.prev_close: Optional[float] = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+        self.ma = _RollingMean(self.ma_period)
+        self.long_ma = _RollingMean(self.long_ma_period)
+        self.volume_ma = _RollingMean(self.ma_period)
+        self.last_timestamp = None
+
+    def _next_averages(self, close: float) -> Tuple[float, float]:
+        # ta seeds the ewm with a zero move on the first candle
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        if self.count == 0:
+            return up, down
+        return (
+            (1 - self.alpha) * self.avg_up + self.alpha * up,
+            (1 - self.alpha) * self.avg_down + self.alpha * down
+        )
+
+    def _rsi(self, avg_up: float, avg_down: float, count: int) -> float:
+        if count < self.rsi_period:
+            return math.nan
+        if avg_down == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_up / avg_down)
+
+    def push(self, close: float, volume: float, timestamp=None):
+        """Commit a closed candle."""
+        self.avg_up, self.avg_down = self._next_averages(close)
+        self.count += 1
+        self.prev_close = close
+        self.ma.push(close)
+        self.long_ma.push(close)
+        self.volume_ma.push(volume)
+        self.last_timestamp = timestamp
+
+    def peek(self, close: float, volume: float) -> Dict[str, float]:
+        """Indicator values for a candle on top of the committed state."""
+        avg_up, avg_down = self._next_averages(close)
+        ma = self.ma.peek(close)
+        volume_ma = self.volume_ma.peek(volume)
+        return {
+            'close': close,
+            'volume': volume,
+            'rsi': self._rsi(avg_up, avg_down, self.count + 1),
+            'ma_20': ma,
+            'ma_50': self.long_ma.peek(close),
+            'volume_ma': volume_ma,
+            'price_to_ma_pct': (close - ma) / ma * 100 if ma else math.nan,
+            'volume_ratio': volume / volume_ma if volume_ma else math.nan
+        }
+
+    def sync(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Commit the candles of `df` that are new since the last call and
+        return the indicators for its latest candle. Reseeds from the frame
+        when it no longer overlaps the committed state.
+        """
+        timestamps = df['timestamp']
+        closes = df['close'].to_numpy(dtype=float)
+        volumes = df['volume'].to_numpy(dtype=float)
+        last = len(df) - 1
+
+        if self.last_timestamp is None:
+            start = 0
+        else:
+            matches = (timestamps == self.last_timestamp).to_numpy().nonzero()[0]
+            # No overlap, or the frame is older than the state: start over
+            if len(matches) == 0 or matches[-1] >= last:
+                self.reset()
+                start = 0
+            else:
+                start = matches[-1] + 1
+
+        for i in range(start, last):
+            self.push(closes[i], volumes[i], timestamps.iloc[i])
+
+        return self.peek(closes[last], volumes[last])
+
+INDICATOR_STATE_CACHE_SIZE = int(os.getenv("INDICATOR_STATE_CACHE_SIZE", "1024"))
+
+_states: "OrderedDict[tuple, IndicatorState]" = OrderedDict()
+_lock = threading.Lock()
+
+def get_indicator_state(venue: str, symbol: str, interval: str, rsi_period: int, ma_period: int,
+                        long_ma_period: int = 50) -> IndicatorState:
+    """
+    Process-wide indicator state for a (venue, symbol, interval, params)
+    key. `venue` is the klines' REST base URL (see market_data_url): the same
+    symbol trades at different prices on each venue. The least recently
+    used states are dropped past INDICATOR_STATE_CACHE_SIZE.
+    """
+    key = (venue, symbol, interval, rsi_period, ma_period, long_ma_period)
+    with _lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = IndicatorState(rsi_period, ma_period, long_ma_period)
+        _states.move_to_end(key)
+        while len(_states) > INDICATOR_STATE_CACHE_SIZE:
+            _states.popitem(last=False)
+    return state
@@ -0,0 +1,64 @@
+"""
+Vectorized indicators over aligned 2-D arrays.
+
+Every function takes arrays shaped (n_symbols, n_candles), oldest candle
+first, and returns arrays of the same shape with NaN where the window is
+not yet filled. Values match the ta library used by calculate_indicators.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+def _as_2d(values) -> np.ndarray:
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+def sma(values, window: int) -> np.ndarray:
+    """Simple moving average along the candle axis."""
+    values = _as_2d(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] < window:
+        return out
+    csum = np.cumsum(values, axis=1)
+    out[:, window - 1] = csum[:, window - 1]
+    out[:, window:] = csum[:, window:] - csum[:, :-window]
+    out[:, window - 1:] /= window
+    return out
+
+def rsi(close, window: int = 14) -> np.ndarray:
+    """Wilder RSI (ewm with alpha=1/window, adjust=False), same as ta's RSIIndicator."""
+    close = _as_2d(close)
+    diff = np.diff(close, axis=1, prepend=close[:, :1])
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    # pandas runs the recursive average per column in compiled code, so
+    # transpose to put symbols in columns
+    avg_up = pd.DataFrame(up.T).ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy().T
+    avg_down = pd.DataFrame(down.T).ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy().T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + avg_up / avg_down)
+    return np.where(avg_down == 0, 100.0, out)
+
+def compute_indicators(close, volume, rsi_period: int = 14, ma_period: int = 20,
+                       long_ma_period: int = 50) -> Dict[str, np.ndarray]:
+    """
+    All MeanReversionStrategy indicators for a batch of symbols in one pass.
+    Keys mirror the columns added by calculate_indicators.
+    """
+    close = _as_2d(close)
+    volume = _as_2d(volume)
+    ma = sma(close, ma_period)
+    volume_ma = sma(volume, ma_period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_to_ma_pct = (close - ma) / ma * 100
+        volume_ratio = volume / volume_ma
+    return {
+        'close': close,
+        'volume': volume,
+        'rsi': rsi(close, rsi_period),
+        'ma_20': ma,
+        'ma_50': sma(close, long_ma_period),
+        'volume_ma': volume_ma,
+        'price_to_ma_pct': price_to_ma_pct,
+        'volume_ratio': volume_ratio
+    }
@@ -4,10 +4,15 @@ from ta.momentum import RSIIndicator
 from ta.trend import SMAIndicator
 from ta.volume import VolumeWeightedAveragePrice
 import logging
+from typing import Dict, List
+
+from app.strategies.base import VectorizedStrategy
+from app.strategies.indicator_state import IndicatorState, get_indicator_state
+from app.strategies.indicators import compute_indicators
 
 logger = logging.getLogger(__name__)
 
-class MeanReversionStrategy:
+class MeanReversionStrategy(VectorizedStrategy):
     """
     Mean Reversion strategy with RSI and Volume confirmation.
     
@@ -21,15 +26,24 @@ class MeanReversionStrategy:
     - Take Profit: 5% above entry
     - Or when price returns to MA
     """
+    # rsi_overbought only shapes SELL signals, which backtests do not act on
+    PARAM_SPACE = {
+        'rsi_period': [7, 14, 21],
+        'ma_period': [10, 20, 50],
+        'rsi_oversold': [25, 30, 35, 45],
+        'price_deviation': [0.5, 1.0, 2.0],
+        'volume_multiplier': [0.8, 1.0, 1.5]
+    }
     
     def __init__(self, config: dict = None):
-        self.config = config or {}
+        super().__init__(config)
         self.rsi_period = self.config.get('rsi_period', 14)
         self.ma_period = self.config.get('ma_period', 20)
         self.rsi_oversold = self.config.get('rsi_oversold', 45)  # Relaxed for testing
         self.rsi_overbought = self.config.get('rsi_overbought', 70)
         self.price_deviation = self.config.get('price_deviation', 0.5)  # Relaxed for testing
         self.volume_multiplier = self.config.get('volume_multiplier', 0.8)  # Relaxed for testing
+        self.force_test_buy = self.config.get('force_test_buy', True)  # Remove after testing
     
     def calculate_indicators(self, df: pd.DataFrame):
         """
@@ -47,63 +61,134 @@ class MeanReversionStrategy:
         
         return df
     
-    def generate_signal(self, df: pd.DataFrame):
+    def indicator_state(self, venue: str, symbol: str, interval: str) -> IndicatorState:
+        """
+        Shared streaming indicator state for this strategy's parameters.
+        """
+        return get_indicator_state(venue, symbol, interval, self.rsi_period, self.ma_period)
+    
+    def generate_signal(self, df: pd.DataFrame, indicator_state: IndicatorState = None):
         """
         Generate trading signal: 'BUY', 'SELL', or 'HOLD'.
+        With an indicator_state only the candles new since the last call are
+        processed; otherwise indicators are recomputed over the whole frame.
         """
         if df is None or len(df) < self.ma_period:
             return {'signal': 'HOLD', 'reason': 'Insufficient data'}
         
-        df = self.calculate_indicators(df)
+        if indicator_state is not None:
+            latest = indicator_state.sync(df)
+        else:
+            latest = self.calculate_indicators(df).iloc[-1]
+        
+        logger.info(f"Strategy check: price={latest['close']:.2f}, RSI={latest['rsi']:.1f}, deviation={latest['price_to_ma_pct']:.2f}%, volume_ratio={latest['volume_ratio']:.2f}")
+        logger.info(f"BUY conditions: deviation < -{self.price_deviation} ({latest['price_to_ma_pct']:.2f} < -{self.price_deviation}), RSI < {self.rsi_oversold} ({latest['rsi']:.1f} < {self.rsi_oversold}), volume > {self.volume_multiplier} ({latest['volume_ratio']:.2f} > {self.volume_multiplier})")
         
-        latest = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else latest
+        return self._signal_from_latest(latest)
+    
+    def signal_matrix(self, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Signals for every candle of every symbol from compute_indicators()
+        output: 1 = BUY, -1 = SELL, 0 = HOLD (int8, same shape as close).
+        """
+        close = indicators['close']
+        rsi = indicators['rsi']
+        ma_20 = indicators['ma_20']
+        deviation = indicators['price_to_ma_pct']
+        volume_ratio = indicators['volume_ratio']
+        
+        signals = np.zeros(close.shape, dtype=np.int8)
+        with np.errstate(invalid='ignore'):
+            sell = (
+                (deviation > self.price_deviation) &
+                (rsi > self.rsi_overbought) &
+                (volume_ratio > self.volume_multiplier)
+            )
+            if self.force_test_buy:
+                buy = np.zeros(close.shape, dtype=bool)
+                buy[:, self.ma_period - 1:] = True
+            else:
+                buy = (
+                    (deviation < -self.price_deviation) &
+                    (rsi < self.rsi_oversold) &
+                    (volume_ratio > self.volume_multiplier) &
+                    (close < ma_20)
+                )
+        signals[sell] = -1
+        signals[buy] = 1
+        return signals
+    
+    @property
+    def indicator_key(self) -> tuple:
+        return (self.rsi_period, self.ma_period)
+    
+    @property
+    def min_candles(self) -> int:
+        return self.ma_period
+    
+    def backtest_indicators(self, close, volume) -> Dict[str, np.ndarray]:
+        return compute_indicators(close, volume, self.rsi_period, self.ma_period)
+    
+    def generate_signals_batch(self, symbols: List[str], close, volume) -> Dict[str, dict]:
+        """
+        Signals for a whole batch of symbols in one vectorized pass.
+        close/volume are aligned (n_symbols x n_candles) arrays; the result
+        maps each symbol to the same dict generate_signal returns.
+        """
+        indicators = compute_indicators(close, volume, self.rsi_period, self.ma_period)
+        n_candles = indicators['close'].shape[1]
+        if n_candles < self.ma_period:
+            return {symbol: {'signal': 'HOLD', 'reason': 'Insufficient data'} for symbol in symbols}
         
+        latest = {key: values[:, -1] for key, values in indicators.items()}
+        return {
+            symbol: self._signal_from_latest({key: values[i] for key, values in latest.items()})
+            for i, symbol in enumerate(symbols)
+        }
+    
+    def _signal_from_latest(self, latest):
+        """
+        Build the signal dict from the latest candle's indicator values.
+        """
         current_price = latest['close']
         rsi = latest['rsi']
         ma_20 = latest['ma_20']
         price_deviation_pct = latest['price_to_ma_pct']
         volume_ratio = latest['volume_ratio']
         
-        # TESTING MODE: Always generate BUY signal for first few tests
-        logger.info(f"Strategy check: price={current_price:.2f}, RSI={rsi:.1f}, deviation={price_deviation_pct:.2f}%, volume_ratio={volume_ratio:.2f}")
-        logger.info(f"BUY conditions: deviation < -{self.price_deviation} ({price_deviation_pct:.2f} < -{self.price_deviation}), RSI < {self.rsi_oversold} ({rsi:.1f} < {self.rsi_oversold}), volume > {self.volume_multiplier} ({volume_ratio:.2f} > {self.volume_multiplier})")
+        indicators = {
+            'rsi': rsi,
+            'ma_20': ma_20,
+            'price_deviation_pct': price_deviation_pct,
+            'volume_ratio': volume_ratio
+        }
         
-        # Force BUY signal for testing (remove this after testing)
-        return {
-            'signal': 'BUY',
-            'reason': f'FORCED TEST BUY - Price {current_price:.2f}, RSI {rsi:.1f}',
-            'entry_price': current_price,
-            'stop_loss': current_price * 0.97,
-            'take_profit': current_price * 1.05,
-            'indicators': {
-                'rsi': rsi,
-                'ma_20': ma_20,
-                'price_deviation_pct': price_deviation_pct,
-                'volume_ratio': volume_ratio
+        # TESTING MODE: Force BUY signal for testing (set force_test_buy=False to trade the real rules)
+        if self.force_test_buy:
+            return {
+                'signal': 'BUY',
+                'reason': f'FORCED TEST BUY - Price {current_price:.2f}, RSI {rsi:.1f}',
+                'entry_price': current_price,
+                'stop_loss': current_price * 0.97,
+                'take_profit': current_price * 1.05,
+                'indicators': indicators
             }
-        }
         
         # BUY Signal (Mean Reversion)
-        # if (
-        #     price_deviation_pct < -self.price_deviation and
-        #     rsi < self.rsi_oversold and
-        #     volume_ratio > self.volume_multiplier and
-        #     current_price < ma_20
-        # ):
-        #     return {
-        #         'signal': 'BUY',
-        #         'reason': f'Mean reversion buy: Price {price_deviation_pct:.2f}% below MA, RSI {rsi:.1f}',
-        #         'entry_price': current_price,
-        #         'stop_loss': current_price * 0.97,
-        #         'take_profit': current_price * 1.05,
-        #         'indicators': {
-        #             'rsi': rsi,
-        #             'ma_20': ma_20,
-        #             'price_deviation_pct': price_deviation_pct,
-        #             'volume_ratio': volume_ratio
-        #         }
-        #     }
+        if (
+            price_deviation_pct < -self.price_deviation and
+            rsi < self.rsi_oversold and
+            volume_ratio > self.volume_multiplier and
+            current_price < ma_20
+        ):
+            return {
+                'signal': 'BUY',
+                'reason': f'Mean reversion buy: Price {price_deviation_pct:.2f}% below MA, RSI {rsi:.1f}',
+                'entry_price': current_price,
+                'stop_loss': current_price * 0.97,
+                'take_profit': current_price * 1.05,
+                'indicators': indicators
+            }
         
         # SELL Signal (Overbought)
         if (
@@ -121,19 +206,4 @@ class MeanReversionStrategy:
                 }
             }
         
-        return {'signal': 'HOLD', 'reason': 'No clear signal', 'indicators': {
-            'rsi': rsi,
-            'ma_20': ma_20,
-            'price_deviation_pct': price_deviation_pct,
-            'volume_ratio': volume_ratio
-        }}
-    
-    def should_exit_position(self, entry_price: float, current_price: float, stop_loss: float, take_profit: float):
-        """
-        Check if should exit current position.
-        """
-        if current_price <= stop_loss:
-            return True, 'STOP_LOSS'
-        if current_price >= take_profit:
-            return True, 'TAKE_PROFIT'
-        return False, None
+        return {'signal': 'HOLD', 'reason': 'No clear signal', 'indicators': indicators}
@@ -0,0 +1,118 @@
+"""
+Strategy registry: TradingStrategy values to strategy classes.
+
+Classes are registered by "module:Class" path and imported on first use,
+so a process only loads the strategies its bots run. Instances are cached
+per (strategy, config_params hash) and shared by every bot with the same
+parameters; strategies keep no per-call state.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Union
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_CACHE_SIZE = int(os.getenv("STRATEGY_CACHE_SIZE", "1024"))
+
+_paths: Dict[str, str] = {
+    'mean_reversion': 'app.strategies.mean_reversion:MeanReversionStrategy',
+    'rsi_oversold': 'app.strategies.rsi_oversold:RSIOversoldStrategy',
+    'trend_following': 'app.strategies.trend_following:TrendFollowingStrategy',
+    'grid_trading': 'app.strategies.grid_trading:GridTradingStrategy',
+}
+_classes: Dict[str, type] = {}
+_instances: "OrderedDict[tuple, object]" = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+class UnknownStrategyError(ValueError):
+    pass
+
+def _name(strategy) -> str:
+    # TradingStrategy is a str enum; its members hash by name, not value
+    return getattr(strategy, 'value', strategy)
+
+def register_strategy(strategy, target: Union[str, type]):
+    """Map a strategy name to a class or a lazily imported "module:Class" path."""
+    name = _name(strategy)
+    with _lock:
+        _classes.pop(name, None)
+        for key in [key for key in _instances if key[0] == name]:
+            del _instances[key]
+        if isinstance(target, str):
+            _paths[name] = target
+        else:
+            _paths.pop(name, None)
+            _classes[name] = target
+
+def strategy_names():
+    return sorted(set(_paths) | set(_classes))
+
+def strategy_class(strategy) -> type:
+    """The class registered for `strategy`, importing its module on first use."""
+    name = _name(strategy)
+    cls = _classes.get(name)
+    if cls is not None:
+        return cls
+    path = _paths.get(name)
+    if path is None:
+        raise UnknownStrategyError(f"No strategy registered for {name!r}")
+    module_name, class_name = path.split(':')
+    cls = getattr(importlib.import_module(module_name), class_name)
+    _classes[name] = cls
+    logger.info(f"Loaded strategy {name} from {path}")
+    return cls
+
+def params_hash(config_params: dict) -> str:
+    """Stable hash of config_params, independent of key order."""
+    raw = json.dumps(config_params or {}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def get_strategy(strategy, config_params: dict = None):
+    """
+    The shared instance for (strategy, config_params), built on the first
+    request. Raises UnknownStrategyError for unregistered names.
+    """
+    global _hits, _misses
+    name = _name(strategy)
+    key = (name, params_hash(config_params))
+    with _lock:
+        instance = _instances.get(key)
+        if instance is not None:
+            _hits += 1
+            _instances.move_to_end(key)
+            return instance
+    cls = strategy_class(name)
+    # A copy, so later edits to the bot's dict can't change a shared instance
+    instance = cls(dict(config_params or {}))
+    with _lock:
+        _misses += 1
+        instance = _instances.setdefault(key, instance)
+        _instances.move_to_end(key)
+        while len(_instances) > STRATEGY_CACHE_SIZE:
+            _instances.popitem(last=False)
+    return instance
+
+def clear_strategy_cache():
+    global _hits, _misses
+    with _lock:
+        _instances.clear()
+        _hits = _misses = 0
+
+def strategy_cache_stats() -> Dict:
+    with _lock:
+        lookups = _hits + _misses
+        return {
+            'loaded': sorted(_classes),
+            'instances': len(_instances),
+            'max_size': STRATEGY_CACHE_SIZE,
+            'hits': _hits,
+            'misses': _misses,
+            'hit_rate': _hits / lookups if lookups else 0.0
+        }
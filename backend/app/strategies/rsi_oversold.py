@@ -0,0 +1,50 @@
+from typing import Dict
+
+import numpy as np
+
+from app.strategies.base import VectorizedStrategy, crossed_above
+from app.strategies.indicators import _as_2d, rsi
+
+class RSIOversoldStrategy(VectorizedStrategy):
+    """
+    RSI bounce.
+
+    Entry: RSI crosses back above the oversold level (it was below it on
+    the previous candle).
+    Sell signal: RSI crosses above the overbought level.
+    Exits: the bot's stop loss / take profit.
+    """
+    PARAM_SPACE = {
+        'rsi_period': [7, 14, 21],
+        'rsi_oversold': [20, 25, 30, 35]
+    }
+
+    def __init__(self, config: dict = None):
+        super().__init__(config)
+        self.rsi_period = self.config.get('rsi_period', 14)
+        self.rsi_oversold = self.config.get('rsi_oversold', 30)
+        self.rsi_overbought = self.config.get('rsi_overbought', 70)
+
+    @property
+    def indicator_key(self) -> tuple:
+        return (self.rsi_period,)
+
+    @property
+    def min_candles(self) -> int:
+        return self.rsi_period + 1
+
+    def backtest_indicators(self, close, volume) -> Dict[str, np.ndarray]:
+        close = _as_2d(close)
+        return {'close': close, 'volume': _as_2d(volume), 'rsi': rsi(close, self.rsi_period)}
+
+    def signal_matrix(self, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        values = indicators['rsi']
+        signals = np.zeros(values.shape, dtype=np.int8)
+        signals[crossed_above(values, self.rsi_overbought)] = -1
+        signals[crossed_above(values, self.rsi_oversold)] = 1
+        return signals
+
+    def describe(self, signal: int, latest: Dict[str, float]) -> str:
+        if signal == 1:
+            return f"RSI {latest['rsi']:.1f} back above oversold {self.rsi_oversold}"
+        return f"RSI {latest['rsi']:.1f} above overbought {self.rsi_overbought}"
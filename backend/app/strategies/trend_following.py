@@ -0,0 +1,62 @@
+from typing import Dict
+
+import numpy as np
+
+from app.strategies.base import VectorizedStrategy, crossed_above
+from app.strategies.indicators import _as_2d, sma
+
+class TrendFollowingStrategy(VectorizedStrategy):
+    """
+    Moving average crossover.
+
+    Entry: the fast SMA crosses above the slow SMA, with volume above its
+    slow-period average times volume_multiplier.
+    Sell signal: the fast SMA crosses below the slow SMA.
+    Exits: the bot's stop loss / take profit.
+    """
+    PARAM_SPACE = {
+        'fast_period': [10, 20, 30],
+        'slow_period': [50, 100, 200],
+        'volume_multiplier': [0.0, 1.0, 1.5]
+    }
+
+    def __init__(self, config: dict = None):
+        super().__init__(config)
+        self.fast_period = self.config.get('fast_period', 20)
+        self.slow_period = self.config.get('slow_period', 50)
+        self.volume_multiplier = self.config.get('volume_multiplier', 0.0)
+
+    @property
+    def indicator_key(self) -> tuple:
+        return (self.fast_period, self.slow_period)
+
+    @property
+    def min_candles(self) -> int:
+        return max(self.fast_period, self.slow_period) + 1
+
+    def backtest_indicators(self, close, volume) -> Dict[str, np.ndarray]:
+        close = _as_2d(close)
+        volume = _as_2d(volume)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_ratio = volume / sma(volume, self.slow_period)
+        return {
+            'close': close,
+            'volume': volume,
+            'fast_ma': sma(close, self.fast_period),
+            'slow_ma': sma(close, self.slow_period),
+            'volume_ratio': volume_ratio
+        }
+
+    def signal_matrix(self, indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        fast, slow = indicators['fast_ma'], indicators['slow_ma']
+        signals = np.zeros(fast.shape, dtype=np.int8)
+        signals[crossed_above(slow, fast)] = -1
+        with np.errstate(invalid='ignore'):
+            volume_ok = indicators['volume_ratio'] > self.volume_multiplier
+        signals[crossed_above(fast, slow) & volume_ok] = 1
+        return signals
+
+    def describe(self, signal: int, latest: Dict[str, float]) -> str:
+        direction = "above" if signal == 1 else "below"
+        return (f"SMA{self.fast_period} {latest['fast_ma']:.2f} crossed {direction} "
+                f"SMA{self.slow_period} {latest['slow_ma']:.2f}")
@@ -0,0 +1,77 @@
+"""
+Standalone trading worker: runs the scheduler and TradingEngine without
+the HTTP API.
+
+    python -m app.worker
+
+Deploy it next to an API started with EMBEDDED_SCHEDULER=false.
+"""
+import asyncio
+import logging
+import signal
+
+from app.database import engine, Base, SessionLocal
+from app.services.async_binance_client import close_http_client
+from app.services.candle_store import ensure_candle_store_schema
+from app.services.trading_engine import ensure_order_status_enum
+from app.services.bot_stats import seed_missing_stats
+from app.services.bot_scheduler import TRADING_SCHEDULE, bot_scheduler
+from app.services.leader_lease import release_lease
+from app.services.position_monitor import POSITION_MONITOR_ENABLED, POSITION_MONITOR_LEASE, run_position_monitors
+from app.services.scheduler import create_scheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run_worker():
+    Base.metadata.create_all(bind=engine)
+    ensure_candle_store_schema(engine)
+    ensure_order_status_enum(engine)
+    db = SessionLocal()
+    try:
+        seed_missing_stats(db)
+    finally:
+        db.close()
+
+    scheduler = create_scheduler()
+    scheduler.start()
+    logger.info("Trading worker started")
+
+    bot_scheduler_task = None
+    if TRADING_SCHEDULE == 'per_bot':
+        bot_scheduler_task = asyncio.create_task(bot_scheduler.run())
+        logger.info("Per-bot scheduler started")
+
+    monitor_task = None
+    if POSITION_MONITOR_ENABLED:
+        monitor_task = asyncio.create_task(run_position_monitors())
+        logger.info("Position monitor started")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Shutting down trading worker")
+        scheduler.shutdown()
+        for task in (bot_scheduler_task, monitor_task):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        db = SessionLocal()
+        try:
+            # Hand the leases over without waiting for them to expire
+            release_lease(db)
+            release_lease(db, POSITION_MONITOR_LEASE)
+        finally:
+            db.close()
+        await close_http_client()
+
+def main():
+    asyncio.run(run_worker())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+REPEATS = 5
+
+def make_year(seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, MINUTES_PER_YEAR)))
+    spread = np.abs(rng.normal(0, 0.0005, MINUTES_PER_YEAR))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=MINUTES_PER_YEAR, freq='min'),
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close * (1 + spread),
+        'low': close * (1 - spread),
+        'close': close,
+        'volume': rng.gamma(2.0, 50.0, MINUTES_PER_YEAR)
+    })
+
+def main():
+    candles = make_year()
+    strategy = MeanReversionStrategy({'force_test_buy': False})
+    print(f"{'mode':>10} {'best ms':>8} {'trades':>7} {'win %':>6} {'return %':>9} {'max dd %':>9} {'sharpe':>7}")
+    for intrabar in (False, True):
+        best = float('inf')
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            result = run_backtest(strategy, candles, interval='1m', intrabar_exits=intrabar)
+            best = min(best, time.perf_counter() - start)
+        stats = result.stats
+        print(f"{'intrabar' if intrabar else 'close':>10} {best * 1000:>8.1f} {stats['trades']:>7} "
+              f"{stats['win_rate']:>6.1f} {stats['total_return_percent']:>9.2f} "
+              f"{stats['max_drawdown_percent']:>9.2f} {stats['sharpe']:>7.2f}")
+
+if __name__ == "__main__":
+    main()
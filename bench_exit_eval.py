@@ -0,0 +1,64 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import time
+
+import numpy as np
+
+from app.services.exit_evaluator import OpenPositions
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+N_SYMBOLS = 200
+REPEATS = 200
+
+def make_positions(n: int, symbol_prices: np.ndarray, seed: int = 3) -> OpenPositions:
+    """Trades entered within a few percent of today's price, 3% stop / 5% target."""
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i}USDT" for i in range(N_SYMBOLS)]
+    symbol_idx = rng.integers(0, N_SYMBOLS, n)
+    entry = symbol_prices[symbol_idx] * rng.uniform(0.97, 1.04, n)
+    return OpenPositions(
+        np.arange(n), np.arange(n), symbols, symbol_idx, entry,
+        entry * 0.97, entry * 1.05
+    )
+
+def scalar_exits(positions: OpenPositions, prices: dict, strategy) -> list:
+    """One should_exit_position call per trade, like manage_open_position."""
+    exits = []
+    for i in range(len(positions)):
+        price = prices[positions.symbols[positions.symbol_idx[i]]]
+        should_exit, reason = strategy.should_exit_position(
+            positions.entry[i], price, positions.stop[i], positions.target[i]
+        )
+        if should_exit:
+            exits.append((int(positions.trade_ids[i]), reason))
+    return exits
+
+def main():
+    strategy = MeanReversionStrategy()
+    symbol_prices = np.random.default_rng(5).uniform(1, 1000, N_SYMBOLS)
+    print(f"{'open trades':>12} {'scalar ms':>10} {'mask ms':>9} {'evaluate ms':>12} {'exits':>7}")
+    for n in (1_000, 10_000, 50_000):
+        positions = make_positions(n, symbol_prices)
+        prices = dict(zip(positions.symbols, symbol_prices))
+
+        start = time.perf_counter()
+        expected = scalar_exits(positions, prices, strategy)
+        scalar_ms = (time.perf_counter() - start) * 1000
+
+        price_vector = positions.price_vector(prices)
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            positions.exit_mask(price_vector)
+        mask_ms = (time.perf_counter() - start) * 1000 / REPEATS
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            decisions = positions.evaluate(price_vector)
+        evaluate_ms = (time.perf_counter() - start) * 1000 / REPEATS
+
+        assert [(d.trade_id, d.reason) for d in decisions] == expected
+        print(f"{n:>12} {scalar_ms:>10.2f} {mask_ms:>9.3f} {evaluate_ms:>12.3f} {len(decisions):>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import argparse
+import asyncio
+import logging
+import os
+
+# The fake serves api.binance.com's limit; size the client's budget to match
+WEIGHT_LIMIT = 6000
+os.environ.setdefault("BINANCE_REQUEST_WEIGHT_PER_MINUTE", str(WEIGHT_LIMIT))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services import trading_engine
+from app.services.async_binance_client import close_http_client
+from app.services.fake_exchange import DEFAULT_SYMBOLS, FakeExchange, install_fake_exchange
+from app.services.rate_limiter import rate_limit_stats
+from app.services.trader_pool import trader_pool
+
+SYMBOLS = list(DEFAULT_SYMBOLS)
+
+def make_db(exchange: FakeExchange, n_bots: int, n_accounts: int):
+    """
+    Live (non-paper) accounts, so every order goes to the fake exchange.
+    Two thirds of the bots hold a position: half of those past their
+    stop-loss, half past their take-profit. The rest look for an entry.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='load@test', username='load', hashed_password='x')
+    db.add(user)
+    db.flush()
+    accounts = [BinanceAccount(user_id=user.id, name=f'live{i}', api_key=f'key{i}', api_secret='secret',
+                               testnet=False, balance_usdt=0.0) for i in range(n_accounts)]
+    db.add_all(accounts)
+    db.flush()
+
+    prices = {symbol: exchange.price(symbol) for symbol in SYMBOLS}
+    for i in range(n_bots):
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        bot = BotConfig(user_id=user.id, binance_account_id=accounts[i % n_accounts].id, name=f'bot{i}',
+                        strategy=TradingStrategy.MEAN_REVERSION, symbol=symbol, trade_amount_usdt=100,
+                        stop_loss_percent=3.0, take_profit_percent=5.0, status=BotStatus.ACTIVE,
+                        total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+        db.add(bot)
+        db.flush()
+        if i % 3 < 2:
+            entry = prices[symbol] / (0.95 if i % 3 == 0 else 1.06)
+            db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol=symbol, side=OrderSide.BUY,
+                         entry_price=entry, quantity=round(100 / entry, 5), amount_usdt=100.0,
+                         status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+    return Session
+
+async def run_cycle(Session) -> dict:
+    db = Session()
+    try:
+        return await trading_engine.TradingEngine(db, Session).execute_hourly_trading()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one trading cycle against the fake exchange")
+    parser.add_argument("--bots", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=trading_engine.MAX_CONCURRENT_BOTS)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Injected errors would otherwise log one line per failed call
+        logging.disable(logging.CRITICAL)
+
+    exchange = FakeExchange(
+        latency_seconds=args.latency_ms / 1000, latency_jitter_seconds=args.jitter_ms / 1000,
+        error_rate=args.error_rate, weight_limit=WEIGHT_LIMIT,
+        initial_balances={'USDT': 10_000_000.0, **{symbol[:-4]: 1_000.0 for symbol in SYMBOLS}}
+    )
+    Session = make_db(exchange, args.bots, args.accounts)
+    trading_engine.MAX_CONCURRENT_BOTS = args.concurrency
+    trader_pool.max_size = max(trader_pool.max_size, args.accounts)
+
+    async def scenario():
+        install_fake_exchange(exchange)
+        try:
+            return await run_cycle(Session)
+        finally:
+            await close_http_client()
+
+    stats = asyncio.run(scenario())
+
+    db = Session()
+    closed = db.query(Trade).filter(Trade.exit_price.isnot(None)).count()
+    opened = db.query(Trade).filter(Trade.exit_price.is_(None)).count()
+    errored = db.query(BotConfig).filter(BotConfig.status == BotStatus.ERROR).count()
+    db.close()
+
+    print(f"bots={stats['bots']} concurrency={args.concurrency} latency={args.latency_ms:.0f}"
+          f"+{args.jitter_ms:.0f}ms error_rate={args.error_rate}")
+    print(f"wall clock {stats['wall_clock_seconds']:.2f}s  "
+          f"({stats['bots'] / stats['wall_clock_seconds']:.0f} bots/s)  "
+          f"p50 {stats['p50_seconds'] * 1000:.1f}ms  p99 {stats['p99_seconds'] * 1000:.1f}ms  "
+          f"over budget {stats['over_budget']}")
+    print(f"trades closed {closed}  open {opened}  bots in ERROR {errored}")
+    exchange_stats = exchange.stats()
+    print(f"exchange: {exchange_stats['total_requests']} requests, {exchange_stats['orders_filled']} fills, "
+          f"{exchange_stats['orders_rejected']} rejected, {exchange_stats['errors_injected']} injected errors, "
+          f"{exchange_stats['throttled']} throttled")
+    for path, count in sorted(exchange_stats['requests'].items()):
+        print(f"  {path:<28} {count:>6}")
+    for host, limiter in rate_limit_stats().items():
+        print(f"limiter {host}: queued {limiter['queued']}, wait p99 {limiter['wait_p99_seconds']:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+N_CANDLES = 100
+REPEATS = 3
+
+def make_batch(n_symbols: int, n_candles: int = N_CANDLES, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_symbols, n_candles)), axis=1))
+    volume = rng.uniform(100, 1000, (n_symbols, n_candles))
+    return close, volume
+
+def per_frame(strategy, symbols, close, volume):
+    timestamps = pd.date_range('2024-01-01', periods=close.shape[1], freq='h')
+    frames = [pd.DataFrame({'timestamp': timestamps, 'close': c, 'volume': v}) for c, v in zip(close, volume)]
+    start = time.perf_counter()
+    signals = {symbol: strategy.generate_signal(df) for symbol, df in zip(symbols, frames)}
+    return time.perf_counter() - start, signals
+
+def batched(strategy, symbols, close, volume):
+    start = time.perf_counter()
+    signals = strategy.generate_signals_batch(symbols, close, volume)
+    return time.perf_counter() - start, signals
+
+def check_same(a: dict, b: dict):
+    for symbol, signal in a.items():
+        assert signal['signal'] == b[symbol]['signal'], symbol
+        for key, value in signal['indicators'].items():
+            assert abs(value - b[symbol]['indicators'][key]) < 1e-6, (symbol, key)
+
+def main():
+    strategy = MeanReversionStrategy({'force_test_buy': False})
+    print(f"{'symbols':>8} {'per-frame (s)':>14} {'batched (s)':>12} {'speedup':>8}")
+    for n_symbols in (10, 100, 1000):
+        symbols = [f"SYM{i}USDT" for i in range(n_symbols)]
+        close, volume = make_batch(n_symbols)
+        frame_time = min(per_frame(strategy, symbols, close, volume)[0] for _ in range(REPEATS))
+        batch_time = min(batched(strategy, symbols, close, volume)[0] for _ in range(REPEATS))
+        check_same(per_frame(strategy, symbols, close, volume)[1], batched(strategy, symbols, close, volume)[1])
+        print(f"{n_symbols:>8} {frame_time:>14.4f} {batch_time:>12.4f} {frame_time / batch_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
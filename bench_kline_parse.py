@@ -0,0 +1,71 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.services.kline_parser import parse_klines
+
+N_CANDLES = 1000
+REPEATS = 200
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+
+def make_response(n: int = N_CANDLES) -> list:
+    """Rows shaped like a /api/v3/klines response."""
+    return [[
+        1700000000000 + i * 60000,
+        f"{100 + i * 0.01:.8f}", f"{101 + i * 0.01:.8f}", f"{99 + i * 0.01:.8f}",
+        f"{100.5 + i * 0.01:.8f}", f"{12.345 + i:.8f}",
+        1700000059999 + i * 60000, "1234.56780000", 100, "6.10000000", "600.20000000", "0"
+    ] for i in range(n)]
+
+def legacy_parse(klines: list) -> pd.DataFrame:
+    """The DataFrame conversion get_historical_klines used before the typed parser."""
+    df = pd.DataFrame(klines, columns=KLINE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = df[col].astype(float)
+    return df
+
+def time_per_call(fn, raw) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(raw)
+    return (time.perf_counter() - start) / REPEATS
+
+def peak_allocation(fn, raw) -> int:
+    tracemalloc.start()
+    result = fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+def main():
+    raw = make_response()
+    legacy = legacy_parse(raw)
+    typed = parse_klines(raw)
+    assert (legacy['close'].to_numpy() == typed.close).all()
+    assert (legacy['timestamp'] == typed.to_frame()['timestamp']).all()
+
+    cases = [
+        ('legacy DataFrame', legacy_parse, legacy.memory_usage(deep=True).sum()),
+        ('typed Klines', parse_klines, typed.nbytes),
+        ('typed + to_frame()', lambda r: parse_klines(r).to_frame(),
+         parse_klines(raw).to_frame().memory_usage(deep=True).sum()),
+    ]
+    print(f"per {N_CANDLES} candles")
+    print(f"{'parser':<20} {'parse (ms)':>10} {'result (KB)':>12} {'peak alloc (KB)':>16}")
+    for name, fn, retained in cases:
+        print(f"{name:<20} {time_per_call(fn, raw) * 1000:>10.3f} {retained / 1024:>12.1f} "
+              f"{peak_allocation(fn, raw) / 1024:>16.1f}")
+
+if __name__ == "__main__":
+    main()
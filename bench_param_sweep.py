@@ -0,0 +1,55 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.param_sweep import DEFAULT_SPACE, grid_params, run_sweep
+
+logging.disable(logging.INFO)
+
+def make_candles(n: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    spread = np.abs(rng.normal(0, 0.001, n))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=n, freq='15min'),
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close * (1 + spread),
+        'low': close * (1 - spread),
+        'close': close,
+        'volume': rng.gamma(2.0, 50.0, n)
+    })
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Parameter sweep wall clock by worker count")
+    parser.add_argument("--candles", type=int, default=2 * 365 * 96, help="15m candles (default two years)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} - {0}))
+    args = parser.parse_args()
+
+    candles = make_candles(args.candles)
+    combos = grid_params(DEFAULT_SPACE)
+    print(f"{len(combos)} combinations x {len(candles)} candles, {cores} cores")
+    print(f"{'workers':>7} {'seconds':>8} {'combos/s':>9} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        table = run_sweep(candles, combos, workers=workers, interval='15m', min_trades=5)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {len(combos) / elapsed:>9.1f} {speedup:>8.2f} "
+              f"{speedup / workers * 100:>9.0f}%")
+    best = table.iloc[0]
+    print("best: " + ", ".join(f"{name}={best[name]:g}" for name in DEFAULT_SPACE)
+          + f"  sharpe {best['sharpe']:.2f}  return {best['total_return_percent']:.2f}%  trades {best['trades']:.0f}")
+
+if __name__ == "__main__":
+    main()
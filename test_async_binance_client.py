@@ -0,0 +1,121 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import hashlib
+import hmac
+import logging
+from urllib.parse import parse_qs
+
+import httpx
+
+from app.services import async_binance_client, circuit_breaker
+from app.services.async_binance_client import AsyncBinanceTrader, BinanceRequestError
+
+logging.disable(logging.INFO)
+
+def run_with_transport(handler, coro_factory):
+    async def scenario():
+        async_binance_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_factory()
+        finally:
+            await async_binance_client.close_http_client()
+
+    circuit_breaker._breakers.clear()
+    async_binance_client.RETRY_BASE_SECONDS = 0.001
+    return asyncio.run(scenario())
+
+def make_trader(host: str) -> AsyncBinanceTrader:
+    trader = AsyncBinanceTrader('my-key', 'my-secret')
+    trader.base_url = f'https://{host}'
+    return trader
+
+def check_signature(request: httpx.Request):
+    query = request.url.query.decode()
+    unsigned, signature = query.rsplit('&signature=', 1)
+    expected = hmac.new(b'my-secret', unsigned.encode(), hashlib.sha256).hexdigest()
+    assert signature == expected, (unsigned, signature)
+    assert request.headers['X-MBX-APIKEY'] == 'my-key'
+    return parse_qs(unsigned)
+
+def test_signed_requests_sign_the_wire_query():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'balances': [
+            {'asset': 'USDT', 'free': '12.5', 'locked': '0.5'},
+            {'asset': 'BTC', 'free': '0', 'locked': '0'}
+        ]})
+
+    balances = run_with_transport(handler, lambda: make_trader('signed.test').get_account_balance())
+    assert balances == {'USDT': {'free': 12.5, 'locked': 0.5, 'total': 13.0}}
+    # The retried GET is signed again, each query on its own
+    assert len(requests) == 2
+    for request in requests:
+        params = check_signature(request)
+        assert params['recvWindow'] == [str(async_binance_client.RECV_WINDOW_MS)]
+        assert 'timestamp' in params
+
+def test_public_requests_are_not_signed():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'symbol': 'BTCUSDT', 'price': '65000.5'})
+
+    price = run_with_transport(handler, lambda: make_trader('public.test').get_current_price('BTCUSDT'))
+    assert price == 65000.5
+    assert 'signature' not in requests[0].url.query.decode()
+    assert 'X-MBX-APIKEY' not in requests[0].headers
+
+def test_error_responses():
+    def handler(request):
+        if request.url.path == '/api/v3/account':
+            return httpx.Response(401, json={'code': -2015, 'msg': 'Invalid API-key'})
+        if request.url.path == '/api/v3/ticker/price':
+            return httpx.Response(400, text='not json')
+        return httpx.Response(404, json={'code': -2013, 'msg': 'Order does not exist.'})
+
+    async def scenario():
+        trader = make_trader('errors.test')
+        try:
+            await trader._request('GET', '/api/v3/account', signed=True)
+            raise AssertionError("expected BinanceRequestError")
+        except BinanceRequestError as e:
+            assert (e.status_code, e.code, e.message) == (401, -2015, 'Invalid API-key')
+        try:
+            await trader._request('GET', '/api/v3/ticker/price', {'symbol': 'BTCUSDT'})
+            raise AssertionError("expected BinanceRequestError")
+        except BinanceRequestError as e:
+            assert (e.status_code, e.code, e.message) == (400, None, 'not json')
+
+        # Public methods turn errors into their empty results
+        assert await trader.get_account_balance() == {}
+        assert await trader.get_current_price('BTCUSDT') is None
+        assert await trader.get_order_status('BTCUSDT', 7) is None
+        cancelled = await trader.cancel_order('BTCUSDT', 7)
+        assert not cancelled['success'] and '-2013' in cancelled['error']
+
+    run_with_transport(handler, scenario)
+
+def test_transport_errors_are_reported():
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def scenario():
+        trader = make_trader('refused.test')
+        assert await trader.get_account_balance() == {}
+        assert (await trader.get_historical_klines('BTCUSDT', allow_mock=False)).empty
+
+    run_with_transport(handler, scenario)
+
+if __name__ == "__main__":
+    test_signed_requests_sign_the_wire_query()
+    test_public_requests_are_not_signed()
+    test_error_responses()
+    test_transport_errors_are_reported()
+    print("async binance client tests passed")
@@ -0,0 +1,85 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import END_OF_DATA_REASON, run_backtest
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+def make_candles(n: int, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': np.concatenate([[100.0], close[:-1]]),
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def scalar_backtest(strategy, df: pd.DataFrame, stop_pct: float, target_pct: float):
+    """One candle at a time, like the engine's hourly cycle."""
+    close = df['close'].to_numpy()
+    signals = strategy.backtest_signals(close, df['volume'].to_numpy())
+    trades, open_trade = [], None
+    for i, price in enumerate(close):
+        if open_trade is None:
+            if signals[i] == 1:
+                open_trade = (i, price)
+            continue
+        entry_index, entry_price = open_trade
+        should_exit, reason = strategy.should_exit_position(
+            entry_price, price, entry_price * (1 - stop_pct / 100), entry_price * (1 + target_pct / 100)
+        )
+        if should_exit:
+            trades.append((entry_index, i, reason))
+            open_trade = None
+    return trades
+
+def test_matches_candle_by_candle_replay():
+    df = make_candles(20_000)
+    strategy = MeanReversionStrategy({'force_test_buy': False})
+    result = run_backtest(strategy, df, stop_loss_percent=2.0, take_profit_percent=3.0, interval='1m')
+    expected = scalar_backtest(strategy, df, 2.0, 3.0)
+    trades = result.trades
+    closed = trades[trades['exit_reason'] != END_OF_DATA_REASON]
+    assert len(expected) > 20
+    assert list(zip(closed['entry_index'], closed['exit_index'], closed['exit_reason'])) == expected
+
+def test_equity_and_stats_are_consistent():
+    df = make_candles(20_000)
+    result = run_backtest(MeanReversionStrategy({'force_test_buy': False}), df, interval='1m')
+    stats = result.stats
+    assert len(result.equity) == len(df)
+    assert abs(result.equity[-1] - (10000.0 + result.trades['profit_loss_usdt'].sum())) < 1e-6
+    assert stats['wins'] + stats['losses'] == stats['trades'] == len(result.trades)
+    assert stats['max_drawdown_usdt'] >= 0 and stats['max_drawdown_percent'] < 100
+    # Flat between trades: equity only moves while a position is held
+    first_entry = result.trades['entry_index'].iloc[0]
+    assert np.all(result.equity[:first_entry + 1] == 10000.0)
+
+def test_intrabar_exits_fill_at_the_level_and_fees_cost():
+    df = make_candles(20_000)
+    strategy = MeanReversionStrategy({'force_test_buy': False})
+    intrabar = run_backtest(strategy, df, intrabar_exits=True, interval='1m').trades
+    stops = intrabar[intrabar['exit_reason'] == 'STOP_LOSS']
+    # Filled at the stop unless the candle opened below it
+    assert np.all(stops['exit_price'] <= stops['entry_price'] * 0.97 + 1e-9)
+    assert np.isclose(stops['profit_loss_percent'], -3.0).mean() > 0.5
+
+    free = run_backtest(strategy, df, interval='1m').stats
+    paid = run_backtest(strategy, df, interval='1m', fee_rate=0.001).stats
+    assert paid['trades'] == free['trades']
+    assert paid['net_profit_usdt'] < free['net_profit_usdt']
+
+if __name__ == "__main__":
+    test_matches_candle_by_candle_replay()
+    test_equity_and_stats_are_consistent()
+    test_intrabar_exits_fill_at_the_level_and_fees_cost()
+    print("backtest tests passed")
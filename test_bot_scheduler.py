@@ -0,0 +1,100 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import User, BinanceAccount, BotConfig, BotStatus, TradingStrategy
+from app.services import trading_engine
+from app.services.bot_scheduler import BotSchedule, BotScheduler, bot_jitter, next_candle_close
+
+HOUR = 1_700_000_000 // 3600 * 3600  # an hour boundary, epoch seconds
+
+def test_schedule_aligns_to_candle_close_with_jitter():
+    assert next_candle_close('5m', HOUR) == HOUR + 300
+    assert next_candle_close('5m', HOUR + 299.9) == HOUR + 300
+    assert next_candle_close('4h', HOUR + 1) % (4 * 3600) == 0
+
+    schedule = BotSchedule(jitter_seconds=30)
+    offsets = set()
+    for bot_id in range(1, 201):
+        due = schedule.schedule(bot_id, '1h', HOUR + 10)
+        assert HOUR + 3600 <= due < HOUR + 3630
+        offsets.add(int(due - HOUR - 3600))
+    # Bots are spread over the jitter window, not stacked at the close
+    assert len(offsets) >= 25
+    # The window is capped at half the interval for short intervals
+    assert bot_jitter(7, '1m', 300) < 30
+
+def test_pop_due_reschedules_and_cancel():
+    schedule = BotSchedule(jitter_seconds=0)
+    schedule.schedule(1, '1m', HOUR)
+    schedule.schedule(2, '5m', HOUR)
+    schedule.schedule(3, '1h', HOUR)
+    assert schedule.pop_due(HOUR + 59) == []
+    assert schedule.pop_due(HOUR + 60) == [(1, HOUR + 60)]
+    assert schedule.next_due() == HOUR + 120
+
+    schedule.cancel(1)
+    assert sorted(schedule.pop_due(HOUR + 300)) == [(2, HOUR + 300)]
+    schedule.schedule(3, '5m', HOUR + 300)  # interval changed: the 1h entry goes stale
+    assert schedule.pop_due(HOUR + 3600) == [(2, HOUR + 600), (3, HOUR + 600)]
+    assert len(schedule) == 2
+
+def test_scheduler_syncs_and_runs_due_bots():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='sched@test', username='sched', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s', testnet=True)
+    db.add(account)
+    db.flush()
+    for i, (interval, status) in enumerate([('1m', BotStatus.ACTIVE), ('5m', BotStatus.ACTIVE),
+                                            ('1h', BotStatus.PAUSED)]):
+        db.add(BotConfig(user_id=user.id, binance_account_id=account.id, name=f'bot{i}',
+                         strategy=TradingStrategy.MEAN_REVERSION, trade_amount_usdt=100,
+                         status=status, config_params={'interval': interval}))
+    db.commit()
+    db.close()
+
+    executed = []
+
+    async def execute_bots(self, bot_ids):
+        executed.append(sorted(bot_ids))
+        return {'bots': len(bot_ids), 'wall_clock_seconds': 0.0}
+
+    original = trading_engine.TradingEngine.execute_bots
+    trading_engine.TradingEngine.execute_bots = execute_bots
+    try:
+        async def scenario():
+            scheduler = BotScheduler(Session, jitter_seconds=0, use_lease=False)
+            scheduler.sync(now=HOUR)
+            assert sorted(scheduler.schedule.bot_ids()) == [1, 2]
+
+            await scheduler.dispatch_due(HOUR + 60)
+            await scheduler.dispatch_due(HOUR + 300)
+            # Started through the API: runs at its next close without waiting for a sync
+            scheduler.notify(3, BotStatus.ACTIVE, {'interval': '1m'}, now=HOUR + 300)
+            scheduler.notify(1, BotStatus.PAUSED)
+            await scheduler.dispatch_due(HOUR + 360)
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+    finally:
+        trading_engine.TradingEngine.execute_bots = original
+
+    assert executed == [[1], [1, 2], [3]]
+    assert scheduler.runs == 4
+
+if __name__ == "__main__":
+    test_schedule_aligns_to_candle_close_with_jitter()
+    test_pop_due_reschedules_and_cancel()
+    test_scheduler_syncs_and_runs_due_bots()
+    print("bot scheduler tests passed")
@@ -0,0 +1,109 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStats, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services.bot_stats import rebuild_stats, seed_missing_stats
+from app.services.trading_engine import TradingEngine
+
+class FilledAt:
+    def __init__(self, price):
+        self.price = price
+
+    async def place_market_order(self, symbol, side, quantity):
+        return {'success': True, 'order_id': 1, 'price': self.price, 'quantity': quantity}
+
+def make_bot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='stats@test', username='stats', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s',
+                             testnet=True, balance_usdt=1000.0)
+    db.add(account)
+    db.flush()
+    bot = BotConfig(user_id=user.id, binance_account_id=account.id, name='stats',
+                    strategy=TradingStrategy.MEAN_REVERSION, trade_amount_usdt=100, status=BotStatus.ACTIVE,
+                    total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+    db.add(bot)
+    db.commit()
+    return Session, db, bot
+
+def close_trades(Session, db, bot, exit_prices):
+    engine = TradingEngine(db, Session)
+    for exit_price in exit_prices:
+        trade = Trade(user_id=bot.user_id, bot_config_id=bot.id, symbol=bot.symbol, side=OrderSide.BUY,
+                      entry_price=100.0, quantity=1.0, status=OrderStatus.FILLED,
+                      entry_time=datetime.utcnow() - timedelta(hours=1))
+        db.add(trade)
+        db.commit()
+        asyncio.run(engine.execute_sell_order(bot, FilledAt(exit_price), trade, exit_price, 'TEST'))
+
+def test_running_counters():
+    Session, db, bot = make_bot()
+    # P/L: +10, -10, -5, +20, 0 -> cumulative 10, 0, -5, 15, 15
+    close_trades(Session, db, bot, [110.0, 90.0, 95.0, 120.0, 100.0])
+
+    stats = db.query(BotStats).filter(BotStats.bot_config_id == bot.id).one()
+    assert (stats.closed_trades, stats.wins, stats.losses) == (5, 2, 3)
+    assert stats.gross_profit_usdt == 30.0 and stats.gross_loss_usdt == 15.0
+    assert stats.net_profit_usdt == 15.0 and stats.peak_profit_usdt == 15.0
+    assert stats.max_drawdown_usdt == 15.0
+    assert abs(stats.avg_hold_seconds - 3600) < 5
+
+    db.refresh(bot)
+    # Losses lower the win rate, and only closed trades count
+    assert (bot.total_trades, bot.win_rate, bot.total_profit_usdt) == (5, 40.0, 15.0)
+
+def test_rebuild_reports_and_fixes_drift():
+    Session, db, bot = make_bot()
+    close_trades(Session, db, bot, [110.0, 90.0])
+    assert rebuild_stats(db, write=False) == {}
+
+    stats = db.query(BotStats).filter(BotStats.bot_config_id == bot.id).one()
+    stats.wins = 7
+    db.commit()
+    assert rebuild_stats(db, write=False) == {bot.id: {'wins': (7, 1)}}
+    rebuild_stats(db)
+    assert rebuild_stats(db, write=False) == {}
+    db.refresh(bot)
+    assert bot.win_rate == 50.0
+
+def test_seeded_bots_keep_their_history():
+    Session, db, bot = make_bot()
+    # Closed before bot_stats existed: no counters row, totals on the bot only
+    for exit_price in (110.0, 95.0):
+        db.add(Trade(user_id=bot.user_id, bot_config_id=bot.id, symbol=bot.symbol, side=OrderSide.BUY,
+                     entry_price=100.0, exit_price=exit_price, quantity=1.0, status=OrderStatus.FILLED,
+                     profit_loss_usdt=exit_price - 100.0, entry_time=datetime.utcnow() - timedelta(hours=2),
+                     exit_time=datetime.utcnow() - timedelta(hours=1)))
+    bot.total_trades, bot.total_profit_usdt, bot.win_rate = 2, 5.0, 50.0
+    db.commit()
+
+    assert seed_missing_stats(db) == 1
+    assert seed_missing_stats(db) == 0
+    close_trades(Session, db, bot, [120.0])
+    stats = db.query(BotStats).filter(BotStats.bot_config_id == bot.id).one()
+    assert (stats.closed_trades, stats.wins, stats.losses) == (3, 2, 1)
+    assert stats.net_profit_usdt == 25.0 and stats.max_drawdown_usdt == 5.0
+    db.refresh(bot)
+    assert (bot.total_trades, bot.total_profit_usdt) == (3, 25.0)
+    assert rebuild_stats(db, write=False) == {}
+
+if __name__ == "__main__":
+    test_running_counters()
+    test_rebuild_reports_and_fixes_drift()
+    test_seeded_bots_keep_their_history()
+    print("bot stats tests passed")
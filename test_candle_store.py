@@ -0,0 +1,128 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.services import candle_store
+from app.services.candle_store import (
+    CandleStore, ensure_candle_store_schema, get_klines, interval_delta, latest_closed_open_time, to_millis
+)
+
+logging.disable(logging.INFO)
+
+class HistoryTrader:
+    """Serves `history` hourly candles ending with the open one, like /api/v3/klines."""
+
+    def __init__(self, base_url: str, history: int, price: float = 100.0):
+        self.base_url = base_url
+        self.price = price
+        self.calls = []
+        open_candle = latest_closed_open_time('1h') + interval_delta('1h')
+        self.times = [open_candle - interval_delta('1h') * i for i in range(history)][::-1]
+
+    async def get_historical_klines(self, symbol, interval='1h', limit=100, start_time=None, end_time=None,
+                                    allow_mock=True):
+        self.calls.append({'limit': limit, 'start_time': start_time, 'end_time': end_time})
+        times = self.times
+        if start_time is not None:
+            times = [ts for ts in times if to_millis(ts) >= start_time][:limit]
+        else:
+            if end_time is not None:
+                times = [ts for ts in times if to_millis(ts) <= end_time]
+            times = times[-limit:]
+        close = self.price + np.arange(len(times), dtype=np.float64)
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(times), 'open': close, 'high': close, 'low': close,
+            'close': close, 'volume': np.full(len(times), 10.0)
+        })
+
+def make_session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    candle_store._history_starts.clear()
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+def read(trader, limit, Session):
+    return asyncio.run(get_klines(trader, 'BTCUSDT', '1h', limit, session_factory=Session))
+
+def test_larger_limit_backfills_older_candles():
+    Session = make_session_factory()
+    trader = HistoryTrader('https://venue.test', history=2000)
+    assert len(read(trader, 100, Session)) == 100
+
+    df = read(trader, 300, Session)
+    assert len(df) == 300
+    assert (df['timestamp'].diff().dropna() == pd.Timedelta(hours=1)).all()
+    assert df['timestamp'].iloc[-1] == pd.Timestamp(latest_closed_open_time('1h'))
+    # One page older than the first stored candle, nothing newer refetched
+    backfill = trader.calls[-1]
+    assert backfill['end_time'] is not None and backfill['limit'] == 200
+
+    calls = len(trader.calls)
+    assert len(read(trader, 300, Session)) == 300
+    assert len(trader.calls) == calls
+
+def test_backfill_pages_and_stops_at_the_start_of_history():
+    Session = make_session_factory()
+    trader = HistoryTrader('https://venue.test', history=1500)
+    read(trader, 10, Session)
+    # 1490 missing: two pages, the second one short
+    assert len(read(trader, 2500, Session)) == 1499
+    assert [call['limit'] for call in trader.calls[1:]] == [1000, 1000]
+
+    # A listing with no older candles is not asked again on every read
+    calls = len(trader.calls)
+    assert len(read(trader, 2500, Session)) == 1499
+    assert len(trader.calls) == calls
+
+def test_venues_are_stored_apart():
+    Session = make_session_factory()
+    us = HistoryTrader('https://us.test', history=50, price=100.0)
+    com = HistoryTrader('https://com.test', history=50, price=500.0)
+    assert read(us, 20, Session)['close'].iloc[-1] < 200
+    assert read(com, 20, Session)['close'].iloc[-1] > 500
+    assert len(com.calls) == 1
+
+    db = Session()
+    assert CandleStore(db, 'https://us.test').extent('BTCUSDT', '1h')[0] == 20
+    assert CandleStore(db, 'https://com.test').extent('BTCUSDT', '1h')[0] == 20
+    assert CandleStore(db, 'https://other.test').load('BTCUSDT', '1h', 20).empty
+    db.close()
+
+def test_schema_upgrade_adds_venue():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE market_data (id INTEGER PRIMARY KEY, symbol VARCHAR NOT NULL, timeframe VARCHAR, "
+            "open_price FLOAT, high_price FLOAT, low_price FLOAT, close_price FLOAT, volume FLOAT, "
+            "rsi FLOAT, ma_20 FLOAT, ma_50 FLOAT, timestamp DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_market_data_symbol ON market_data (symbol)"))
+        conn.execute(text("CREATE INDEX ix_market_data_timestamp ON market_data (timestamp)"))
+        conn.execute(text("INSERT INTO market_data (symbol, timeframe, timestamp) VALUES ('BTCUSDT', '1h', '2024-01-01')"))
+
+    ensure_candle_store_schema(engine)
+    inspector = inspect(engine)
+    assert 'venue' in {column['name'] for column in inspector.get_columns('market_data')}
+    assert {index['name'] for index in inspector.get_indexes('market_data')} >= {
+        'ix_market_data_venue_symbol_timeframe_timestamp'
+    }
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM market_data")).scalar() == 0
+    # Running it again is a no-op
+    ensure_candle_store_schema(engine)
+
+if __name__ == "__main__":
+    test_larger_limit_backfills_older_candles()
+    test_backfill_pages_and_stops_at_the_start_of_history()
+    test_venues_are_stored_apart()
+    test_schema_upgrade_adds_venue()
+    print("candle store tests passed")
@@ -0,0 +1,170 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services import exit_evaluator, trading_engine
+from app.services.market_data import MarketDataSnapshot, kline_key
+
+logging.disable(logging.INFO)
+
+class SlowTrader:
+    """Fills at 100 after yielding, so the bots' orders interleave."""
+    testnet = True
+
+    def __init__(self, fail: bool = False):
+        self.orders = []
+        self.fail = fail
+
+    async def place_market_order(self, symbol, side, quantity):
+        await asyncio.sleep(0.01)
+        self.orders.append((symbol, side, quantity))
+        if self.fail:
+            return {'success': False, 'error': 'rejected'}
+        return {'success': True, 'order_id': len(self.orders), 'price': 100.0, 'quantity': quantity,
+                'quote_quantity': 100.0 * quantity, 'commission': 0.1}
+
+class FixedPrice:
+    def __init__(self, price):
+        self.price = price
+
+    async def get_price(self, symbol):
+        return self.price
+
+def make_db(n_bots: int, open_positions: bool):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='concurrent@test', username='concurrent', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s',
+                             testnet=True, balance_usdt=10000.0)
+    db.add(account)
+    db.flush()
+    for i in range(n_bots):
+        bot = BotConfig(user_id=user.id, binance_account_id=account.id, name=f'bot{i}',
+                        strategy=TradingStrategy.MEAN_REVERSION, symbol='BTCUSDT', trade_amount_usdt=100,
+                        status=BotStatus.ACTIVE, total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+        db.add(bot)
+        db.flush()
+        if open_positions:
+            db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol='BTCUSDT', side=OrderSide.BUY,
+                         entry_price=80.0, quantity=1.0, amount_usdt=80.0, status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+    return Session
+
+def run_cycle(Session, price: float = 100.0):
+    candles = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=100, freq='h'),
+        'open': np.full(100, 100.0), 'high': np.full(100, 100.0), 'low': np.full(100, 100.0),
+        'close': np.full(100, 100.0), 'volume': np.full(100, 500.0)
+    })
+
+    class PrefetchedSnapshot(MarketDataSnapshot):
+        @classmethod
+        async def prefetch(cls, bots, session_factory):
+            return cls({kline_key(bot): candles for bot in bots})
+
+    trader = SlowTrader()
+    originals = (trading_engine.get_trader, trading_engine.get_price_snapshot,
+                 trading_engine.MarketDataSnapshot, trading_engine.CONCURRENT_EXECUTION)
+    trading_engine.get_trader = lambda account: trader
+    trading_engine.get_price_snapshot = lambda base_url: FixedPrice(price)
+    trading_engine.MarketDataSnapshot = PrefetchedSnapshot
+    trading_engine.CONCURRENT_EXECUTION = True
+    try:
+        db = Session()
+        stats = asyncio.run(trading_engine.TradingEngine(db, Session).execute_hourly_trading())
+        db.close()
+    finally:
+        (trading_engine.get_trader, trading_engine.get_price_snapshot,
+         trading_engine.MarketDataSnapshot, trading_engine.CONCURRENT_EXECUTION) = originals
+    return stats, trader
+
+def test_concurrent_buys_on_one_account_all_debit():
+    Session = make_db(3, open_positions=False)
+    stats, trader = run_cycle(Session)
+    assert stats['bots'] == 3 and len(trader.orders) == 3
+
+    db = Session()
+    balance = db.query(BinanceAccount).one().balance_usdt
+    trades = db.query(Trade).count()
+    db.close()
+    # Every bot's 100 USDT fill plus 0.1 fee, none lost to another bot's write
+    assert trades == 3
+    assert abs(balance - (10000.0 - 3 * 100.1)) < 1e-9, balance
+
+def test_concurrent_sells_on_one_account_all_credit():
+    Session = make_db(3, open_positions=True)
+    # Above every trade's take profit (80 * 1.05)
+    stats, trader = run_cycle(Session, price=100.0)
+    assert [side for _, side, _ in trader.orders] == ['SELL'] * 3
+
+    db = Session()
+    balance = db.query(BinanceAccount).one().balance_usdt
+    closed = db.query(Trade).filter(Trade.exit_reason == 'TAKE_PROFIT').count()
+    db.close()
+    assert closed == 3
+    assert abs(balance - (10000.0 + 3 * 99.9)) < 1e-9, balance
+
+def close_concurrently(Session, trader, closers: int):
+    db = Session()
+    trade_id = db.query(Trade.id).scalar()
+    db.close()
+
+    async def scenario():
+        return await asyncio.gather(*[
+            exit_evaluator.close_trade(trade_id, 100.0, 'TAKE_PROFIT', Session) for _ in range(closers)
+        ])
+
+    original = exit_evaluator.get_trader
+    exit_evaluator.get_trader = lambda account: trader
+    try:
+        return asyncio.run(scenario())
+    finally:
+        exit_evaluator.get_trader = original
+
+def test_concurrent_closes_sell_once():
+    Session = make_db(1, open_positions=True)
+    trader = SlowTrader()
+    assert sorted(close_concurrently(Session, trader, 3)) == [False, False, True]
+    assert len(trader.orders) == 1
+
+    db = Session()
+    trade = db.query(Trade).one()
+    balance = db.query(BinanceAccount).one().balance_usdt
+    db.close()
+    assert trade.status == OrderStatus.FILLED and trade.exit_price == 100.0
+    assert abs(balance - (10000.0 + 99.9)) < 1e-9, balance
+
+def test_failed_close_releases_the_trade():
+    Session = make_db(1, open_positions=True)
+    assert close_concurrently(Session, SlowTrader(fail=True), 2) == [False, False]
+
+    db = Session()
+    trade = db.query(Trade).one()
+    db.close()
+    assert trade.status == OrderStatus.FILLED and trade.exit_price is None
+    # The next attempt can close it
+    assert close_concurrently(Session, SlowTrader(), 1) == [True]
+
+if __name__ == "__main__":
+    test_concurrent_buys_on_one_account_all_debit()
+    test_concurrent_sells_on_one_account_all_credit()
+    test_concurrent_closes_sell_once()
+    test_failed_close_releases_the_trade()
+    print("concurrent bot tests passed")
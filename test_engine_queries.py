@@ -0,0 +1,119 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services import trading_engine
+from app.services.market_data import MarketDataSnapshot, kline_key
+
+class FakeTrader:
+    testnet = True
+
+    async def place_market_order(self, symbol, side, quantity):
+        return {'success': True, 'order_id': 1, 'price': 100.0, 'quantity': quantity}
+
+class FakePrices:
+    async def get_price(self, symbol):
+        # Below every open trade's stop: each one is closed at a loss
+        return 90.0
+
+def make_candles(n: int = 100) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': np.full(n, 500.0)
+    })
+
+def make_db(n_bots: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='engine@test', username='engine', hashed_password='x')
+    db.add(user)
+    db.flush()
+    accounts = [BinanceAccount(user_id=user.id, name=f'paper{i}', api_key='k', api_secret='s',
+                               testnet=True, balance_usdt=10000.0) for i in range(3)]
+    db.add_all(accounts)
+    db.flush()
+    for i in range(n_bots):
+        bot = BotConfig(user_id=user.id, binance_account_id=accounts[i % 3].id, name=f'bot{i}',
+                        strategy=TradingStrategy.MEAN_REVERSION, symbol='BTCUSDT' if i % 2 else 'ETHUSDT',
+                        trade_amount_usdt=100, status=BotStatus.ACTIVE,
+                        total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+        db.add(bot)
+        db.flush()
+        # Every other bot holds a position, the rest look for an entry
+        if i % 2 == 0:
+            db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol=bot.symbol, side=OrderSide.BUY,
+                         entry_price=100.0, quantity=1.0, amount_usdt=100.0, status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+    return engine, Session
+
+def count_cycle_selects(n_bots: int, concurrent: bool):
+    engine, Session = make_db(n_bots)
+    candles = make_candles()
+
+    class PrefetchedSnapshot(MarketDataSnapshot):
+        @classmethod
+        async def prefetch(cls, bots, session_factory):
+            return cls({kline_key(bot): candles for bot in bots})
+
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append(statement)
+
+    originals = (trading_engine.get_trader, trading_engine.get_price_snapshot,
+                 trading_engine.MarketDataSnapshot, trading_engine.CONCURRENT_EXECUTION)
+    trading_engine.get_trader = lambda account: FakeTrader()
+    trading_engine.get_price_snapshot = lambda base_url: FakePrices()
+    trading_engine.MarketDataSnapshot = PrefetchedSnapshot
+    trading_engine.CONCURRENT_EXECUTION = concurrent
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        db = Session()
+        stats = asyncio.run(trading_engine.TradingEngine(db, Session).execute_hourly_trading())
+        db.close()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        (trading_engine.get_trader, trading_engine.get_price_snapshot,
+         trading_engine.MarketDataSnapshot, trading_engine.CONCURRENT_EXECUTION) = originals
+
+    db = Session()
+    closed = db.query(Trade).filter(Trade.exit_reason == 'STOP_LOSS').count()
+    opened = db.query(Trade).filter(Trade.exit_price.is_(None)).count()
+    db.close()
+    assert stats['bots'] == n_bots
+    assert closed == (n_bots + 1) // 2 and opened == n_bots // 2, (closed, opened)
+    return selects
+
+def check_fixed_select_count(concurrent: bool):
+    small = count_cycle_selects(4, concurrent)
+    large = count_cycle_selects(40, concurrent)
+    # Active bots, their accounts (selectinload) and their open trades
+    assert len(small) == len(large) == 3, (len(small), len(large), large)
+
+def test_sequential_cycle_select_count():
+    check_fixed_select_count(concurrent=False)
+
+def test_concurrent_cycle_select_count():
+    check_fixed_select_count(concurrent=True)
+
+if __name__ == "__main__":
+    test_sequential_cycle_select_count()
+    test_concurrent_cycle_select_count()
+    print("engine query count tests passed")
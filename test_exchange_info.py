@@ -0,0 +1,100 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+from decimal import Decimal
+
+import httpx
+
+from app.services import async_binance_client
+from app.services.async_binance_client import AsyncBinanceTrader
+from app.services.exchange_info import ExchangeInfoCache, SymbolFilters, get_exchange_info
+
+BTCUSDT = {
+    'symbol': 'BTCUSDT',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'minPrice': '0.01', 'maxPrice': '1000000.00', 'tickSize': '0.01'},
+        {'filterType': 'LOT_SIZE', 'minQty': '0.00001', 'maxQty': '9000.0', 'stepSize': '0.00001'},
+        {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.0', 'maxQty': '100.0', 'stepSize': '0.0'},
+        {'filterType': 'NOTIONAL', 'minNotional': '5.0', 'applyMinToMarket': True, 'maxNotional': '9000000'},
+    ]
+}
+
+def test_parse_and_round():
+    filters = SymbolFilters.from_exchange_info(BTCUSDT)
+    assert filters.step_size == Decimal('0.00001') and filters.tick_size == Decimal('0.01')
+    assert filters.min_notional == Decimal('5.0')
+    # MARKET_LOT_SIZE with step 0 falls back to LOT_SIZE
+    assert filters.round_quantity(100 / 43210.987) == Decimal('0.00231')
+    assert filters.round_price(43210.987, 'BUY') == Decimal('43210.98')
+    assert filters.round_price(43210.981, 'SELL') == Decimal('43210.99')
+
+def test_check():
+    filters = SymbolFilters.from_exchange_info(BTCUSDT)
+    assert filters.check(Decimal('0.00231'), 43210.0) is None
+    assert 'LOT_SIZE' in filters.check(Decimal('0'), 43210.0)
+    assert 'minimum notional' in filters.check(Decimal('0.0001'), 43210.0)
+    assert 'PRICE_FILTER' in filters.check(Decimal('1'), Decimal('0.001'), market=False)
+    # Market orders without an expected price skip the notional check
+    assert filters.check(Decimal('0.0001'), None) is None
+
+def install_transport(handler):
+    async_binance_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def test_cache_loads_once_and_refreshes_in_background():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={'symbols': [BTCUSDT]})
+
+    async def scenario():
+        install_transport(handler)
+        cache = ExchangeInfoCache('https://exchange.test', ttl_seconds=3600)
+        results = await asyncio.gather(*(cache.get('BTCUSDT') for _ in range(5)))
+        assert all(r is not None for r in results)
+        assert await cache.get('ETHBTC') is None
+        assert calls == ['/api/v3/exchangeInfo']
+
+        # Stale: served from cache while one refresh runs behind it
+        cache.ttl_seconds = 0
+        assert await cache.get('BTCUSDT') is not None
+        await cache.get('BTCUSDT')
+        await asyncio.sleep(0.01)
+        await async_binance_client.close_http_client()
+        return cache.refreshes
+
+    assert asyncio.run(scenario()) == 2
+    assert len(calls) == 2
+
+def test_invalid_limit_order_never_reaches_exchange():
+    orders = []
+
+    def handler(request):
+        if request.url.path == '/api/v3/exchangeInfo':
+            return httpx.Response(200, json={'symbols': [BTCUSDT]})
+        orders.append(dict(request.url.params))
+        return httpx.Response(200, json={'orderId': 7})
+
+    async def scenario():
+        install_transport(handler)
+        get_exchange_info('https://live.test')._symbols.clear()
+        trader = AsyncBinanceTrader('key', 'secret')
+        trader.base_url = 'https://live.test'
+        rejected = await trader.place_limit_order('BTCUSDT', 'BUY', 0.0001, 43210.0)
+        placed = await trader.place_limit_order('BTCUSDT', 'BUY', 0.00231987, 43210.987)
+        await async_binance_client.close_http_client()
+        return rejected, placed
+
+    rejected, placed = asyncio.run(scenario())
+    assert not rejected['success'] and 'minimum notional' in rejected['error']
+    assert placed['success']
+    assert len(orders) == 1
+    assert orders[0]['quantity'] == '0.00231' and orders[0]['price'] == '43210.98'
+
+if __name__ == "__main__":
+    test_parse_and_round()
+    test_check()
+    test_cache_loads_once_and_refreshes_in_background()
+    test_invalid_limit_order_never_reaches_exchange()
+    print("exchange info tests passed")
@@ -0,0 +1,120 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+
+import httpx
+
+from app.services import async_binance_client, circuit_breaker
+from app.services.async_binance_client import AsyncBinanceTrader, send_request
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+def run_with_transport(handler, coro_factory):
+    async def scenario():
+        async_binance_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_factory()
+        finally:
+            await async_binance_client.close_http_client()
+
+    circuit_breaker._breakers.clear()
+    async_binance_client.RETRY_BASE_SECONDS = 0.001
+    return asyncio.run(scenario())
+
+def test_get_is_retried_until_it_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'price': '1.5'})
+
+    response = run_with_transport(handler, lambda: send_request('GET', 'https://retry.test', '/api/v3/ticker/price'))
+    assert response.status_code == 200 and len(calls) == 3
+    stats = circuit_breaker.breaker_stats()['retry.test']
+    assert stats['retries'] == 2 and stats['state'] == 'closed' and stats['consecutive_failures'] == 0
+
+def test_orders_are_sent_once():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        raise httpx.ConnectError("connection reset", request=request)
+
+    async def place():
+        trader = AsyncBinanceTrader('key', 'secret')
+        trader.base_url = 'https://order.test'
+        return await trader.cancel_order('BTCUSDT', 1)
+
+    result = run_with_transport(handler, place)
+    assert not result['success']
+    assert calls == ['DELETE']
+
+def test_breaker_fails_fast_then_probes():
+    calls = []
+    healthy = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if healthy:
+            return httpx.Response(200, json=[])
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    async def scenario():
+        breaker = circuit_breaker.get_circuit_breaker('https://down.test')
+        breaker.failure_threshold = 3
+        breaker.reset_seconds = 0.05
+        trader = AsyncBinanceTrader('key', 'secret')
+        trader.base_url = 'https://down.test'
+
+        # Three attempts of one GET open the breaker
+        assert (await trader.get_historical_klines('BTCUSDT')).empty
+        assert breaker.state == CircuitBreaker.OPEN
+        sent = len(calls)
+        try:
+            await send_request('GET', 'https://down.test', '/api/v3/klines')
+            raise AssertionError("expected CircuitOpenError")
+        except CircuitOpenError:
+            pass
+        assert len(calls) == sent and breaker.rejected == 1
+
+        # After the reset period one probe goes through and closes it
+        await asyncio.sleep(0.06)
+        healthy.append(True)
+        response = await send_request('GET', 'https://down.test', '/api/v3/klines')
+        assert response.status_code == 200
+        return breaker.stats()
+
+    stats = run_with_transport(handler, scenario)
+    assert stats['state'] == 'closed' and stats['times_opened'] == 1
+
+def test_half_open_failure_reopens():
+    breaker = CircuitBreaker('host', failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    # Only one probe while half open
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.times_opened == 2
+
+def test_no_mock_candles_by_default():
+    def handler(request):
+        return httpx.Response(502)
+
+    async def fetch():
+        trader = AsyncBinanceTrader('key', 'secret', testnet=True)
+        trader.base_url = 'https://public.test'
+        return await trader.get_historical_klines('BTCUSDT')
+
+    assert not async_binance_client.MOCK_FALLBACK
+    assert run_with_transport(handler, fetch).empty
+
+if __name__ == "__main__":
+    test_get_is_retried_until_it_succeeds()
+    test_orders_are_sent_once()
+    test_breaker_fails_fast_then_probes()
+    test_half_open_failure_reopens()
+    test_no_mock_candles_by_default()
+    print("exchange resilience tests passed")
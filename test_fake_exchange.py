@@ -0,0 +1,78 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+
+from app.services import async_binance_client
+from app.services.async_binance_client import AsyncBinanceTrader, close_http_client
+from app.services.fake_exchange import FakeExchange, install_fake_exchange
+from app.services.rate_limiter import get_rate_limiter
+
+NOW = 1_750_000_000.0
+
+def run(exchange: FakeExchange, coro_factory):
+    async def scenario():
+        install_fake_exchange(exchange)
+        try:
+            return await coro_factory()
+        finally:
+            await close_http_client()
+    return asyncio.run(scenario())
+
+def test_klines_follow_one_price_path():
+    exchange = FakeExchange(clock=lambda: NOW)
+    hourly = exchange.klines('BTCUSDT', '1h', 5)
+    minutes = exchange.klines('BTCUSDT', '1m', 1000)
+    assert len(hourly) == 5 and len(minutes) == 1000
+    # The open hour aggregates the minutes since it opened
+    open_hour = hourly[-1]
+    in_hour = [row for row in minutes if row[0] >= open_hour[0]]
+    assert float(open_hour[2]) >= max(float(row[2]) for row in in_hour)
+    assert float(open_hour[3]) <= min(float(row[3]) for row in in_hour)
+    assert open_hour[4] == minutes[-1][4] == f"{exchange.price('BTCUSDT'):.2f}"
+    assert exchange.price('BTCUSDT') == 95000.0
+    # startTime pages forward from a candle
+    page = exchange.klines('BTCUSDT', '1h', 2, start_time=hourly[1][0])
+    assert [row[0] for row in page] == [hourly[1][0], hourly[2][0]]
+
+def test_orders_balances_and_headers():
+    exchange = FakeExchange(clock=lambda: NOW)
+
+    async def scenario():
+        trader = AsyncBinanceTrader('key', 'secret')
+        bought = await trader.place_market_order('ETHUSDT', 'BUY', 0.1)
+        rejected = await trader.place_market_order('ETHUSDT', 'SELL', 5.0)
+        resting = await trader.place_limit_order('ETHUSDT', 'SELL', 0.05, 3600.0)
+        status = await trader.get_order_status('ETHUSDT', resting['order_id'])
+        cancelled = await trader.cancel_order('ETHUSDT', resting['order_id'])
+        balances = await trader.get_account_balance()
+        return bought, rejected, status, cancelled, balances
+
+    bought, rejected, status, cancelled, balances = run(exchange, scenario)
+    assert bought['success'] and bought['price'] == 3500.0 and bought['quantity'] == 0.1
+    assert not rejected['success'] and 'insufficient balance' in rejected['error']
+    assert status['status'] == 'NEW' and cancelled['result']['status'] == 'CANCELED'
+    assert balances['ETH']['free'] == 0.1 and balances['ETH']['locked'] == 0.0
+    assert balances['USDT']['total'] == 1_000_000.0 - 350.0
+    limiter = get_rate_limiter(async_binance_client.BINANCE_API_URL)
+    assert limiter.used_weight == exchange.stats()['used_weight_1m']
+
+def test_injected_errors_are_retried():
+    exchange = FakeExchange(clock=lambda: NOW, error_rate=0.3, seed=4)
+
+    async def scenario():
+        trader = AsyncBinanceTrader('key', 'secret', testnet=True)
+        frames = [await trader.get_historical_klines('SOLUSDT', '1h', 50) for _ in range(20)]
+        return sum(1 for df in frames if len(df) == 50)
+
+    async_binance_client.RETRY_BASE_SECONDS = 0.001
+    fetched = run(exchange, scenario)
+    assert exchange.errors_injected > 0
+    # Three attempts at 30% errors: nearly every fetch gets through
+    assert fetched >= 18, fetched
+
+if __name__ == "__main__":
+    test_klines_follow_one_price_path()
+    test_orders_balances_and_headers()
+    test_injected_errors_are_retried()
+    print("fake exchange tests passed")
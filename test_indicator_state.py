@@ -0,0 +1,121 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import numpy as np
+import pandas as pd
+
+from app.strategies import indicator_state
+from app.strategies.indicator_state import IndicatorState, get_indicator_state
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+COLUMNS = ['rsi', 'ma_20', 'ma_50', 'volume_ma', 'price_to_ma_pct', 'volume_ratio']
+
+def make_candles(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'open': close,
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def assert_close(streamed: dict, expected: pd.Series, tol: float):
+    for col in COLUMNS:
+        if np.isnan(expected[col]):
+            assert np.isnan(streamed[col]), col
+        else:
+            assert abs(streamed[col] - expected[col]) <= tol, (col, streamed[col], expected[col])
+
+def test_streaming_matches_ta_on_full_history():
+    """Seed once, then feed one candle per call; every step must match ta."""
+    df = make_candles(400)
+    strategy = MeanReversionStrategy()
+    expected = strategy.calculate_indicators(df)
+    state = IndicatorState(strategy.rsi_period, strategy.ma_period)
+
+    for end in range(100, len(df) + 1):
+        streamed = state.sync(df.iloc[:end])
+        assert_close(streamed, expected.iloc[end - 1], 1e-8)
+
+def test_streaming_tracks_sliding_window():
+    """
+    The engine hands over the latest 100 candles each cycle. ta restarts its
+    RSI average at the window start, so allow a small RSI tolerance there.
+    """
+    df = make_candles(400, seed=11)
+    strategy = MeanReversionStrategy()
+    state = IndicatorState(strategy.rsi_period, strategy.ma_period)
+
+    for end in range(100, len(df) + 1):
+        window = df.iloc[end - 100:end].reset_index(drop=True)
+        streamed = state.sync(window)
+        expected = strategy.calculate_indicators(window).iloc[-1]
+        assert abs(streamed['rsi'] - expected['rsi']) < 0.05
+        for col in COLUMNS[1:]:
+            assert abs(streamed[col] - expected[col]) <= 1e-8 * max(1.0, abs(expected[col])), col
+
+def test_resync_after_gap_reseeds():
+    df = make_candles(300)
+    strategy = MeanReversionStrategy()
+    state = IndicatorState(strategy.rsi_period, strategy.ma_period)
+    state.sync(df.iloc[:120])
+
+    later = df.iloc[200:].reset_index(drop=True)
+    streamed = state.sync(later)
+    assert_close(streamed, strategy.calculate_indicators(later).iloc[-1], 1e-8)
+
+def test_signal_matches_with_and_without_state():
+    df = make_candles(150)
+    strategy = MeanReversionStrategy()
+    state = IndicatorState(strategy.rsi_period, strategy.ma_period)
+    with_state = strategy.generate_signal(df, state)
+    without_state = strategy.generate_signal(df)
+    assert with_state['signal'] == without_state['signal']
+    for key, value in without_state['indicators'].items():
+        assert abs(with_state['indicators'][key] - value) < 1e-8
+
+def test_venues_keep_their_own_state():
+    """Same symbol and candle times on two venues, at different prices."""
+    us = make_candles(300)
+    com = us.copy()
+    com[['open', 'high', 'low', 'close']] *= 3.0
+    strategy = MeanReversionStrategy()
+    expected = {'us': strategy.calculate_indicators(us), 'com': strategy.calculate_indicators(com)}
+    frames = {'us': us, 'com': com}
+    indicator_state._states.clear()
+
+    for end in range(100, len(us) + 1, 20):
+        for venue in ('us', 'com'):
+            state = strategy.indicator_state(f"https://{venue}.test", 'BTCUSDT', '1h')
+            assert_close(state.sync(frames[venue].iloc[:end]), expected[venue].iloc[end - 1], 1e-8)
+    assert strategy.indicator_state('https://us.test', 'BTCUSDT', '1h') is not \
+        strategy.indicator_state('https://com.test', 'BTCUSDT', '1h')
+
+def test_states_are_bounded():
+    original = indicator_state.INDICATOR_STATE_CACHE_SIZE
+    indicator_state.INDICATOR_STATE_CACHE_SIZE = 2
+    indicator_state._states.clear()
+    try:
+        first = get_indicator_state('https://us.test', 'BTCUSDT', '1h', 14, 20)
+        get_indicator_state('https://us.test', 'ETHUSDT', '1h', 14, 20)
+        # Using the first state again keeps it over the second
+        assert get_indicator_state('https://us.test', 'BTCUSDT', '1h', 14, 20) is first
+        get_indicator_state('https://us.test', 'SOLUSDT', '1h', 14, 20)
+        assert len(indicator_state._states) == 2
+        assert ('https://us.test', 'ETHUSDT', '1h', 14, 20, 50) not in indicator_state._states
+        assert get_indicator_state('https://us.test', 'BTCUSDT', '1h', 14, 20) is first
+    finally:
+        indicator_state.INDICATOR_STATE_CACHE_SIZE = original
+        indicator_state._states.clear()
+
+if __name__ == "__main__":
+    test_streaming_matches_ta_on_full_history()
+    test_streaming_tracks_sliding_window()
+    test_resync_after_gap_reseeds()
+    test_signal_matches_with_and_without_state()
+    test_venues_keep_their_own_state()
+    test_states_are_bounded()
+    print("All indicator state tests passed")
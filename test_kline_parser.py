@@ -0,0 +1,58 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import numpy as np
+import pandas as pd
+
+from app.services.binance_client import klines_to_dataframe
+from app.services.kline_parser import parse_klines
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+
+def make_response(n: int) -> list:
+    """Rows shaped like a /api/v3/klines response."""
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return [[
+        1700000000000 + i * 3600000,
+        f"{close[i] * 0.999:.8f}", f"{close[i] * 1.01:.8f}", f"{close[i] * 0.99:.8f}",
+        f"{close[i]:.8f}", f"{rng.uniform(1, 1000):.8f}",
+        1700003599999 + i * 3600000, "1234.56780000", 100, "6.10000000", "600.20000000", "0"
+    ] for i in range(n)]
+
+def pandas_parse(raw: list) -> pd.DataFrame:
+    """The DataFrame conversion get_historical_klines used before the typed parser."""
+    df = pd.DataFrame(raw, columns=KLINE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = df[col].astype(float)
+    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
+def test_parse_matches_the_pandas_path():
+    raw = make_response(500)
+    klines = parse_klines(raw)
+    assert len(klines) == 500 and not klines.empty
+    assert klines.timestamp.dtype == np.int64 and klines.close.dtype == np.float64
+    assert klines.timestamp[0] == 1700000000000
+    assert klines.close[-1] == float(raw[-1][4]) and klines.volume[7] == float(raw[7][5])
+    # Columns are contiguous views of one block
+    assert klines.close.flags['C_CONTIGUOUS'] and klines.nbytes == 500 * 8 * 6
+
+    pd.testing.assert_frame_equal(klines.to_frame(), pandas_parse(raw), check_dtype=True)
+    pd.testing.assert_frame_equal(klines_to_dataframe(raw), pandas_parse(raw))
+    assert klines.to_frame() is klines.to_frame()
+
+def test_empty_response():
+    klines = parse_klines([])
+    assert klines.empty and len(klines) == 0
+    frame = klines.to_frame()
+    assert frame.empty and list(frame.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+if __name__ == "__main__":
+    test_parse_matches_the_pandas_path()
+    test_empty_response()
+    print("kline parser tests passed")
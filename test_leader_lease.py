@@ -0,0 +1,122 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import User, BinanceAccount, BotConfig, BotCycleClaim, BotStatus, LeaderLease, TradingStrategy
+from app.services import leader_lease
+from app.services.leader_lease import (
+    claim_bot_slots, claim_bots, prune_cycle_claims, release_lease, try_acquire_lease
+)
+
+logging.disable(logging.INFO)
+
+def make_session_factory(n_bots: int = 0):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='lease@test', username='lease', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s', testnet=True)
+    db.add(account)
+    db.flush()
+    for i in range(n_bots):
+        db.add(BotConfig(user_id=user.id, binance_account_id=account.id, name=f'bot{i}',
+                         strategy=TradingStrategy.MEAN_REVERSION, symbol='BTCUSDT', trade_amount_usdt=100,
+                         status=BotStatus.ACTIVE, total_trades=0, total_profit_usdt=0.0, win_rate=0.0))
+    db.commit()
+    db.close()
+    return Session
+
+def test_lease_is_taken_over_after_expiry():
+    Session = make_session_factory()
+    db = Session()
+    assert try_acquire_lease(db, holder='a', ttl_seconds=60)
+    assert not try_acquire_lease(db, holder='b', ttl_seconds=60)
+    # Renewing our own lease keeps it
+    assert try_acquire_lease(db, holder='a', ttl_seconds=60)
+
+    db.query(LeaderLease).update({LeaderLease.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert try_acquire_lease(db, holder='b', ttl_seconds=60)
+    assert not try_acquire_lease(db, holder='a', ttl_seconds=60)
+    assert db.query(LeaderLease.holder).scalar() == 'b'
+
+    # Releasing hands it over without waiting for the TTL
+    release_lease(db, holder='b')
+    assert try_acquire_lease(db, holder='a', ttl_seconds=60)
+    db.close()
+
+def test_claims_split_bots_between_replicas():
+    Session = make_session_factory(n_bots=5)
+    first, second = Session(), Session()
+    statements = []
+
+    @event.listens_for(first, 'do_orm_execute')
+    def capture(state):
+        if state.is_select:
+            statements.append(state.statement)
+
+    a = claim_bots(first, 'cycle-1', limit=3, holder='a')
+    b = claim_bots(second, 'cycle-1', limit=3, holder='b')
+    assert len(a) == 3 and len(b) == 2 and not set(a) & set(b)
+    assert claim_bots(first, 'cycle-1', holder='a') == []
+    # A new cycle starts over
+    assert len(claim_bots(second, 'cycle-2', limit=10, holder='b')) == 5
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert 'FOR UPDATE SKIP LOCKED' in sql
+
+    # Slot claims: the bot goes to whichever replica records it first
+    assert claim_bot_slots(first, a, 'slot-1', holder='a') == a
+    assert claim_bot_slots(second, a + b, 'slot-1', holder='b') == b
+    first.close()
+    second.close()
+
+def test_old_claims_are_pruned():
+    Session = make_session_factory(n_bots=3)
+    db = Session()
+    claim_bots(db, 'old-cycle', holder='a')
+    db.query(BotCycleClaim).update({BotCycleClaim.claimed_at: datetime.utcnow() - timedelta(hours=4)})
+    db.commit()
+    claim_bots(db, 'new-cycle', holder='a')
+
+    assert prune_cycle_claims(db, retention_seconds=3 * 3600) == 3
+    assert {key for key, in db.query(BotCycleClaim.cycle_key)} == {'new-cycle'}
+    db.close()
+
+    # The heartbeat prunes in claim mode, and in leader mode only on the lease holder
+    original = leader_lease.SessionLocal, leader_lease.TRADING_CYCLE_MODE
+    leader_lease.SessionLocal = Session
+    try:
+        db = Session()
+        db.add(LeaderLease(name=leader_lease.TRADING_CYCLE_LEASE, holder='other-replica',
+                           expires_at=datetime.utcnow() + timedelta(seconds=60)))
+        db.query(BotCycleClaim).update({BotCycleClaim.claimed_at: datetime.utcnow() - timedelta(hours=4)})
+        db.commit()
+
+        leader_lease.TRADING_CYCLE_MODE = 'leader'
+        leader_lease.renew_leader_lease()
+        assert db.query(BotCycleClaim).count() == 3
+
+        leader_lease.TRADING_CYCLE_MODE = 'claim'
+        leader_lease.renew_leader_lease()
+        assert db.query(BotCycleClaim).count() == 0
+        db.close()
+    finally:
+        leader_lease.SessionLocal, leader_lease.TRADING_CYCLE_MODE = original
+
+if __name__ == "__main__":
+    test_lease_is_taken_over_after_expiry()
+    test_claims_split_bots_between_replicas()
+    test_old_claims_are_pruned()
+    print("leader lease tests passed")
@@ -0,0 +1,46 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.services import market_data
+from app.services.async_binance_client import BINANCE_API_URL, BINANCE_PUBLIC_API_URL
+from app.services.market_data import MarketDataSnapshot, kline_key
+
+logging.disable(logging.INFO)
+
+def make_bot(bot_id: int, testnet: bool, symbol: str = 'BTCUSDT', account_id: int = None):
+    account = SimpleNamespace(id=account_id or (1 if testnet else 2), testnet=testnet, is_active=True)
+    return SimpleNamespace(id=bot_id, symbol=symbol, config_params={}, binance_account=account)
+
+def test_prefetch_groups_by_venue():
+    fetched = []
+
+    async def fake_get_klines(trader, symbol, interval, limit, session_factory):
+        fetched.append((trader.base_url, symbol))
+        return pd.DataFrame({'close': [1.0 if trader.testnet else 2.0]})
+
+    originals = market_data.get_trader, market_data.get_klines
+    market_data.get_trader = lambda account: SimpleNamespace(
+        testnet=account.testnet, base_url=BINANCE_PUBLIC_API_URL if account.testnet else BINANCE_API_URL
+    )
+    market_data.get_klines = fake_get_klines
+    try:
+        paper, paper_too, live = make_bot(1, True), make_bot(2, True, account_id=3), make_bot(3, False)
+        snapshot = asyncio.run(MarketDataSnapshot.prefetch([paper, paper_too, live], session_factory=None))
+    finally:
+        market_data.get_trader, market_data.get_klines = originals
+
+    # One fetch per venue, each with an account on that venue
+    assert sorted(fetched) == sorted([(BINANCE_PUBLIC_API_URL, 'BTCUSDT'), (BINANCE_API_URL, 'BTCUSDT')])
+    assert kline_key(paper) == kline_key(paper_too) != kline_key(live)
+    assert snapshot.get_klines(kline_key(paper))['close'].iloc[0] == 1.0
+    assert snapshot.get_klines(kline_key(live))['close'].iloc[0] == 2.0
+
+if __name__ == "__main__":
+    test_prefetch_groups_by_venue()
+    print("market data tests passed")
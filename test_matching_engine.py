@@ -0,0 +1,173 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.async_binance_client import AsyncBinanceTrader, close_http_client
+from app.services.backtest import run_backtest
+from app.services.fake_exchange import FakeExchange, install_fake_exchange
+from app.models.models import BinanceAccount
+from app.services.matching_engine import (
+    CANCELED, EXPIRED, FILLED, PAPER_STARTING_BALANCE, PARTIALLY_FILLED, DepthModel, FeeSchedule,
+    MatchingEngine, SimulationError
+)
+from app.services.trader_pool import TraderPool
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+NOW = 1_750_000_000.0
+
+def make_engine(**kwargs) -> MatchingEngine:
+    engine = MatchingEngine(fees=FeeSchedule(maker_rate=0.0005, taker_rate=0.001),
+                            depth=DepthModel(spread_bps=2, level_bps=1, level_notional=10_000, levels=5),
+                            clock=lambda: NOW, **kwargs)
+    engine.open_account('a', {'USDT': 100_000.0, 'BTC': 1.0})
+    engine.update_price('BTCUSDT', 100.0)
+    return engine
+
+def test_market_orders_walk_depth():
+    engine = make_engine()
+    small = engine.place_order('BTCUSDT', 'BUY', 'MARKET', 10.0, account='a')
+    assert small.status == FILLED and abs(small.average_price - 100.01) < 1e-9
+    assert abs(small.commission - 0.001 * small.quote) < 1e-12
+    assert abs(engine.free('a', 'USDT') - (100_000.0 - small.quote - small.commission)) < 1e-6
+
+    # 250 BTC is ~2.5 levels of 10k USDT: a worse average than the first level
+    large = engine.place_order('BTCUSDT', 'BUY', 'MARKET', 250.0, account='a')
+    assert large.status == FILLED and len(large.fills) == 3 and 100.01 < large.average_price < 100.03
+    # Deeper than the five modelled levels: the rest expires
+    huge = engine.place_order('BTCUSDT', 'SELL', 'MARKET', 1000.0)
+    assert huge.status == EXPIRED and 0 < huge.executed < 1000.0
+
+def test_resting_orders_match_by_price_then_time():
+    engine = make_engine(participation_rate=0.5)
+    first = engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 2.0, 99.0, account='a')
+    second = engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 2.0, 99.0, account='a')
+    better = engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 1.0, 99.5, account='a')
+    ask = engine.place_order('BTCUSDT', 'SELL', 'LIMIT', 0.5, 101.0, account='a')
+    assert engine.balances('a')['USDT']['locked'] > 0 and engine.balances('a')['BTC']['locked'] == 0.5
+    assert engine.update_price('BTCUSDT', 99.8) == []
+
+    # 8 traded, half available: the best bid fills, then the orders at 99 in time order
+    touched = engine.update_price('BTCUSDT', 99.0, volume=8.0)
+    assert touched == [better, first, second]
+    assert better.status == FILLED and first.status == FILLED
+    assert second.status == PARTIALLY_FILLED and second.executed == 1.0
+    assert better.average_price == 99.5 and abs(first.commission - 0.0005 * 2 * 99.0) < 1e-12
+
+    # A candle whose high reaches the ask fills it
+    engine.update_candle('BTCUSDT', high=101.2, low=99.9, close=100.0)
+    assert ask.status == FILLED and engine.balances('a')['BTC']['locked'] == 0.0
+
+    before = engine.balances('a')['USDT']
+    engine.cancel_order(second.order_id, account='a')
+    after = engine.balances('a')['USDT']
+    assert second.status == CANCELED and after['locked'] < 1e-9
+    assert abs(after['total'] - before['total']) < 1e-9
+    try:
+        engine.cancel_order(second.order_id, account='a')
+        raise AssertionError("expected SimulationError")
+    except SimulationError:
+        pass
+
+def test_crossing_limit_takes_then_rests():
+    engine = make_engine()
+    order = engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 150.0, 100.015, account='a')
+    # Only the first ask level (100.01, 10k USDT) is within the limit
+    assert order.status == PARTIALLY_FILLED and abs(order.executed - 10_000 / 100.01) < 1e-9
+    assert len(engine.open_orders('BTCUSDT')) == 1
+    try:
+        engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 10_000.0, 99.0, account='a')
+        raise AssertionError("expected SimulationError")
+    except SimulationError as e:
+        assert 'Insufficient USDT' in str(e)
+
+def test_paper_trader_runs_on_the_engine():
+    exchange = FakeExchange(clock=lambda: NOW)
+
+    async def scenario():
+        install_fake_exchange(exchange)
+        try:
+            trader = AsyncBinanceTrader('paper-key', 'secret', testnet=True)
+            trader.paper_balance = 1000.0
+            bought = await trader.place_market_order('ETHUSDT', 'BUY', 0.1)
+            resting = await trader.place_limit_order('ETHUSDT', 'BUY', 0.1, 3000.0)
+            status = await trader.get_order_status('ETHUSDT', resting['order_id'])
+            locked = (await trader.get_account_balance())['USDT']['locked']
+            cancelled = await trader.cancel_order('ETHUSDT', resting['order_id'])
+            return trader, bought, status, locked, cancelled
+        finally:
+            await close_http_client()
+
+    trader, bought, status, locked, cancelled = asyncio.run(scenario())
+    assert bought['success'] and bought['price'] > 3500.0 and bought['commission'] > 0
+    assert abs(trader.paper_balance - (1000.0 - bought['quote_quantity'] - bought['commission'])) < 1e-9
+    assert status['status'] == 'NEW' and locked > 300.0
+    assert cancelled['success'] and cancelled['result']['status'] == 'CANCELED'
+    # Nothing reached the exchange's order endpoint
+    assert exchange.stats()['requests'].get('/api/v3/order', 0) == 0
+
+def test_pool_seeds_paper_balance():
+    pool = TraderPool()
+    account = BinanceAccount(id=1, api_key='seed-key', api_secret='s', testnet=True, balance_usdt=None)
+    # A new paper account starts with the default balance instead of None
+    assert pool.get(account).paper_balance == PAPER_STARTING_BALANCE
+    account.balance_usdt = 250.0
+    assert pool.get(account).paper_balance == 250.0
+
+def make_candles(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def test_backtest_on_the_engine():
+    df = make_candles(10_000)
+    strategy = MeanReversionStrategy({'force_test_buy': False})
+    plain = run_backtest(strategy, df, fee_rate=0.001, interval='1m')
+    # No spread and one price level: fills at the close, as without the engine
+    flat = MatchingEngine(fees=FeeSchedule(0.001, 0.001), depth=DepthModel(spread_bps=0, level_bps=0))
+    same = run_backtest(strategy, df, interval='1m', engine=flat)
+    assert len(plain.trades) > 10
+    assert np.allclose(plain.trades['profit_loss_usdt'], same.trades['profit_loss_usdt'])
+
+    slipped = run_backtest(strategy, df, fee_rate=0.001, interval='1m', engine=MatchingEngine())
+    assert slipped.stats['net_profit_usdt'] < plain.stats['net_profit_usdt']
+    assert (slipped.trades['entry_price'] > df['close'].to_numpy()[slipped.trades['entry_index']]).all()
+
+def test_finished_orders_are_capped():
+    engine = make_engine(max_finished_orders=3)
+    resting = engine.place_order('BTCUSDT', 'BUY', 'LIMIT', 0.1, 90.0, 'a')
+    filled = [engine.place_order('BTCUSDT', 'BUY', 'MARKET', 0.01, account='a') for _ in range(4)]
+    # Beyond the modelled depth: expires part filled
+    expired = engine.place_order('BTCUSDT', 'SELL', 'MARKET', 1000.0)
+    canceled = engine.place_order('BTCUSDT', 'SELL', 'LIMIT', 0.1, 110.0, 'a')
+    engine.cancel_order(canceled.order_id, 'a')
+    assert (filled[-1].status, expired.status) == (FILLED, EXPIRED)
+
+    # The three most recent finished orders, and every open one
+    assert set(engine.orders) == {resting.order_id, filled[-1].order_id, expired.order_id, canceled.order_id}
+    assert engine.get_order(resting.order_id, 'a').is_open
+    try:
+        engine.get_order(filled[0].order_id, 'a')
+        raise AssertionError("pruned order still found")
+    except SimulationError:
+        pass
+
+if __name__ == "__main__":
+    test_market_orders_walk_depth()
+    test_resting_orders_match_by_price_then_time()
+    test_crossing_limit_takes_then_rests()
+    test_paper_trader_runs_on_the_engine()
+    test_pool_seeds_paper_balance()
+    test_backtest_on_the_engine()
+    test_finished_orders_are_capped()
+    print("matching engine tests passed")
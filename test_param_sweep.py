@@ -0,0 +1,63 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.services.param_sweep import grid_params, random_params, run_sweep
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+SPACE = {
+    'rsi_period': [7, 14],
+    'rsi_oversold': [30, 45],
+    'price_deviation': [0.5, 1.0],
+    'stop_loss_percent': [1.0, 2.0]
+}
+
+def make_candles(n: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': np.concatenate([[100.0], close[:-1]]),
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def test_grid_and_random_params():
+    grid = grid_params(SPACE)
+    assert len(grid) == 16 and len({tuple(combo.items()) for combo in grid}) == 16
+    sample = random_params(SPACE, 10, seed=3)
+    assert len(sample) == 10 and all(combo in grid for combo in sample)
+    assert len({tuple(combo.items()) for combo in sample}) == 10
+    assert len(random_params(SPACE, 100, seed=3)) == 16
+
+def test_parallel_sweep_matches_single_backtests():
+    df = make_candles(5_000)
+    combos = grid_params(SPACE)
+    serial = run_sweep(df, combos, workers=1, interval='1m')
+    parallel = run_sweep(df, combos, workers=3, interval='1m')
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    # Ranked best Sharpe first, and each row is a plain run_backtest
+    assert list(serial.index) == list(range(1, 17))
+    traded = serial[serial['trades'] >= 1]
+    assert traded['sharpe'].is_monotonic_decreasing
+    best = serial.iloc[0]
+    config = {name: best[name] for name in SPACE if name != 'stop_loss_percent'}
+    expected = run_backtest(MeanReversionStrategy({**config, 'force_test_buy': False}), df,
+                            stop_loss_percent=best['stop_loss_percent'], interval='1m')
+    assert expected.stats['trades'] == best['trades']
+    assert abs(expected.stats['sharpe'] - best['sharpe']) < 1e-12
+
+if __name__ == "__main__":
+    test_grid_and_random_params()
+    test_parallel_sweep_matches_single_backtests()
+    print("param sweep tests passed")
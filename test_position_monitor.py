@@ -0,0 +1,124 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+
+import numpy as np
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services import exit_evaluator
+from app.services.exit_evaluator import OpenPositions
+from app.services.position_monitor import ExitIndex, ExitLevels, PositionMonitor, QueuePriceStream
+
+class FakeTrader:
+    def __init__(self):
+        self.orders = []
+
+    async def place_market_order(self, symbol, side, quantity):
+        self.orders.append((symbol, side, quantity))
+        return {'success': True, 'order_id': len(self.orders), 'price': None, 'quantity': quantity}
+
+def make_session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='monitor@test', username='monitor', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s',
+                             testnet=True, balance_usdt=1000.0)
+    db.add(account)
+    db.flush()
+    for i, symbol in enumerate(['BTCUSDT', 'BTCUSDT', 'ETHUSDT']):
+        bot = BotConfig(user_id=user.id, binance_account_id=account.id, name=f'bot{i}',
+                        strategy=TradingStrategy.MEAN_REVERSION, symbol=symbol, trade_amount_usdt=100,
+                        stop_loss_percent=3.0, take_profit_percent=5.0, status=BotStatus.ACTIVE,
+                        total_trades=1, total_profit_usdt=0.0, win_rate=0.0)
+        db.add(bot)
+        db.flush()
+        entry_price = 190.0 if i == 0 else 200.0
+        db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol=symbol, side=OrderSide.BUY,
+                     entry_price=entry_price, quantity=1.0, amount_usdt=entry_price,
+                     status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+    return Session
+
+def test_exit_index_crossing():
+    index = ExitIndex()
+    index.add(ExitLevels(1, 'BTCUSDT', stop_loss=97.0, take_profit=105.0))
+    index.add(ExitLevels(2, 'BTCUSDT', stop_loss=95.0, take_profit=115.0))
+    index.add(ExitLevels(3, 'ETHUSDT', stop_loss=9.7, take_profit=10.5))
+
+    # 106 is above trade 1's target and inside trade 2's band
+    hits = index.crossed('BTCUSDT', 106.0)
+    assert [(levels.trade_id, reason) for levels, reason in hits] == [(1, 'TAKE_PROFIT')]
+    assert index.crossed('BTCUSDT', 106.0) == []
+    hits = index.crossed('BTCUSDT', 95.0)
+    assert [(levels.trade_id, reason) for levels, reason in hits] == [(2, 'STOP_LOSS')]
+    assert len(index) == 1 and index.symbols() == {'ETHUSDT'}
+
+    index.remove(3)
+    assert len(index) == 0 and index.crossed('ETHUSDT', 1.0) == []
+
+def test_open_positions_evaluate():
+    entry = np.array([100.0, 100.0, 200.0, 10.0])
+    positions = OpenPositions([11, 12, 13, 14], [1, 2, 3, 4], ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'],
+                              [0, 0, 1, 2], entry, entry * 0.97, entry * 1.05)
+
+    decisions = positions.evaluate({'BTCUSDT': 96.0, 'ETHUSDT': 211.0})
+    assert [(d.trade_id, d.reason, d.price) for d in decisions] == [
+        (11, 'STOP_LOSS', 96.0), (12, 'STOP_LOSS', 96.0), (13, 'TAKE_PROFIT', 211.0)
+    ]
+    # No price for SOLUSDT: trade 14 is left alone
+    assert positions.evaluate({'BTCUSDT': 100.0, 'ETHUSDT': 200.0}) == []
+
+def test_monitor_sells_on_crossing_tick():
+    Session = make_session_factory()
+    trader = FakeTrader()
+    original_get_trader = exit_evaluator.get_trader
+    exit_evaluator.get_trader = lambda account: trader
+
+    async def scenario():
+        stream = QueuePriceStream()
+        monitor = PositionMonitor(stream, Session, refresh_seconds=3600, use_lease=False)
+        monitor.refresh()
+        assert len(monitor.index) == 3
+
+        task = asyncio.create_task(monitor.run())
+        stream.push('BTCUSDT', 196.0)   # inside both BTC bands
+        stream.push('BTCUSDT', 200.0)   # trade 1 take-profit (199.5)
+        stream.push('BTCUSDT', 190.0)   # trade 2 stop-loss (194)
+        stream.push('ETHUSDT', 205.0)   # inside the band
+        stream.close()
+        await task
+        return monitor
+
+    try:
+        monitor = asyncio.run(scenario())
+    finally:
+        exit_evaluator.get_trader = original_get_trader
+    assert monitor.exits == 2
+    assert len(monitor.index) == 1
+
+    db = Session()
+    trades = {t.id: t for t in db.query(Trade).all()}
+    assert trades[1].exit_reason == 'TAKE_PROFIT' and trades[1].exit_price == 200.0
+    assert trades[2].exit_reason == 'STOP_LOSS' and trades[2].profit_loss_usdt == -10.0
+    assert trades[3].exit_price is None
+    assert sorted(trader.orders) == [('BTCUSDT', 'SELL', 1.0), ('BTCUSDT', 'SELL', 1.0)]
+    db.close()
+
+if __name__ == "__main__":
+    test_exit_index_crossing()
+    test_open_positions_evaluate()
+    test_monitor_sells_on_crossing_tick()
+    print("position monitor tests passed")
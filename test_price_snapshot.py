@@ -0,0 +1,121 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services import async_binance_client, circuit_breaker, exit_evaluator, price_snapshot
+from app.services.async_binance_client import BINANCE_API_URL, BINANCE_PUBLIC_API_URL
+from app.services.price_snapshot import PriceSnapshot, get_price_snapshot
+
+logging.disable(logging.INFO)
+
+def run_with_transport(handler, coro_factory):
+    async def scenario():
+        async_binance_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_factory()
+        finally:
+            await async_binance_client.close_http_client()
+
+    circuit_breaker._breakers.clear()
+    price_snapshot._snapshots.clear()
+    return asyncio.run(scenario())
+
+def test_stale_prices_expire():
+    up = [True]
+
+    def handler(request):
+        if up[0]:
+            return httpx.Response(200, json=[{'symbol': 'BTCUSDT', 'price': '100.0'}])
+        return httpx.Response(400, json={'code': -1, 'msg': 'down'})
+
+    async def scenario():
+        snapshot = PriceSnapshot('https://prices.test', ttl_seconds=0.0, max_age_seconds=0.05)
+        assert await snapshot.get_price('BTCUSDT') == 100.0
+        up[0] = False
+        # Refresh fails: recent prices are still served...
+        assert await snapshot.get_price('BTCUSDT') == 100.0
+        await asyncio.sleep(0.06)
+        # ...but not once they are older than the maximum age
+        assert await snapshot.get_price('BTCUSDT') is None
+        return snapshot.refreshes
+
+    assert run_with_transport(handler, scenario) == 1
+
+def test_one_snapshot_per_venue():
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        price = '100.0' if request.url.host == httpx.URL(BINANCE_PUBLIC_API_URL).host else '101.0'
+        return httpx.Response(200, json=[{'symbol': 'BTCUSDT', 'price': price}])
+
+    async def scenario():
+        assert get_price_snapshot(BINANCE_API_URL) is get_price_snapshot(BINANCE_API_URL)
+        return (await get_price_snapshot(BINANCE_PUBLIC_API_URL).get_price('BTCUSDT'),
+                await get_price_snapshot(BINANCE_API_URL).get_price('BTCUSDT'))
+
+    assert run_with_transport(handler, scenario) == (100.0, 101.0)
+    assert len(set(hosts)) == 2
+
+def test_exit_checks_price_each_venue_on_its_own_snapshot():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='venues@test', username='venues', hashed_password='x')
+    db.add(user)
+    db.flush()
+    for testnet in (True, False):
+        account = BinanceAccount(user_id=user.id, name=f'acct{testnet}', api_key='k', api_secret='s',
+                                 testnet=testnet, balance_usdt=1000.0)
+        db.add(account)
+        db.flush()
+        bot = BotConfig(user_id=user.id, binance_account_id=account.id, name=f'bot{testnet}',
+                        strategy=TradingStrategy.MEAN_REVERSION, symbol='BTCUSDT', trade_amount_usdt=100,
+                        status=BotStatus.ACTIVE, total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+        db.add(bot)
+        db.flush()
+        db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol='BTCUSDT', side=OrderSide.BUY,
+                     entry_price=100.0, quantity=1.0, amount_usdt=100.0, status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+
+    def handler(request):
+        # Binance US is below the stops (97), Binance is not
+        price = '90.0' if request.url.host == httpx.URL(BINANCE_PUBLIC_API_URL).host else '100.0'
+        return httpx.Response(200, json=[{'symbol': 'BTCUSDT', 'price': price}])
+
+    closed = []
+
+    async def fake_close(trade_id, price, exit_reason, session_factory):
+        closed.append((trade_id, price, exit_reason))
+        return True
+
+    original = exit_evaluator.close_trade
+    exit_evaluator.close_trade = fake_close
+    try:
+        run_with_transport(handler, lambda: exit_evaluator.check_exits(Session, use_lease=False))
+    finally:
+        exit_evaluator.close_trade = original
+
+    db = Session()
+    paper_trade = db.query(Trade).join(BotConfig).join(BinanceAccount).filter(BinanceAccount.testnet.is_(True)).one()
+    db.close()
+    assert closed == [(paper_trade.id, 90.0, 'STOP_LOSS')]
+
+if __name__ == "__main__":
+    test_stale_prices_expire()
+    test_one_snapshot_per_venue()
+    test_exit_checks_price_each_venue_on_its_own_snapshot()
+    print("price snapshot tests passed")
@@ -0,0 +1,66 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import time
+
+from app.services.rate_limiter import Priority, RateLimiter, request_priority, request_weight
+
+def test_request_weights():
+    assert request_weight('GET', '/api/v3/klines', {'limit': 50}) == 1
+    assert request_weight('GET', '/api/v3/klines', {'limit': 500}) == 5
+    assert request_weight('GET', '/api/v3/ticker/price') == 4
+    assert request_weight('GET', '/api/v3/ticker/price', {'symbol': 'BTCUSDT'}) == 2
+    assert request_weight('GET', '/api/v3/account') == 20
+    assert request_weight('POST', '/api/v3/order') == 1
+
+def test_exits_are_served_before_entries_and_dashboard():
+    async def scenario():
+        # 60 weight/s: an empty bucket refills one unit in ~17ms
+        limiter = RateLimiter(weight_per_minute=3600, headroom=1.0)
+        limiter.weight.tokens = 0
+        served = []
+
+        async def call(name, priority):
+            with request_priority(priority):
+                await limiter.acquire(1)
+            served.append(name)
+
+        await asyncio.gather(
+            call('dashboard', Priority.DASHBOARD),
+            call('entry', Priority.ENTRY),
+            call('exit', Priority.EXIT),
+        )
+        return served, limiter.stats()
+
+    served, stats = asyncio.run(scenario())
+    assert served == ['exit', 'entry', 'dashboard'], served
+    assert stats['queued'] == 3 and stats['max_queue_depth'] == 3
+    assert stats['queue_depth'] == 0 and stats['wait_p99_seconds'] > 0
+
+def test_used_weight_header_shrinks_budget():
+    limiter = RateLimiter(weight_per_minute=1200, headroom=1.0)
+    limiter.observe(200, {'X-MBX-USED-WEIGHT-1M': '1150'})
+    assert limiter.stats()['used_weight_1m'] == 1150
+    assert limiter.weight.tokens <= 51
+
+def test_order_count_is_per_account():
+    limiter = RateLimiter(orders_per_10s=10, headroom=1.0)
+    limiter.observe(200, {'X-MBX-ORDER-COUNT-10S': '10'}, order_account='a')
+    assert limiter._delay(1, 'a') > 0
+    assert limiter._delay(1, 'b') == 0
+
+def test_429_blocks_until_retry_after():
+    limiter = RateLimiter()
+    limiter.observe(429, {'Retry-After': '30'})
+    assert limiter.throttled == 1
+    assert 29 < limiter.blocked_until - time.monotonic() <= 30
+    assert limiter._delay(1, None) > 29
+
+if __name__ == "__main__":
+    test_request_weights()
+    test_exits_are_served_before_entries_and_dashboard()
+    test_used_weight_header_shrinks_budget()
+    test_order_count_is_per_account()
+    test_429_blocks_until_retry_after()
+    print("rate limiter tests passed")
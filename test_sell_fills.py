@@ -0,0 +1,128 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import routes_trades
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, Trade, OrderSide, OrderStatus, TradingStrategy
+)
+from app.services.trading_engine import TradingEngine
+
+logging.disable(logging.INFO)
+
+class FillsPart:
+    """Sells `fraction` of the order at 100, 0.1% fee, and expires the rest."""
+    testnet = True
+
+    def __init__(self, fraction: float = 1.0):
+        self.fraction = fraction
+        self.orders = []
+
+    async def place_market_order(self, symbol, side, quantity):
+        await asyncio.sleep(0.01)
+        self.orders.append((side, quantity))
+        executed = quantity * self.fraction
+        return {'success': True, 'order_id': len(self.orders), 'price': 100.0, 'quantity': executed,
+                'quote_quantity': 100.0 * executed, 'commission': 0.1 * executed,
+                'order': {'status': 'FILLED' if self.fraction == 1.0 else 'EXPIRED'}}
+
+class FixedPrice:
+    async def get_price(self, symbol):
+        return 100.0
+
+def make_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    user = User(email='fills@test', username='fills', hashed_password='x')
+    db.add(user)
+    db.flush()
+    account = BinanceAccount(user_id=user.id, name='paper', api_key='k', api_secret='s', testnet=True,
+                             balance_usdt=1000.0, is_active=True)
+    db.add(account)
+    db.flush()
+    bot = BotConfig(user_id=user.id, binance_account_id=account.id, name='fills',
+                    strategy=TradingStrategy.MEAN_REVERSION, symbol='BTCUSDT', trade_amount_usdt=80,
+                    status=BotStatus.ACTIVE, total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+    db.add(bot)
+    db.flush()
+    db.add(Trade(user_id=user.id, bot_config_id=bot.id, symbol='BTCUSDT', side=OrderSide.BUY,
+                 entry_price=80.0, quantity=1.0, amount_usdt=80.0, status=OrderStatus.FILLED))
+    db.commit()
+    db.close()
+    return Session
+
+def sell(Session, trader):
+    db = Session()
+    trade = db.query(Trade).one()
+    bot = db.query(BotConfig).one()
+    asyncio.run(TradingEngine(db, Session).execute_sell_order(bot, trader, trade, 100.0, 'TAKE_PROFIT'))
+    db.close()
+
+def test_profit_includes_the_fee():
+    Session = make_db()
+    sell(Session, FillsPart())
+    db = Session()
+    trade = db.query(Trade).one()
+    assert abs(trade.profit_loss_usdt - (100.0 - 0.1 - 80.0)) < 1e-9
+    assert abs(trade.profit_loss_percent - 19.9 / 80.0 * 100) < 1e-9
+    assert abs(db.query(BinanceAccount).one().balance_usdt - (1000.0 + 99.9)) < 1e-9
+    db.close()
+
+def test_partial_fill_leaves_the_rest_open():
+    Session = make_db()
+    sell(Session, FillsPart(fraction=0.6))
+    db = Session()
+    closed, rest = db.query(Trade).order_by(Trade.id).all()
+    assert closed.exit_price == 100.0 and abs(closed.quantity - 0.6) < 1e-12
+    assert abs(closed.profit_loss_usdt - (60.0 - 0.06 - 48.0)) < 1e-9
+    assert abs(closed.amount_usdt - 48.0) < 1e-9
+    assert rest.exit_price is None and rest.status == OrderStatus.FILLED
+    assert abs(rest.quantity - 0.4) < 1e-12 and rest.entry_price == 80.0
+    assert abs(db.query(BinanceAccount).one().balance_usdt - (1000.0 + 59.94)) < 1e-9
+    db.close()
+
+def test_concurrent_manual_trades_all_apply():
+    Session = make_db()
+    trader = FillsPart()
+    originals = routes_trades.get_trader, routes_trades.get_price_snapshot
+    routes_trades.get_trader = lambda account: trader
+    routes_trades.get_price_snapshot = lambda base_url: FixedPrice()
+
+    def request(side):
+        db = Session()
+        request = routes_trades.ManualTradeRequest(binance_account_id=1, symbol='BTCUSDT', side=side,
+                                                   amount_usdt=50.0)
+        return routes_trades.create_manual_trade(request, current_user=SimpleNamespace(id=1), db=db)
+
+    async def scenario(side):
+        return await asyncio.gather(request(side), request(side))
+
+    try:
+        asyncio.run(scenario('BUY'))
+        db = Session()
+        # Each buy: 50 USDT filled plus a 0.05 fee, neither write lost
+        assert abs(db.query(BinanceAccount).one().balance_usdt - (1000.0 - 2 * 50.05)) < 1e-9
+        db.close()
+
+        asyncio.run(scenario('SELL'))
+        db = Session()
+        assert abs(db.query(BinanceAccount).one().balance_usdt - (1000.0 - 2 * 50.05 + 2 * 49.95)) < 1e-9
+        db.close()
+    finally:
+        routes_trades.get_trader, routes_trades.get_price_snapshot = originals
+
+if __name__ == "__main__":
+    test_profit_includes_the_fee()
+    test_partial_fill_leaves_the_rest_open()
+    test_concurrent_manual_trades_all_apply()
+    print("sell fill tests passed")
@@ -0,0 +1,129 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+from app.models.models import TradingStrategy
+from app.services.backtest import run_backtest
+from app.strategies.grid_trading import GridTradingStrategy
+from app.strategies.mean_reversion import MeanReversionStrategy
+from app.strategies.registry import (
+    UnknownStrategyError, clear_strategy_cache, get_strategy, register_strategy, strategy_cache_stats,
+    strategy_class
+)
+
+logging.disable(logging.INFO)
+
+NEW_STRATEGIES = {
+    TradingStrategy.RSI_OVERSOLD: {'rsi_period': 7, 'rsi_oversold': 35, 'rsi_overbought': 65},
+    TradingStrategy.TREND_FOLLOWING: {'fast_period': 5, 'slow_period': 20},
+    TradingStrategy.GRID_TRADING: {'grid_period': 20, 'grid_spacing_pct': 0.3, 'grid_levels': 5},
+}
+
+def make_candles(n: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='h'),
+        'open': np.concatenate([[100.0], close[:-1]]),
+        'high': close * 1.003,
+        'low': close * 0.997,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def test_registry_shares_instances_per_params():
+    clear_strategy_cache()
+    first = get_strategy(TradingStrategy.MEAN_REVERSION, {'ma_period': 20, 'rsi_period': 14})
+    second = get_strategy('mean_reversion', {'rsi_period': 14, 'ma_period': 20})
+    other = get_strategy(TradingStrategy.MEAN_REVERSION, {'ma_period': 30})
+    assert first is second
+    assert other is not first and other.ma_period == 30
+    assert isinstance(first, MeanReversionStrategy)
+    stats = strategy_cache_stats()
+    assert stats['instances'] == 2 and stats['hits'] == 1 and stats['misses'] == 2
+
+    for strategy in TradingStrategy:
+        assert get_strategy(strategy, {}) is not None
+    try:
+        get_strategy('martingale', {})
+    except UnknownStrategyError:
+        pass
+    else:
+        raise AssertionError("unknown strategy resolved")
+
+    register_strategy('custom_mr', MeanReversionStrategy)
+    assert strategy_class('custom_mr') is MeanReversionStrategy
+    clear_strategy_cache()
+
+def test_strategy_modules_load_lazily():
+    script = (
+        "import sys; sys.path.insert(0, 'backend')\n"
+        "from app.strategies.registry import get_strategy\n"
+        "assert 'app.strategies.grid_trading' not in sys.modules\n"
+        "get_strategy('rsi_oversold', {})\n"
+        "assert 'app.strategies.rsi_oversold' in sys.modules\n"
+        "assert 'app.strategies.grid_trading' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', script], check=True)
+
+def test_live_and_batch_signals_match_the_backtest():
+    df = make_candles(600)
+    close, volume = df['close'].to_numpy(), df['volume'].to_numpy()
+    for name, params in NEW_STRATEGIES.items():
+        strategy = strategy_class(name)(params)
+        signals = strategy.backtest_signals(close, volume)
+        assert (signals == 1).sum() > 0 and (signals == -1).sum() > 0, name
+        expected = {1: 'BUY', -1: 'SELL', 0: 'HOLD'}
+        # Every prefix's live signal is the backtest signal at that candle
+        for end in range(strategy.min_candles + 5, len(df), 37):
+            live = strategy.generate_signal(df.iloc[:end])
+            assert live['signal'] == expected[int(signals[end - 1])], (name, end)
+
+        # Three shifted copies in one batch equal three single calls
+        batch_close = np.stack([close[:400], close[100:500], close[200:600]])
+        batch_volume = np.stack([volume[:400], volume[100:500], volume[200:600]])
+        batch = strategy.generate_signals_batch(['A', 'B', 'C'], batch_close, batch_volume)
+        for symbol, start in zip('ABC', (0, 100, 200)):
+            single = strategy.generate_signal(df.iloc[start:start + 400])
+            assert batch[symbol]['signal'] == single['signal'], (name, symbol)
+        assert strategy.generate_signal(df.iloc[:3])['signal'] == 'HOLD'
+
+def test_new_strategies_backtest():
+    df = make_candles(2000)
+    for name, params in NEW_STRATEGIES.items():
+        result = run_backtest(strategy_class(name)(params), df, stop_loss_percent=2, take_profit_percent=2)
+        assert result.stats['trades'] > 0, name
+        assert len(result.equity) == len(df)
+
+def test_grid_lines_that_trigger():
+    strategy = GridTradingStrategy({'grid_spacing_pct': 1.0, 'grid_levels': 3})
+    # Offsets from the center in percent; grid lines at +-1, +-2, +-3
+    offset = np.array([[0.5, -0.5, -1.5, -0.5, -3.5, -4.5, 0.5, 1.5, 3.5, 4.5, 3.5]])
+    signals = strategy.signal_matrix({'offset_pct': offset})
+    expected = [
+        0,   # start
+        0,   # through the center: not a grid line
+        1,   # through -1
+        0,   # back up, still below the center
+        1,   # through -2 and -3
+        0,   # further below the lowest line
+        0,   # back above the center
+        -1,  # through +1
+        -1,  # through +2 and +3
+        0,   # above the top line
+        0,   # falling above the center
+    ]
+    assert signals.tolist() == [expected]
+
+if __name__ == "__main__":
+    test_registry_shares_instances_per_params()
+    test_strategy_modules_load_lazily()
+    test_live_and_batch_signals_match_the_backtest()
+    test_new_strategies_backtest()
+    test_grid_lines_that_trigger()
+    print("strategy tests passed")
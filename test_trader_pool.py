@@ -0,0 +1,73 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import time
+from types import SimpleNamespace
+
+from app.services.matching_engine import PAPER_STARTING_BALANCE
+from app.services.trader_pool import TraderPool, credentials_hash
+
+def make_account(account_id: int, api_key: str = 'key', api_secret: str = 'secret', testnet: bool = False,
+                 balance_usdt=None):
+    return SimpleNamespace(id=account_id, api_key=api_key, api_secret=api_secret, testnet=testnet,
+                           balance_usdt=balance_usdt)
+
+def test_reuses_trader_until_credentials_change():
+    pool = TraderPool(max_size=10, ttl_seconds=60)
+    account = make_account(1)
+    trader = pool.get(account)
+    assert pool.get(account) is trader
+
+    account.api_secret = 'rotated'
+    rotated = pool.get(account)
+    assert rotated is not trader and rotated.api_secret == 'rotated'
+    # Switching to paper is a credentials change too
+    account.testnet = True
+    assert pool.get(account) is not rotated
+    stats = pool.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 3, 1)
+
+    assert credentials_hash('k', 's', False) != credentials_hash('k', 's', True)
+    assert 'secret' not in credentials_hash('key', 'secret', False)
+
+def test_invalidate_drops_the_entry():
+    pool = TraderPool(max_size=10, ttl_seconds=60)
+    account = make_account(1)
+    trader = pool.get(account)
+    pool.invalidate(1)
+    assert pool.stats()['size'] == 0
+    assert pool.get(account) is not trader
+
+def test_idle_entries_expire_and_lru_is_bounded():
+    pool = TraderPool(max_size=2, ttl_seconds=0.05)
+    first = pool.get(make_account(1))
+    pool.get(make_account(2))
+    time.sleep(0.06)
+    # Any lookup sweeps the expired entries first
+    pool.get(make_account(3))
+    assert pool.stats()['size'] == 1 and pool.stats()['evictions'] == 2
+    assert pool.get(make_account(1)) is not first
+
+    pool = TraderPool(max_size=2, ttl_seconds=60)
+    accounts = [make_account(i) for i in range(3)]
+    traders = [pool.get(account) for account in accounts[:2]]
+    pool.get(accounts[0])
+    pool.get(accounts[2])
+    # Account 1 was least recently used
+    assert pool.get(accounts[0]) is traders[0]
+    assert pool.get(accounts[1]) is not traders[1]
+
+def test_paper_balance_follows_the_database():
+    pool = TraderPool(max_size=10, ttl_seconds=60)
+    account = make_account(1, testnet=True, balance_usdt=None)
+    trader = pool.get(account)
+    assert trader.paper_balance == PAPER_STARTING_BALANCE
+    account.balance_usdt = 123.0
+    assert pool.get(account).paper_balance == 123.0
+
+if __name__ == "__main__":
+    test_reuses_trader_until_credentials_change()
+    test_invalidate_drops_the_entry()
+    test_idle_entries_expire_and_lru_is_bounded()
+    test_paper_balance_follows_the_database()
+    print("trader pool tests passed")
@@ -0,0 +1,176 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import main
+from app.database import Base
+from app.models.models import (
+    User, BinanceAccount, BotConfig, BotStatus, LeaderLease, TradingRun, TradingRunStatus,
+    TradingStrategy
+)
+from app.services import scheduler, trading_engine
+from app.services.leader_lease import TRADING_CYCLE_LEASE
+
+logging.disable(logging.INFO)
+
+def make_session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    db = Session()
+    for name in ('alice', 'bob'):
+        db.add(User(email=f'{name}@test', username=name, hashed_password='x'))
+    db.commit()
+    db.close()
+    return Session
+
+class FakeEngine:
+    """Stands in for TradingEngine in process_trading_runs."""
+    calls = []
+    fail = False
+
+    def __init__(self, db, session_factory=None):
+        pass
+
+    async def execute_hourly_trading(self, cycle_key=None):
+        FakeEngine.calls.append(cycle_key)
+        if FakeEngine.fail:
+            raise RuntimeError("exchange down")
+        return {'bots': 2, 'wall_clock_seconds': 0.1}
+
+def run_processor(Session):
+    original = scheduler.TradingEngine
+    scheduler.TradingEngine = FakeEngine
+    try:
+        asyncio.run(scheduler.process_trading_runs(Session))
+    finally:
+        scheduler.TradingEngine = original
+
+def test_execute_now_queues_a_run_only_its_owner_can_read():
+    Session = make_session_factory()
+    original = main.SessionLocal
+    main.SessionLocal = Session
+    try:
+        alice, bob = SimpleNamespace(id=1), SimpleNamespace(id=2)
+        queued = asyncio.run(main.execute_trading_now(current_user=alice))
+        assert queued['status'] == TradingRunStatus.PENDING and queued['started_at'] is None
+        run = asyncio.run(main.get_trading_run(queued['run_id'], current_user=alice))
+        assert run['run_id'] == queued['run_id']
+        try:
+            asyncio.run(main.get_trading_run(queued['run_id'], current_user=bob))
+            raise AssertionError("another user read the run")
+        except HTTPException as e:
+            assert e.status_code == 404
+    finally:
+        main.SessionLocal = original
+
+    db = Session()
+    assert db.query(TradingRun).one().requested_by == 1
+    db.close()
+
+def test_runs_move_to_completed_or_failed():
+    Session = make_session_factory()
+    db = Session()
+    db.add(TradingRun(requested_by=1, status=TradingRunStatus.PENDING))
+    db.commit()
+
+    FakeEngine.calls, FakeEngine.fail = [], False
+    run_processor(Session)
+    run = db.query(TradingRun).one()
+    db.refresh(run)
+    assert run.status == TradingRunStatus.COMPLETED and run.stats['bots'] == 2
+    assert run.started_at is not None and run.finished_at >= run.started_at
+    assert FakeEngine.calls == [None]
+
+    db.add(TradingRun(requested_by=1, status=TradingRunStatus.PENDING))
+    db.commit()
+    FakeEngine.fail = True
+    run_processor(Session)
+    failed = db.query(TradingRun).filter(TradingRun.id != run.id).one()
+    assert failed.status == TradingRunStatus.FAILED and failed.error_message == "exchange down"
+    assert failed.finished_at is not None
+    db.close()
+    FakeEngine.fail = False
+
+def test_runs_wait_for_the_lease_holder():
+    Session = make_session_factory()
+    db = Session()
+    db.add(LeaderLease(name=TRADING_CYCLE_LEASE, holder='other-replica',
+                       expires_at=datetime.utcnow() + timedelta(seconds=60)))
+    db.add(TradingRun(requested_by=1, status=TradingRunStatus.PENDING))
+    db.commit()
+
+    FakeEngine.calls = []
+    run_processor(Session)
+    assert FakeEngine.calls == []
+    assert db.query(TradingRun).one().status == TradingRunStatus.PENDING
+
+    # Claim mode: every replica may take runs; the run's bots are claimed under its key
+    original = scheduler.TRADING_CYCLE_MODE
+    scheduler.TRADING_CYCLE_MODE = 'claim'
+    try:
+        run_processor(Session)
+    finally:
+        scheduler.TRADING_CYCLE_MODE = original
+    run_id = db.query(TradingRun.id).scalar()
+    assert FakeEngine.calls == [f"run-{run_id}"]
+    db.close()
+
+def test_overlapping_cycles_skip_bots_in_flight():
+    Session = make_session_factory()
+    db = Session()
+    account = BinanceAccount(user_id=1, name='paper', api_key='k', api_secret='s', testnet=True,
+                             balance_usdt=1000.0)
+    db.add(account)
+    db.flush()
+    bot = BotConfig(user_id=1, binance_account_id=account.id, name='bot', strategy=TradingStrategy.MEAN_REVERSION,
+                    symbol='BTCUSDT', trade_amount_usdt=100, status=BotStatus.ACTIVE,
+                    total_trades=0, total_profit_usdt=0.0, win_rate=0.0)
+    db.add(bot)
+    db.commit()
+    bot_id = bot.id
+    db.close()
+
+    started = []
+
+    async def slow_process(self, bot, open_trade, market_data=None):
+        started.append(bot.id)
+        await asyncio.sleep(0.05)
+
+    class NoPrefetch:
+        @staticmethod
+        async def prefetch(bots, session_factory):
+            return None
+
+    originals = trading_engine.TradingEngine._process_bot_isolated, trading_engine.MarketDataSnapshot
+    trading_engine.TradingEngine._process_bot_isolated = slow_process
+    trading_engine.MarketDataSnapshot = NoPrefetch
+
+    async def scenario():
+        first = trading_engine.TradingEngine(Session(), Session)
+        second = trading_engine.TradingEngine(Session(), Session)
+        return await asyncio.gather(first.execute_hourly_trading(), second.execute_bots([bot_id]))
+
+    try:
+        scheduled, requested = asyncio.run(scenario())
+    finally:
+        trading_engine.TradingEngine._process_bot_isolated, trading_engine.MarketDataSnapshot = originals
+    assert started == [bot_id]
+    assert scheduled['bots'] == 1 and requested['bots'] == 0
+    assert not trading_engine._bots_in_flight
+
+if __name__ == "__main__":
+    test_execute_now_queues_a_run_only_its_owner_can_read()
+    test_runs_move_to_completed_or_failed()
+    test_runs_wait_for_the_lease_holder()
+    test_overlapping_cycles_skip_bots_in_flight()
+    print("trading run tests passed")
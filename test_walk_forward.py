@@ -0,0 +1,88 @@
+import sys
+sys.path.insert(0, 'backend')
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.services.param_sweep import grid_params
+from app.services.walk_forward import make_windows, walk_forward
+from app.strategies.mean_reversion import MeanReversionStrategy
+
+logging.disable(logging.INFO)
+
+SPACE = {
+    'rsi_period': [7, 14],
+    'ma_period': [10, 20],
+    'rsi_oversold': [30, 45],
+    'price_deviation': [0.5, 1.0]
+}
+
+class CountingStrategy(MeanReversionStrategy):
+    indicator_passes = 0
+
+    def backtest_indicators(self, close, volume):
+        CountingStrategy.indicator_passes += 1
+        return super().backtest_indicators(close, volume)
+
+def make_candles(n: int, seed: int = 8) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'open': np.concatenate([[100.0], close[:-1]]),
+        'high': close * 1.002,
+        'low': close * 0.998,
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    })
+
+def test_windows_roll_and_anchor():
+    assert make_windows(100, 40, 20) == [(0, 40, 60), (20, 60, 80), (40, 80, 100)]
+    assert make_windows(100, 40, 20, anchored=True) == [(0, 40, 60), (0, 60, 80), (0, 80, 100)]
+    assert make_windows(50, 40, 20) == []
+
+def test_indicators_once_and_parallel_matches_serial():
+    df = make_candles(12_000)
+    combos = grid_params(SPACE)
+    CountingStrategy.indicator_passes = 0
+    serial = walk_forward(df, combos, 3000, 1500, strategy_class=CountingStrategy, workers=1, interval='1m')
+    # One pass per (rsi_period, ma_period), not per combo or window
+    assert CountingStrategy.indicator_passes == 4
+    parallel = walk_forward(df, combos, 3000, 1500, strategy_class=CountingStrategy, workers=3, interval='1m')
+    pd.testing.assert_frame_equal(serial.windows, parallel.windows)
+    pd.testing.assert_frame_equal(serial.trades, parallel.trades)
+    assert np.array_equal(serial.equity, parallel.equity)
+
+def test_out_of_sample_is_stitched_from_test_windows():
+    df = make_candles(12_000)
+    result = walk_forward(df, grid_params(SPACE), 3000, 1500, workers=1, interval='1m')
+    windows = result.windows
+    assert len(windows) == 6 and result.stats['windows'] == 6
+    assert len(result.equity) == 9000 and len(result.timestamps) == 9000
+    assert result.timestamps[0] == df['timestamp'].iloc[3000]
+    assert result.trades['entry_index'].min() >= 3000
+    assert abs(result.equity[-1] - (10000.0 + result.trades['profit_loss_usdt'].sum())) < 1e-6
+
+    # The first window's winner, checked by hand on full-history signals
+    close = df['close'].to_numpy()
+    volume = df['volume'].to_numpy()
+    best, best_score = None, None
+    for params in grid_params(SPACE):
+        strategy = MeanReversionStrategy({**params, 'force_test_buy': False})
+        signals = strategy.backtest_signals(close, volume)
+        stats = run_backtest(strategy, df.iloc[:3000], signals=signals[:3000], interval='1m').stats
+        score = (stats['trades'] >= 1, stats['sharpe'])
+        if best_score is None or score > best_score:
+            best, best_score = params, score
+    first = windows.iloc[0]
+    assert {name: first[name] for name in SPACE} == best
+    assert abs(first['train_sharpe'] - best_score[1]) < 1e-12
+
+if __name__ == "__main__":
+    test_windows_roll_and_anchor()
+    test_indicators_once_and_parallel_matches_serial()
+    test_out_of_sample_is_stitched_from_test_windows()
+    print("walk forward tests passed")